@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+# Defaults can be overridden per deployment; a max size of 0 disables caching.
+CACHE_MAX_BYTES = int(os.getenv("TEXTPRO_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+CACHE_TTL_SECONDS = float(os.getenv("TEXTPRO_CACHE_TTL_SECONDS", 0)) or None
+# Larger inputs are computed without hashing them for a key; a repeat is rare
+# and hashing would add a full pass over the document to every call
+CACHE_MAX_INPUT_BYTES = int(os.getenv("TEXTPRO_CACHE_MAX_INPUT_BYTES", 1024 * 1024))
+
+
+def input_size(text: Union[str, bytes]) -> int:
+    """Length of an input without copying it: characters for a str, bytes for a buffer"""
+    return len(text) if isinstance(text, str) else memoryview(text).nbytes
+
+
+def cache_key(operation: str, text: Union[str, bytes], params: Hashable = ()) -> Tuple[str, bytes, Hashable]:
+    """Key a result by operation, parameters and a 128-bit digest of the UTF-8 text.
+
+    Buffers are hashed in place. Lone surrogates, which the extension accepts
+    in a str, are encoded as-is rather than rejected.
+    """
+    data = text.encode("utf-8", "surrogatepass") if isinstance(text, str) else memoryview(text)
+    return operation, hashlib.blake2b(data, digest_size=16).digest(), params
+
+
+# Containers up to this many items are measured item by item; larger ones
+# (a word_count vocabulary, a list of sentences) are extrapolated from their
+# first item, so estimating a result never walks its whole vocabulary
+SAMPLED_CONTAINER_ITEMS = 16
+
+
+def estimate_size(value: Any) -> int:
+    """Rough number of bytes held by a JSON-like result"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        if len(value) > SAMPLED_CONTAINER_ITEMS:
+            key, item = next(iter(value.items()))
+            return size + len(value) * (estimate_size(key) + estimate_size(item))
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        if len(value) > SAMPLED_CONTAINER_ITEMS:
+            return size + len(value) * estimate_size(value[0])
+        size += sum(estimate_size(item) for item in value)
+    return size
+
+
+class ResultCache:
+    """Thread-safe LRU of service results, bounded by their estimated size in bytes"""
+
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES, ttl_seconds: Optional[float] = CACHE_TTL_SECONDS,
+                 max_input_bytes: int = CACHE_MAX_INPUT_BYTES):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_input_bytes = max_input_bytes
+        self._entries: "OrderedDict[Any, Tuple[Dict[str, Any], int, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._current_bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def get(self, key: Any) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, size, stored_at = entry
+            if self.ttl_seconds is not None and time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._current_bytes -= size
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+        # Callers add per-request fields, so each gets its own top-level dict
+        return dict(value)
+
+    def put(self, key: Any, value: Dict[str, Any]) -> None:
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._current_bytes -= previous[1]
+            self._entries[key] = (dict(value), size, time.monotonic())
+            self._current_bytes += size
+            while self._current_bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._current_bytes -= evicted_size
+                self._evictions += 1
+
+    def get_or_compute(
+        self,
+        operation: str,
+        text: Union[str, bytes],
+        params: Hashable,
+        compute: Callable[[], Dict[str, Any]],
+        enabled: bool = True,
+    ) -> Dict[str, Any]:
+        """Return the cached result for this input, computing and storing it on a miss.
+
+        Concurrent misses for the same key may both compute; the last one stored
+        wins. Inputs over `max_input_bytes` are never keyed or cached.
+        """
+        if not enabled or self.max_bytes <= 0 or input_size(text) > self.max_input_bytes:
+            return compute()
+        key = cache_key(operation, text, params)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+        value = compute()
+        self.put(key, value)
+        return dict(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._current_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "size_bytes": self._current_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "max_input_bytes": self.max_input_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+result_cache = ResultCache()
@@ -0,0 +1,53 @@
+"""
+Word counts as NumPy arrays or an Arrow table, built from the flat buffers
+returned by ``text_processor_rust.count_words_columnar``. The Arrow table wraps
+the buffers without creating per-word Python objects; NumPy has no array over
+UTF-8 data and offsets, so its vocabulary holds one ``str`` per word. NumPy and
+PyArrow are optional and imported on first use.
+"""
+from typing import TYPE_CHECKING, Any, Optional, Tuple, Union
+import text_processor_rust
+
+if TYPE_CHECKING:
+    import numpy as np
+    import pyarrow as pa
+
+TextLike = Union[str, bytes, bytearray, memoryview]
+
+
+def _require(module: str) -> Any:
+    try:
+        return __import__(module)
+    except ImportError as e:
+        raise ImportError(f"{module} is required for this output format: pip install {module}") from e
+
+
+def count_words_numpy(text: TextLike, num_threads: Optional[int] = None) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Return ``(vocabulary, counts)`` as a string array and an int64 array.
+
+    The vocabulary is variable-width (``StringDType``, or ``object`` before
+    NumPy 2), so its size follows the words' total length instead of growing
+    with the longest word. ``counts`` is a read-only view over the buffer Rust
+    filled.
+    """
+    np = _require("numpy")
+    columns = text_processor_rust.count_words_columnar(text, num_threads=num_threads)
+    data = columns["data"]
+    offsets = np.frombuffer(columns["offsets"], dtype="<i8").tolist()
+    words = [data[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+    string_dtype = getattr(getattr(np, "dtypes", None), "StringDType", None)
+    vocabulary = np.array(words, dtype=string_dtype() if string_dtype is not None else object)
+    counts = np.frombuffer(columns["counts"], dtype="<i8")
+    return vocabulary, counts
+
+
+def count_words_arrow(text: TextLike, num_threads: Optional[int] = None) -> "pa.Table":
+    """Return a table with a ``large_string`` ``word`` column and an int64 ``count`` column"""
+    pa = _require("pyarrow")
+    columns = text_processor_rust.count_words_columnar(text, num_threads=num_threads)
+    length = columns["length"]
+    words = pa.LargeStringArray.from_buffers(
+        length, pa.py_buffer(columns["offsets"]), pa.py_buffer(columns["data"])
+    )
+    counts = pa.Array.from_buffers(pa.int64(), length, [None, pa.py_buffer(columns["counts"])])
+    return pa.table({"word": words, "count": counts})
@@ -0,0 +1,45 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, Callable, Dict
+
+# The Rust extension releases the GIL while it works, so a plain thread pool
+# is enough to spread requests over every core of a single uvicorn worker.
+MAX_WORKERS = int(os.getenv("TEXTPRO_MAX_WORKERS", os.cpu_count() or 4))
+# Large documents get a few threads of their own so they cannot occupy every
+# worker; the Rust side already parallelises a single large document.
+LARGE_LANE_WORKERS = int(os.getenv("TEXTPRO_LARGE_LANE_WORKERS", max(1, MAX_WORKERS // 4)))
+
+LANE_WORKERS = {"small": MAX_WORKERS, "large": LARGE_LANE_WORKERS}
+
+# Lane of the request being handled, set by the scheduler middleware; work
+# started outside a request runs on the small lane
+current_lane: ContextVar[str] = ContextVar("textpro_lane", default="small")
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def get_executor(lane: str = "small") -> ThreadPoolExecutor:
+    """Return the executor of a lane, creating it on first use"""
+    executor = _executors.get(lane)
+    if executor is None:
+        executor = _executors[lane] = ThreadPoolExecutor(
+            max_workers=LANE_WORKERS[lane],
+            thread_name_prefix=f"textpro-{lane}",
+        )
+    return executor
+
+
+async def run_in_executor(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Run a blocking service call on the bounded executor of the current lane"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(current_lane.get()), partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """Stop the executors, waiting for in-flight work to finish"""
+    while _executors:
+        _, executor = _executors.popitem()
+        executor.shutdown(wait=True)
@@ -0,0 +1,365 @@
+"""
+Asynchronous jobs for large offline workloads.
+
+A job is a batch of texts, or a file under ``TEXTPRO_JOB_DATA_DIR``, run
+through one operation. Runner threads take jobs from a bounded queue and fan
+their texts out in chunks to a local process pool (spawn start method), so
+large jobs never occupy the request executor. Jobs and their results live in
+memory and expire ``TEXTPRO_JOB_TTL_SECONDS`` after they finish.
+"""
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+JOB_WORKERS = int(os.getenv("TEXTPRO_JOB_WORKERS", os.cpu_count() or 2))
+JOB_QUEUE_SIZE = int(os.getenv("TEXTPRO_JOB_QUEUE_SIZE", 64))
+JOB_RUNNERS = int(os.getenv("TEXTPRO_JOB_RUNNERS", 2))
+JOB_CHUNK_SIZE = int(os.getenv("TEXTPRO_JOB_CHUNK_SIZE", 256))
+JOB_TTL_SECONDS = float(os.getenv("TEXTPRO_JOB_TTL_SECONDS", 3600))
+# File jobs may only read below this directory; unset disables them
+JOB_DATA_DIR_ENV = "TEXTPRO_JOB_DATA_DIR"
+
+OPERATIONS = ("count_words", "extract_emails", "clean_text", "analyze_sentiment")
+FINISHED = ("succeeded", "failed", "cancelled")
+
+
+class QueueFull(Exception):
+    """The job queue is at capacity"""
+
+
+# ---------------------------------------------------------------------------
+# Worker process side: top-level functions so they pickle under spawn
+# ---------------------------------------------------------------------------
+
+def _init_worker() -> None:
+    from .lexicons import configure_jieba, load_configured_lexicons
+
+    configure_jieba()
+    load_configured_lexicons()
+
+
+def _run_texts(operation: str, texts: List[str], lexicon: Optional[str]) -> List[Tuple[Any, Optional[str]]]:
+    """Process one chunk of texts; returns a ``(result, error)`` pair per text"""
+    from .services import SentimentService, TextProcessorService
+
+    if operation == "analyze_sentiment":
+        return [(result, None) for result in SentimentService.batch_analyze_sentiment(texts, lexicon=lexicon)]
+    batch = getattr(TextProcessorService, f"{operation}_batch")
+    return [(item["result"], item["error"]) for item in batch(texts)["results"]]
+
+
+def _run_document(operation: str, path: str, lexicon: Optional[str]) -> List[Tuple[Any, Optional[str]]]:
+    """Process a whole file as one document; long texts are scored per sentence"""
+    import text_processor_rust
+    from .services import SentimentService
+
+    if operation == "count_words":
+        word_count = text_processor_rust.count_words_file(path)
+        return [({
+            "word_count": word_count,
+            "total_words": sum(word_count.values()),
+            "unique_words": len(word_count),
+        }, None)]
+    if operation == "extract_emails":
+        emails = text_processor_rust.extract_emails_file(path)
+        return [({"emails": emails, "email_count": len(emails)}, None)]
+    with open(path, "rb") as f:
+        data = f.read()
+    if operation == "analyze_sentiment":
+        return [(SentimentService.analyzer.analyze(data, lexicon=lexicon, granularity="sentence"), None)]
+    # Lengths are in characters, as on /clean-text
+    text = data.decode("utf-8")
+    cleaned = text_processor_rust.clean_text(text)
+    return [({"cleaned_text": cleaned, "original_length": len(text), "cleaned_length": len(cleaned)}, None)]
+
+
+# ---------------------------------------------------------------------------
+# Server side
+# ---------------------------------------------------------------------------
+
+def resolve_data_path(name: str) -> str:
+    """Absolute path of ``name`` inside the job data directory.
+
+    Raises ValueError when file jobs are disabled or the path escapes the
+    directory (absolute paths, ``..`` or symlinks pointing outside).
+    """
+    data_dir = os.getenv(JOB_DATA_DIR_ENV)
+    if not data_dir:
+        raise ValueError(f"File jobs are disabled; set {JOB_DATA_DIR_ENV} to allow them")
+    root = os.path.realpath(data_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root:
+        raise ValueError(f"File {name!r} is outside the job data directory")
+    if not os.path.isfile(path):
+        raise ValueError(f"File {name!r} does not exist")
+    return path
+
+
+class Job:
+    def __init__(self, operation: str, texts: Optional[List[str]], path: Optional[str],
+                 split: str, lexicon: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.operation = operation
+        self.texts = texts
+        self.path = path
+        self.split = split
+        self.lexicon = lexicon
+        self.status = "queued"
+        self.error: Optional[str] = None
+        self.results: List[Optional[Tuple[Any, Optional[str]]]] = []
+        # Unknown for line-split files until the whole file has been read
+        self.total: Optional[int] = len(texts) if texts is not None else (1 if split == "document" else None)
+        self.completed = 0
+        self.failed = 0
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_requested = False
+
+    def chunks(self) -> Iterator[List[str]]:
+        """Texts in chunks of JOB_CHUNK_SIZE; files are read lazily, one line per text"""
+        if self.texts is not None:
+            for start in range(0, len(self.texts), JOB_CHUNK_SIZE):
+                yield self.texts[start:start + JOB_CHUNK_SIZE]
+            return
+        chunk: List[str] = []
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                chunk.append(line)
+                if len(chunk) == JOB_CHUNK_SIZE:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def status_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "operation": self.operation,
+            "total": self.total,
+            "completed": self.completed,
+            "failed": self.failed,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """In-memory job store, bounded queue and process pool"""
+
+    def __init__(self, workers: int = JOB_WORKERS, queue_size: int = JOB_QUEUE_SIZE,
+                 runners: int = JOB_RUNNERS, ttl_seconds: float = JOB_TTL_SECONDS):
+        self.workers = workers
+        self.ttl_seconds = ttl_seconds
+        self._queue: "queue.Queue[Optional[Job]]" = queue.Queue(maxsize=queue_size)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._runner_count = runners
+        self._runners: List[threading.Thread] = []
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._runners:
+                return
+            self._pool = self._new_pool()
+            for index in range(self._runner_count):
+                runner = threading.Thread(target=self._run, name=f"textpro-job-runner-{index}", daemon=True)
+                runner.start()
+                self._runners.append(runner)
+
+    def submit(self, operation: str, texts: Optional[List[str]] = None, file: Optional[str] = None,
+               split: str = "lines", lexicon: Optional[str] = None) -> Job:
+        """Queue a job; raises QueueFull when the queue is at capacity and
+        ValueError for an invalid request"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        if (texts is None) == (file is None):
+            raise ValueError("Provide either texts or file")
+        path = resolve_data_path(file) if file is not None else None
+        self._ensure_started()
+        self._purge_expired()
+
+        job = Job(operation, texts, path, split, lexicon)
+        with self._lock:
+            self._jobs[job.id] = job
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                del self._jobs[job.id]
+            raise QueueFull(f"Job queue is full ({self._queue.maxsize} jobs waiting)")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list_jobs(self, offset: int = 0, limit: int = 50) -> Tuple[int, List[Job]]:
+        """Most recent jobs first"""
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda job: job.created_at, reverse=True)
+        return len(jobs), jobs[offset:offset + limit]
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Stop a job; chunks already running in the pool finish but are discarded"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status not in FINISHED:
+                job.cancel_requested = True
+                if job.status == "queued":
+                    self._finish(job, "cancelled")
+        return job
+
+    def results(self, job: Job, offset: int, limit: int) -> List[Dict[str, Any]]:
+        """One page of per-text results; texts a cancelled job never reached carry an error"""
+        page = []
+        for index, pair in enumerate(job.results[offset:offset + limit], start=offset):
+            result, error = pair if pair is not None else (None, "not processed")
+            page.append({"index": index, "result": result, "error": error})
+        return page
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self.workers,
+            "queue_size": self._queue.maxsize,
+            "queued": self._queue.qsize(),
+            "jobs": counts,
+        }
+
+    def shutdown(self) -> None:
+        """Cancel unfinished jobs and stop the runners and the pool.
+
+        Blocks until the chunks already sent to workers finish, so call it off
+        the event loop.
+        """
+        with self._lock:
+            runners, self._runners = self._runners, []
+            pool, self._pool = self._pool, None
+            for job in self._jobs.values():
+                if job.status not in FINISHED:
+                    job.cancel_requested = True
+        for _ in runners:
+            self._queue.put(None)
+        for runner in runners:
+            runner.join()
+        if pool is not None:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            # Dispatch and cancel both move a job out of "queued" under the lock,
+            # so a job is either cancelled before it starts or seen as running
+            with self._lock:
+                if job.status != "queued":
+                    continue
+                pool = self._pool
+                if job.cancel_requested or pool is None:
+                    # A pool of None means shutting down
+                    self._finish(job, "cancelled")
+                    continue
+                job.status = "running"
+                job.started_at = time.time()
+            try:
+                self._execute(job, pool)
+            except BrokenProcessPool as e:
+                # A worker died (e.g. out of memory); later jobs get a fresh pool
+                with self._lock:
+                    job.error = f"Worker process failed: {e}"
+                    self._finish(job, "failed")
+                self._replace_pool(pool)
+            except Exception as e:
+                with self._lock:
+                    job.error = str(e)
+                    self._finish(job, "failed")
+            else:
+                with self._lock:
+                    self._finish(job, "cancelled" if job.cancel_requested else "succeeded")
+
+    def _replace_pool(self, broken: ProcessPoolExecutor) -> None:
+        """Swap in a new pool unless another runner already replaced the broken one"""
+        with self._lock:
+            if self._pool is not broken:
+                return
+            self._pool = self._new_pool()
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _execute(self, job: Job, pool: ProcessPoolExecutor) -> None:
+        if job.split == "document" and job.path is not None:
+            job.results = [None]
+            self._store(job, 0, pool.submit(_run_document, job.operation, job.path, job.lexicon).result())
+            return
+
+        # At most one chunk per worker in flight, so a huge file is never
+        # read far ahead of the pool
+        in_flight: Dict[Future, int] = {}
+        offset = 0
+        for chunk in job.chunks():
+            if job.cancel_requested:
+                break
+            if len(in_flight) >= self.workers:
+                self._collect(job, in_flight, FIRST_COMPLETED)
+            job.results.extend([None] * len(chunk))
+            in_flight[pool.submit(_run_texts, job.operation, chunk, job.lexicon)] = offset
+            offset += len(chunk)
+        job.total = offset
+        self._collect(job, in_flight, None)
+
+    def _collect(self, job: Job, in_flight: Dict[Future, int], return_when: Optional[str]) -> None:
+        done: Set[Future]
+        if return_when is None:
+            done = set(in_flight)
+            wait(done)
+        else:
+            done, _ = wait(in_flight, return_when=return_when)
+        for future in done:
+            self._store(job, in_flight.pop(future), future.result())
+
+    @staticmethod
+    def _store(job: Job, offset: int, pairs: List[Tuple[Any, Optional[str]]]) -> None:
+        job.results[offset:offset + len(pairs)] = pairs
+        job.completed += len(pairs)
+        job.failed += sum(1 for _, error in pairs if error is not None)
+
+    def _finish(self, job: Job, status: str) -> None:
+        """Called with the lock held"""
+        job.status = status
+        job.finished_at = time.time()
+        job.texts = None
+
+    def _purge_expired(self) -> None:
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job.finished_at is not None and job.finished_at < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+
+
+job_manager = JobManager()
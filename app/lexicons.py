@@ -0,0 +1,61 @@
+import os
+import threading
+from typing import Dict, Optional
+import text_processor_rust
+
+# Lexicons to load at startup, as comma-separated name=path pairs, e.g.
+# TEXTPRO_LEXICONS="retail=/data/retail.tplx,support=/data/support.tsv".
+# Compiled files are memory-mapped, so every uvicorn worker that loads the
+# same file shares one copy through the page cache.
+LEXICONS_ENV = "TEXTPRO_LEXICONS"
+# Optional jieba user dictionary ("word [freq] [tag]" per line), loaded once
+# before the first Chinese text is segmented.
+JIEBA_USER_DICT_ENV = "TEXTPRO_JIEBA_USER_DICT"
+
+_lock = threading.Lock()
+_generations: Dict[str, int] = {}
+
+
+def configured_lexicons() -> Dict[str, str]:
+    """Lexicon names mapped to the paths configured in the environment"""
+    paths = {}
+    for pair in os.getenv(LEXICONS_ENV, "").split(","):
+        if not pair.strip():
+            continue
+        name, sep, path = pair.partition("=")
+        if not sep or not name.strip() or not path.strip():
+            raise ValueError(f"{LEXICONS_ENV} entries must look like name=path, got {pair!r}")
+        paths[name.strip()] = path.strip()
+    return paths
+
+
+def load_lexicon(name: str, path: str) -> int:
+    """Load (or atomically replace) a lexicon and bump its generation"""
+    entries = text_processor_rust.load_lexicon(name, path)
+    with _lock:
+        _generations[name] = _generations.get(name, 0) + 1
+    return entries
+
+
+def load_configured_lexicons() -> Dict[str, int]:
+    return {name: load_lexicon(name, path) for name, path in configured_lexicons().items()}
+
+
+def reload_lexicon(name: str) -> int:
+    """Reload a configured lexicon from its file; raises KeyError if it is not configured"""
+    path = configured_lexicons()[name]
+    return load_lexicon(name, path)
+
+
+def configure_jieba() -> Optional[str]:
+    """Initialise jieba with the configured user dictionary, if any"""
+    user_dict = os.getenv(JIEBA_USER_DICT_ENV) or None
+    if user_dict:
+        text_processor_rust.configure_jieba(user_dict)
+    return user_dict
+
+
+def lexicon_generation(name: Optional[str]) -> int:
+    """Changes whenever the lexicon is reloaded, so cached results can be told apart"""
+    with _lock:
+        return _generations.get(name or "default", 0)
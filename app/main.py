@@ -1,16 +1,59 @@
-from fastapi import FastAPI, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import PlainTextResponse
+from typing import Optional
 from fastapi.middleware.cors import CORSMiddleware
-from .models import TextInput, WordCountResponse, EmailResponse, CleanTextResponse, SentimentInput, SentimentResponse
+from .models import (
+    TextInput, WordCountInput, WordCountResponse, EmailResponse, CleanTextResponse, SentimentInput, SentimentResponse,
+    SentimentBatchInput, SentimentBatchResponse, MAX_DOCUMENT_CHARS, TextBatchInput, WordCountBatchResponse,
+    EmailBatchResponse, CleanTextBatchResponse, LanguageBatchResponse, ProcessResponse, JobInput, JobStatus,
+    JobList, JobResultsPage
+)
 from .services import TextProcessorService, SentimentService
+from .executor import get_executor, run_in_executor, shutdown_executor
+from .cache import result_cache
+from .jobs import FINISHED, QueueFull, job_manager
+from .scheduler import OPERATION_WEIGHTS, SchedulerMiddleware, request_scheduler
+from .metrics import MetricsMiddleware, register_collector, render as render_metrics
+from .responses import RawJSONResponse, model_response
+from .lexicons import configure_jieba, configured_lexicons, load_configured_lexicons, reload_lexicon
+import text_processor_rust
+import asyncio
 import logging
+import time
 from scalar_fastapi import get_scalar_api_reference
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_executor()
+    user_dict = configure_jieba()
+    if user_dict:
+        logger.info(f"Loaded jieba user dictionary: {user_dict}")
+    loaded = load_configured_lexicons()
+    if loaded:
+        logger.info(f"Loaded lexicons: {loaded}")
+    yield
+    # Waits for job chunks already running in worker processes
+    await asyncio.get_running_loop().run_in_executor(None, job_manager.shutdown)
+    shutdown_executor()
+
 app = FastAPI(
     title="Text Processor API",
     description="FastAPI application with Rust extensions for high-performance text processing",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Admission control and small/large lanes for the CPU-bound endpoints; added
+# first so that CORS headers also go on rejected requests
+app.add_middleware(SchedulerMiddleware)
+# Latency, bytes and errors per operation, including requests the scheduler sheds
+app.add_middleware(
+    MetricsMiddleware,
+    operations={path: path.strip("/").replace("-", "_").replace("/", "_") for path in OPERATION_WEIGHTS},
+)
+register_collector(request_scheduler.metric_lines)
+
 # Enable CORS
 app.add_middleware(
     CORSMiddleware,
@@ -30,47 +73,325 @@ service = TextProcessorService()
 async def root():
     return {
         "message": "Text Processor API with Rust Extensions",
-        "endpoints": ["/count-words", "/extract-emails", "/clean-text"],
+        "endpoints": [
+            "/count-words", "/count-words/stream", "/count-words/raw", "/extract-emails",
+            "/extract-emails/raw", "/clean-text",
+            "/count-words/batch", "/extract-emails/batch", "/clean-text/batch", "/detect-language", "/process", "/ws/sentiment", "/lexicons", "/jobs", "/cache/stats", "/scheduler/stats", "/metrics"
+        ],
         "docs": "/docs"
     }
 
 @app.post("/count-words", response_model=WordCountResponse)
-async def count_words(input_data: TextInput):
+async def count_words(input_data: WordCountInput):
     try:
-        result = service.count_words(input_data.text)
+        result = await run_in_executor(
+            service.count_words_json,
+            input_data.text,
+            top_k=input_data.top_k,
+            min_count=input_data.min_count,
+            stopwords=input_data.stopwords,
+            extra_stopwords=input_data.extra_stopwords,
+            use_cache=input_data.cache,
+        )
         logger.info(f"Word count completed in {result['processing_time_ms']}ms")
-        return WordCountResponse(**result)
+        return RawJSONResponse(result["body"])
+    except ValueError as e:
+        # Option combinations the extension rejects after the model accepted them
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         logger.error(f"Error in count_words: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/count-words/stream", response_model=WordCountResponse)
+async def count_words_stream(request: Request):
+    """
+    Count words of a raw UTF-8 request body as it arrives, without buffering it.
+    """
+    try:
+        result = await service.count_words_stream(request.stream())
+        logger.info(f"Streaming word count completed in {result['processing_time_ms']}ms")
+        return model_response(result, WordCountResponse)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in count_words_stream: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/count-words/raw", response_model=WordCountResponse)
+async def count_words_raw(request: Request):
+    """
+    Count words of a raw UTF-8 request body; the bytes are read by Rust in place
+    instead of being decoded into a str first.
+    """
+    try:
+        body = await request.body()
+        result = await run_in_executor(service.count_words_json, body)
+        logger.info(f"Raw word count completed in {result['processing_time_ms']}ms")
+        return RawJSONResponse(result["body"])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in count_words_raw: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/extract-emails", response_model=EmailResponse)
 async def extract_emails(input_data: TextInput):
     try:
-        result = service.extract_emails(input_data.text)
+        result = await run_in_executor(service.extract_emails, input_data.text, use_cache=input_data.cache)
         logger.info(f"Email extraction completed in {result['processing_time_ms']}ms")
-        return EmailResponse(**result)
+        return model_response(result, EmailResponse)
     except Exception as e:
         logger.error(f"Error in extract_emails: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/extract-emails/raw", response_model=EmailResponse)
+async def extract_emails_raw(request: Request):
+    """
+    Extract emails from a raw UTF-8 request body without decoding it in Python.
+    """
+    try:
+        body = await request.body()
+        result = await run_in_executor(service.extract_emails, body)
+        logger.info(f"Raw email extraction completed in {result['processing_time_ms']}ms")
+        return model_response(result, EmailResponse)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error in extract_emails_raw: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/clean-text", response_model=CleanTextResponse)
 async def clean_text(input_data: TextInput):
     try:
-        result = service.clean_text(input_data.text)
+        result = await run_in_executor(service.clean_text, input_data.text, use_cache=input_data.cache)
         logger.info(f"Text cleaning completed in {result['processing_time_ms']}ms")
-        return CleanTextResponse(**result)
+        return model_response(result, CleanTextResponse)
     except Exception as e:
         logger.error(f"Error in clean_text: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/count-words/batch", response_model=WordCountBatchResponse)
+async def count_words_batch(input_data: TextBatchInput):
+    try:
+        result = await run_in_executor(service.count_words_batch, input_data.texts)
+        logger.info(f"Batch word count of {result['count']} texts completed in {result['processing_time_ms']}ms")
+        return model_response(result, WordCountBatchResponse)
+    except Exception as e:
+        logger.error(f"Error in count_words_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/extract-emails/batch", response_model=EmailBatchResponse)
+async def extract_emails_batch(input_data: TextBatchInput):
+    try:
+        result = await run_in_executor(service.extract_emails_batch, input_data.texts)
+        logger.info(f"Batch email extraction of {result['count']} texts completed in {result['processing_time_ms']}ms")
+        return model_response(result, EmailBatchResponse)
+    except Exception as e:
+        logger.error(f"Error in extract_emails_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/clean-text/batch", response_model=CleanTextBatchResponse)
+async def clean_text_batch(input_data: TextBatchInput):
+    try:
+        result = await run_in_executor(service.clean_text_batch, input_data.texts)
+        logger.info(f"Batch text cleaning of {result['count']} texts completed in {result['processing_time_ms']}ms")
+        return model_response(result, CleanTextBatchResponse)
+    except Exception as e:
+        logger.error(f"Error in clean_text_batch: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/detect-language", response_model=LanguageBatchResponse)
+async def detect_language(input_data: TextBatchInput):
+    """
+    Detect the language (en, zh or mixed) of each text; a single byte scan per
+    text, cheap enough for routing services to call before picking a pipeline.
+    """
+    try:
+        result = await run_in_executor(service.detect_language_batch, input_data.texts)
+        logger.info(f"Language detection of {result['count']} texts completed in {result['processing_time_ms']}ms")
+        return model_response(result, LanguageBatchResponse)
+    except Exception as e:
+        logger.error(f"Error in detect_language: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/process", response_model=ProcessResponse)
+async def process(input_data: TextInput):
+    """
+    Run every operation listed in `operation` (comma-separated) over one scan of the text.
+    """
+    try:
+        operations = service.parse_operations(input_data.operation)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    try:
+        result = await run_in_executor(
+            service.process, input_data.text, operations, use_cache=input_data.cache
+        )
+        logger.info(f"Processing ({', '.join(operations)}) completed in {result['processing_time_ms']}ms")
+        return model_response(result, ProcessResponse)
+    except Exception as e:
+        logger.error(f"Error in process: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "rust_extension": "loaded"}
 
+# Fragments up to this size are scored on the event loop: a chat message takes
+# microseconds, less than a round trip through the executor
+INLINE_FRAGMENT_CHARS = 1024
+
+@app.websocket("/ws/sentiment")
+async def sentiment_stream(
+    websocket: WebSocket,
+    window: int = Query(20, ge=1, le=1000),
+    lexicon: Optional[str] = None,
+):
+    """
+    Rolling-window sentiment over a stream of text fragments.
+    
+    Send each fragment (e.g. a chat message) as a text frame; every frame is
+    answered with a JSON object holding the fragment's own result plus the
+    `rolling` (last `window` fragments) and `cumulative` aggregates.
+    """
+    try:
+        stream = SentimentService.open_stream(window=window, lexicon=lexicon)
+    except ValueError as e:
+        await websocket.close(code=1008, reason=str(e))
+        return
+    
+    await websocket.accept()
+    try:
+        while True:
+            fragment = await websocket.receive_text()
+            if len(fragment) > MAX_DOCUMENT_CHARS:
+                await websocket.send_json({"error": f"fragment must be at most {MAX_DOCUMENT_CHARS} characters"})
+                continue
+            if len(fragment) <= INLINE_FRAGMENT_CHARS:
+                result = stream.feed(fragment)
+            else:
+                result = await run_in_executor(stream.feed, fragment)
+            await websocket.send_json(result)
+    except WebSocketDisconnect:
+        pass
+
+@app.get("/lexicons", tags=["Text Analysis"])
+async def list_lexicons():
+    """Loaded sentiment lexicons with their entry counts and configured files"""
+    paths = configured_lexicons()
+    return {
+        "lexicons": [
+            {"name": name, "entries": entries, "path": paths.get(name)}
+            for name, entries in text_processor_rust.list_lexicons().items()
+        ]
+    }
+
+@app.post("/lexicons/{name}/reload", tags=["Text Analysis"])
+async def reload_lexicon_endpoint(name: str):
+    """
+    Reload a lexicon from the file configured in TEXTPRO_LEXICONS and swap it in
+    atomically; requests already running finish with the previous version.
+    """
+    try:
+        entries = await run_in_executor(reload_lexicon, name)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Lexicon {name!r} is not configured")
+    except (ValueError, OSError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Reloaded lexicon {name} ({entries} entries)")
+    return {"name": name, "entries": entries}
+
+# Seconds a client is asked to wait before resubmitting to a full job queue
+JOB_RETRY_AFTER_SECONDS = 5
+# How often a long-polling status request re-checks its job
+JOB_POLL_INTERVAL = 0.1
+
+def _get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id!r} not found")
+    return job
+
+@app.post("/jobs", response_model=JobStatus, status_code=202, tags=["Jobs"])
+async def submit_job(input_data: JobInput):
+    """
+    Queue a batch job over a list of texts or a file in TEXTPRO_JOB_DATA_DIR.
+    
+    Jobs run in a local process pool, off the API's own executor, so a large
+    batch never holds up interactive requests. Poll `GET /jobs/{job_id}` and
+    page through `GET /jobs/{job_id}/results` once it has finished.
+    """
+    try:
+        job = job_manager.submit(
+            input_data.operation, texts=input_data.texts, file=input_data.file,
+            split=input_data.split, lexicon=input_data.lexicon,
+        )
+    except QueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return job.status_dict()
+
+@app.get("/jobs", response_model=JobList, tags=["Jobs"])
+async def list_jobs(offset: int = Query(0, ge=0), limit: int = Query(50, ge=1, le=500)):
+    """Known jobs, most recent first; finished jobs expire after TEXTPRO_JOB_TTL_SECONDS"""
+    total, jobs = job_manager.list_jobs(offset, limit)
+    return {"jobs": [job.status_dict() for job in jobs], "total": total}
+
+@app.get("/jobs/stats", tags=["Jobs"])
+async def job_stats():
+    """Pool size, queue occupancy and job counts by status"""
+    return job_manager.stats()
+
+@app.get("/jobs/{job_id}", response_model=JobStatus, tags=["Jobs"])
+async def get_job(job_id: str, wait: float = Query(0, ge=0, le=60, description="Seconds to wait for the job to finish")):
+    """Job status and progress; with `wait` the request is held until the job finishes or the wait runs out"""
+    job = _get_job(job_id)
+    deadline = time.monotonic() + wait
+    while job.status not in FINISHED and time.monotonic() < deadline:
+        await asyncio.sleep(JOB_POLL_INTERVAL)
+    return job.status_dict()
+
+@app.get("/jobs/{job_id}/results", response_model=JobResultsPage, tags=["Jobs"])
+async def get_job_results(job_id: str, offset: int = Query(0, ge=0), limit: int = Query(100, ge=1, le=1000)):
+    """One page of per-text results, in input order; available once the job has finished"""
+    job = _get_job(job_id)
+    if job.status not in FINISHED:
+        raise HTTPException(status_code=409, detail=f"Job {job_id!r} is {job.status}")
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "offset": offset,
+        "limit": limit,
+        "total": len(job.results),
+        "items": job_manager.results(job, offset, limit),
+    }
+
+@app.delete("/jobs/{job_id}", response_model=JobStatus, tags=["Jobs"])
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job; results computed so far are kept"""
+    _get_job(job_id)
+    return job_manager.cancel(job_id).status_dict()
+
+@app.get("/cache/stats")
+async def cache_stats():
+    """Hit, miss and eviction counters of the in-process result cache"""
+    return result_cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: latency histograms, byte, token and error counters, and in-flight gauges"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/scheduler/stats")
+async def scheduler_stats():
+    """Per-lane queue depth, in-flight requests and bytes, and rejection counts"""
+    return request_scheduler.stats()
+
 @app.post(
     "/analyze-sentiment",
     response_model=SentimentResponse,
+    response_model_exclude_none=True,
     summary="Analyze text sentiment",
     description="Analyze the sentiment of input text using high-performance Rust algorithms",
     tags=["Text Analysis"]
@@ -80,10 +401,46 @@ async def analyze_sentiment(input_data: SentimentInput):
     Analyze sentiment of input text.
     
     Returns sentiment score, label, confidence, and identified emotional words.
+    With `granularity="sentence"` it also returns each sentence's span, score and
+    label; the top-level score is then the word-weighted mean over sentences.
+    """
+    try:
+        result = await run_in_executor(
+            SentimentService.analyze_sentiment,
+            input_data.text,
+            use_cache=input_data.cache,
+            lexicon=input_data.lexicon,
+            granularity=input_data.granularity,
+        )
+        return model_response(result, SentimentResponse, exclude_none=True)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception:
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@app.post(
+    "/analyze-sentiment/batch",
+    response_model=SentimentBatchResponse,
+    summary="Analyze sentiment of many texts",
+    description="Score a batch of texts in one call, in parallel across documents",
+    tags=["Text Analysis"]
+)
+async def analyze_sentiment_batch(input_data: SentimentBatchInput):
+    """
+    Analyze sentiment of a batch of texts.
+    
+    Results are returned in the same order as the input texts.
     """
     try:
-        result = SentimentService.analyze_sentiment(input_data.text)
-        return SentimentResponse(**result)
+        start_time = time.perf_counter()
+        results = await run_in_executor(
+            SentimentService.batch_analyze_sentiment, input_data.texts, lexicon=input_data.lexicon
+        )
+        processing_time_ms = int((time.perf_counter() - start_time) * 1000)
+        return model_response(
+            {"results": results, "count": len(results), "processing_time_ms": processing_time_ms},
+            SentimentBatchResponse,
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception:
@@ -0,0 +1,222 @@
+"""
+Prometheus metrics for the API, served as text exposition format at /metrics.
+
+Counters and histograms keep one shard per thread: recording only touches the
+calling thread's own dict, so the request path takes no lock. A scrape sums
+the shards. Gauges and the Rust runtime counters are read at scrape time.
+"""
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+import text_processor_rust
+
+# Request and Rust call latency, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Sharded:
+    """Per-thread dicts of label values to mutable cells"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, List[float]]] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, List[float]]:
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            # Taken once per thread, when it records its first value
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _merged(self, width: int) -> Dict[Labels, List[float]]:
+        with self._lock:
+            shards = list(self._shards)
+        merged: Dict[Labels, List[float]] = {}
+        for shard in shards:
+            # Copying a dict is atomic under the GIL, so writers never break the iteration
+            for labels, cell in list(shard.items()):
+                total = merged.setdefault(labels, [0] * width)
+                for i, value in enumerate(cell):
+                    total[i] += value
+        return merged
+
+
+class Counter(_Sharded):
+    def inc(self, amount: float = 1, *labels: str) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            cell = shard[labels] = [0]
+        cell[0] += amount
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        for labels, (value,) in sorted(self._merged(1).items()):
+            yield f"{self.name}{_format_labels(self.labels, labels)} {_format_value(value)}"
+
+
+class Histogram(_Sharded):
+    """Cells hold one count per bucket, the +Inf bucket, then the sum"""
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels: str) -> None:
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            cell = shard[labels] = [0] * (len(self.buckets) + 2)
+        cell[bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def collect(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        names = self.labels + ("le",)
+        for labels, cell in sorted(self._merged(len(self.buckets) + 2).items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), cell):
+                cumulative += count
+                yield f"{self.name}_bucket{_format_labels(names, labels + (_format_value(bound),))} {cumulative}"
+            suffix = _format_labels(self.labels, labels)
+            yield f"{self.name}_sum{suffix} {_format_value(cell[-1])}"
+            yield f"{self.name}_count{suffix} {cumulative}"
+
+
+def samples(name: str, kind: str, documentation: str, values: Iterable[Tuple[Dict[str, str], float]]) -> Iterable[str]:
+    """Exposition lines of a metric whose values are read at scrape time"""
+    yield f"# HELP {name} {documentation}"
+    yield f"# TYPE {name} {kind}"
+    for labels, value in values:
+        yield f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}"
+
+
+REQUEST_SECONDS = Histogram(
+    "textpro_request_duration_seconds", "End-to-end latency of text processing requests", ("operation",)
+)
+RUST_SECONDS = Histogram(
+    "textpro_rust_duration_seconds", "Time spent in calls into the Rust extension", ("operation",)
+)
+REQUEST_BYTES = Counter(
+    "textpro_request_bytes_total", "Request body bytes received by text processing endpoints", ("operation",)
+)
+REQUEST_ERRORS = Counter(
+    "textpro_request_errors_total", "Text processing requests answered with an error status", ("operation", "status")
+)
+
+_in_flight = 0
+_collectors: List[Callable[[], Iterable[str]]] = []
+
+
+def register_collector(collector: Callable[[], Iterable[str]]) -> None:
+    """Add a function yielding exposition lines computed at scrape time"""
+    _collectors.append(collector)
+
+
+def timed(operation: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Call ``func`` and record its duration as Rust execution time of ``operation``"""
+    start = time.perf_counter()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        RUST_SECONDS.observe(time.perf_counter() - start, operation)
+
+
+def _runtime_lines() -> Iterable[str]:
+    stats = text_processor_rust.runtime_stats()
+    yield from samples("textpro_requests_in_flight", "gauge", "Text processing requests being handled",
+                       [({}, _in_flight)])
+    yield from samples("textpro_rust_calls_in_flight", "gauge", "Rust calls running with the GIL released",
+                       [({}, stats["calls_in_flight"])])
+    yield from samples("textpro_rayon_threads", "gauge", "Threads in the global rayon pool",
+                       [({}, stats["rayon_threads"])])
+    yield from samples("textpro_rust_calls_total", "counter", "Completed Rust calls that released the GIL",
+                       [({}, stats["calls"])])
+    yield from samples("textpro_rust_busy_seconds_total", "counter", "Wall time of completed Rust calls",
+                       [({}, stats["busy_seconds"])])
+    yield from samples("textpro_processed_tokens_total", "counter", "Tokens processed by the Rust extension", [
+        ({"operation": "count_words"}, stats["words_counted"]),
+        ({"operation": "analyze_sentiment"}, stats["sentiment_tokens"]),
+    ])
+
+
+def render() -> str:
+    """Every metric in Prometheus text exposition format"""
+    lines: List[str] = []
+    for metric in (REQUEST_SECONDS, RUST_SECONDS, REQUEST_BYTES, REQUEST_ERRORS):
+        lines.extend(metric.collect())
+    lines.extend(_runtime_lines())
+    for collector in _collectors:
+        lines.extend(collector())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, body bytes and error statuses of the
+    endpoints in ``operations`` (paths mapped to operation labels)"""
+
+    def __init__(self, app: Callable, operations: Dict[str, str]):
+        self.app = app
+        self.operations = operations
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        operation = self.operations.get(scope.get("path")) if scope["type"] == "http" else None
+        if operation is None:
+            await self.app(scope, receive, send)
+            return
+
+        global _in_flight
+        received = 0
+        status = 500
+
+        async def counting_receive() -> Dict[str, Any]:
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def recording_send(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        _in_flight += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, counting_receive, recording_send)
+        finally:
+            _in_flight -= 1
+            REQUEST_SECONDS.observe(time.perf_counter() - start, operation)
+            REQUEST_BYTES.inc(received, operation)
+            if status >= 400:
+                REQUEST_ERRORS.inc(1, operation, str(status))
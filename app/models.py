@@ -1,9 +1,16 @@
-from pydantic import BaseModel, Field
-from typing import List, Dict, Optional
+from pydantic import BaseModel, Field, constr, model_validator
+from typing import Any, List, Dict, Optional, Literal
 
 class TextInput(BaseModel):
     text: str
-    operation: str  # "count_words", "extract_emails", "clean_text"
+    operation: str  # "count_words", "extract_emails", "clean_text"; /process accepts a comma-separated list
+    cache: bool = Field(True, description="Serve and store the result in the result cache")
+
+class WordCountInput(TextInput):
+    top_k: Optional[int] = Field(None, ge=1, description="Return only the K most frequent words")
+    min_count: Optional[int] = Field(None, ge=1, description="Drop words seen fewer times")
+    stopwords: Optional[List[Literal["en", "zh"]]] = Field(None, description="Built-in stopword lists to exclude")
+    extra_stopwords: Optional[List[str]] = Field(None, description="Additional words to exclude")
 
 class WordCountResponse(BaseModel):
     word_count: Dict[str, int]
@@ -19,8 +26,84 @@ class CleanTextResponse(BaseModel):
     original_length: int
     cleaned_length: int
 
+class TextBatchInput(BaseModel):
+    texts: List[str]
+
+class WordCountBatchItem(BaseModel):
+    index: int
+    result: Optional[WordCountResponse] = None
+    error: Optional[str] = None
+
+class WordCountBatchResponse(BaseModel):
+    results: List[WordCountBatchItem]
+    count: int
+    error_count: int
+    processing_time_ms: Optional[float] = None
+
+class EmailBatchItem(BaseModel):
+    index: int
+    result: Optional[EmailResponse] = None
+    error: Optional[str] = None
+
+class EmailBatchResponse(BaseModel):
+    results: List[EmailBatchItem]
+    count: int
+    error_count: int
+    processing_time_ms: Optional[float] = None
+
+class CleanTextBatchItem(BaseModel):
+    index: int
+    result: Optional[CleanTextResponse] = None
+    error: Optional[str] = None
+
+class CleanTextBatchResponse(BaseModel):
+    results: List[CleanTextBatchItem]
+    count: int
+    error_count: int
+    processing_time_ms: Optional[float] = None
+
+class LanguageResponse(BaseModel):
+    language: str = Field(..., description="Detected language: en, zh, or mixed")
+
+class LanguageBatchItem(BaseModel):
+    index: int
+    result: Optional[LanguageResponse] = None
+    error: Optional[str] = None
+
+class LanguageBatchResponse(BaseModel):
+    results: List[LanguageBatchItem]
+    count: int
+    error_count: int
+    processing_time_ms: Optional[float] = None
+
+# Whole-document scoring is meant for short texts; sentence mode splits long
+# documents into sentences scored in parallel, so it accepts much more
+MAX_DOCUMENT_CHARS = 10000
+MAX_SENTENCE_MODE_CHARS = 1000000
+
 class SentimentInput(BaseModel):
-    text: str = Field(..., description="Text to analyze for sentiment", max_length=10000)
+    text: str = Field(..., description=f"Text to analyze for sentiment (up to {MAX_DOCUMENT_CHARS} characters, {MAX_SENTENCE_MODE_CHARS} with sentence granularity)")
+    cache: bool = Field(True, description="Serve and store the result in the result cache")
+    lexicon: Optional[str] = Field(None, description="Name of a loaded lexicon; defaults to \"default\"")
+    granularity: Literal["document", "sentence"] = Field("document", description="Score the whole text, or each sentence plus an aggregate")
+
+    @model_validator(mode="after")
+    def check_length(self) -> "SentimentInput":
+        limit = MAX_SENTENCE_MODE_CHARS if self.granularity == "sentence" else MAX_DOCUMENT_CHARS
+        if len(self.text) > limit:
+            raise ValueError(f"text must be at most {limit} characters with {self.granularity} granularity")
+        return self
+
+class SentenceSentiment(BaseModel):
+    start: int = Field(..., description="Offset of the first character of the sentence")
+    end: int = Field(..., description="Offset just past the last character of the sentence")
+    score: float
+    label: str
+    confidence: float
+    word_count: int
+    positive_words: List[str]
+    negative_words: List[str]
+    language: str
 
 class SentimentResponse(BaseModel):
     score: float = Field(..., description="Sentiment score between -1.0 and 1.0")
@@ -30,4 +113,64 @@ class SentimentResponse(BaseModel):
     positive_words: List[str] = Field(..., description="Identified positive words")
     negative_words: List[str] = Field(..., description="Identified negative words")
     language: str = Field(..., description="Detected language: en, zh, or mixed")
-    processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
\ No newline at end of file
+    sentences: Optional[List[SentenceSentiment]] = Field(None, description="Per-sentence results with sentence granularity")
+    processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
+
+class SentimentBatchInput(BaseModel):
+    texts: List[constr(max_length=10000)] = Field(..., description="Texts to analyze for sentiment")
+    lexicon: Optional[str] = Field(None, description="Name of a loaded lexicon; defaults to \"default\"")
+
+class SentimentBatchResponse(BaseModel):
+    results: List[SentimentResponse] = Field(..., description="Per-text results, in input order")
+    count: int = Field(..., description="Number of texts processed")
+    processing_time_ms: Optional[int] = Field(None, description="Processing time in milliseconds")
+
+class JobInput(BaseModel):
+    operation: Literal["count_words", "extract_emails", "clean_text", "analyze_sentiment"]
+    texts: Optional[List[str]] = Field(None, description="Texts to process, one result per text")
+    file: Optional[str] = Field(None, description="File name relative to TEXTPRO_JOB_DATA_DIR")
+    split: Literal["lines", "document"] = Field("lines", description="Process a file line by line, or as a single document")
+    lexicon: Optional[str] = Field(None, description="Name of a loaded lexicon for analyze_sentiment")
+
+    @model_validator(mode="after")
+    def check_source(self) -> "JobInput":
+        if (self.texts is None) == (self.file is None):
+            raise ValueError("provide exactly one of texts or file")
+        return self
+
+class JobStatus(BaseModel):
+    job_id: str
+    status: str = Field(..., description="queued, running, succeeded, failed, or cancelled")
+    operation: str
+    total: Optional[int] = Field(None, description="Number of texts; null until a line-split file has been read")
+    completed: int = Field(..., description="Texts processed so far")
+    failed: int = Field(..., description="Texts that returned an error")
+    error: Optional[str] = None
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+class JobList(BaseModel):
+    jobs: List[JobStatus]
+    total: int
+
+class JobResultItem(BaseModel):
+    index: int
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+class JobResultsPage(BaseModel):
+    job_id: str
+    status: str
+    offset: int
+    limit: int
+    total: int
+    items: List[JobResultItem]
+
+class ProcessResponse(BaseModel):
+    operations: List[str] = Field(..., description="Operations that were run, in request order")
+    word_count: Optional[WordCountResponse] = None
+    emails: Optional[EmailResponse] = None
+    clean_text: Optional[CleanTextResponse] = None
+    sentiment: Optional[SentimentResponse] = None
+    processing_time_ms: Optional[float] = Field(None, description="Processing time in milliseconds")
\ No newline at end of file
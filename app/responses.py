@@ -0,0 +1,44 @@
+"""
+JSON responses for results the service layer built itself.
+
+Returning a ``Response`` from a handler makes FastAPI skip validating and
+serialising the result against ``response_model``; the model still describes
+the endpoint in the OpenAPI schema. Results are encoded with orjson when it is
+installed and with the standard library otherwise.
+"""
+import json
+from typing import Any, Dict, Type
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """Encode JSON-compatible content as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class RawJSONResponse(Response):
+    """A response whose body is already-encoded JSON bytes"""
+    media_type = "application/json"
+
+
+def model_response(result: Dict[str, Any], model: Type[BaseModel], exclude_none: bool = False) -> RawJSONResponse:
+    """Encode the top-level fields of ``model`` found in ``result``.
+
+    Keys the model does not declare (such as ``processing_time_ms`` on the
+    single-text responses) are dropped, as ``response_model`` would drop them;
+    nested values are assumed to already have the model's shape.
+    """
+    content = {
+        name: result[name]
+        for name in model.model_fields
+        if name in result and not (exclude_none and result[name] is None)
+    }
+    return RawJSONResponse(dumps(content))
@@ -0,0 +1,278 @@
+import json
+import math
+import os
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .executor import LANE_WORKERS, current_lane
+from .metrics import samples
+
+# Relative cost per request byte of each scheduled endpoint. Word counting is
+# the unit; sentiment tokenizes and scores, /process may run every operation.
+OPERATION_WEIGHTS: Dict[str, float] = {
+    "/count-words": 1.0,
+    "/count-words/raw": 1.0,
+    "/count-words/stream": 1.0,
+    "/count-words/batch": 1.0,
+    "/extract-emails": 1.0,
+    "/extract-emails/raw": 1.0,
+    "/extract-emails/batch": 1.0,
+    "/clean-text": 1.0,
+    "/clean-text/batch": 1.0,
+    "/detect-language": 0.25,
+    "/process": 2.0,
+    "/analyze-sentiment": 4.0,
+    "/analyze-sentiment/batch": 4.0,
+}
+
+# Endpoints that consume their body one chunk at a time. They are charged only
+# for the chunk being counted, whatever their length, so an unbounded upload
+# neither holds the byte budget nor is shed for exceeding it.
+STREAMED_PATHS = frozenset({"/count-words/stream"})
+
+# Requests costing more than this go to the large lane; bodies of unknown
+# length (chunked uploads) always do, and are charged as they are received
+LARGE_REQUEST_COST = float(os.getenv("TEXTPRO_LARGE_REQUEST_COST", 256 * 1024))
+# Requests allowed to wait for a worker in each lane, on top of those running
+SMALL_LANE_QUEUE = int(os.getenv("TEXTPRO_SMALL_LANE_QUEUE", 256))
+LARGE_LANE_QUEUE = int(os.getenv("TEXTPRO_LARGE_LANE_QUEUE", 16))
+# Request bodies held by admitted requests at once
+MAX_INFLIGHT_BYTES = int(os.getenv("TEXTPRO_MAX_INFLIGHT_BYTES", 256 * 1024 * 1024))
+MAX_RETRY_AFTER_SECONDS = 60
+
+
+class Overloaded(Exception):
+    """A request was shed; carries the HTTP status and Retry-After to answer with"""
+
+    def __init__(self, message: str, status_code: int, retry_after: int):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class Lane:
+    def __init__(self, name: str, workers: int, max_queue: int):
+        self.name = name
+        self.workers = workers
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        # Moving average of request duration, used to suggest a Retry-After
+        self.avg_seconds = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self.in_flight - self.workers)
+
+    def retry_after(self) -> int:
+        seconds = self.avg_seconds * (self.queue_depth + 1) / self.workers
+        return min(MAX_RETRY_AFTER_SECONDS, max(1, math.ceil(seconds)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "max_queue": self.max_queue,
+            "peak_in_flight": self.peak_in_flight,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_ms": round(self.avg_seconds * 1000, 2),
+        }
+
+
+class Ticket:
+    def __init__(self, lane: Lane, size: int):
+        self.lane = lane
+        self.size = size
+        self.started = time.monotonic()
+
+
+class Scheduler:
+    """Admission control for the CPU-bound endpoints.
+
+    Each request is costed from its body size and endpoint and routed to the
+    small or the large lane, so a burst of large documents queues behind its
+    own few workers instead of every worker. A request is shed with 429 when
+    its lane's queue is full and with 503 when admitting its body would exceed
+    the in-flight byte budget. Bodies of unknown length are charged, and shed,
+    as they are received; streamed bodies are charged only for the chunk being
+    counted. Only touched from the event loop, so it needs no lock.
+    """
+
+    def __init__(self, large_cost: float = LARGE_REQUEST_COST, small_queue: int = SMALL_LANE_QUEUE,
+                 large_queue: int = LARGE_LANE_QUEUE, max_inflight_bytes: int = MAX_INFLIGHT_BYTES,
+                 lane_workers: Optional[Dict[str, int]] = None):
+        workers = lane_workers or LANE_WORKERS
+        self.large_cost = large_cost
+        self.max_inflight_bytes = max_inflight_bytes
+        self.lanes = {
+            "small": Lane("small", workers["small"], small_queue),
+            "large": Lane("large", workers["large"], large_queue),
+        }
+        self.inflight_bytes = 0
+        self.rejections = {"queue_full": 0, "memory": 0}
+
+    def route(self, path: str, size: Optional[int]) -> Lane:
+        """Lane for a request to `path` with a body of `size` bytes (None if unknown)"""
+        if size is None or size * OPERATION_WEIGHTS.get(path, 1.0) > self.large_cost:
+            return self.lanes["large"]
+        return self.lanes["small"]
+
+    def admit(self, path: str, size: Optional[int]) -> Ticket:
+        """Reserve a lane slot and the body's bytes, or raise Overloaded"""
+        lane = self.route(path, size)
+        size = 0 if size is None or path in STREAMED_PATHS else size
+        if lane.in_flight >= lane.workers + lane.max_queue:
+            lane.rejected += 1
+            self.rejections["queue_full"] += 1
+            raise Overloaded(f"The {lane.name} request queue is full", 429, lane.retry_after())
+        # A body larger than the whole budget is still admitted when it can run alone
+        if self.inflight_bytes and self.inflight_bytes + size > self.max_inflight_bytes:
+            lane.rejected += 1
+            self.rejections["memory"] += 1
+            raise Overloaded("Too much request data in flight", 503, lane.retry_after())
+        lane.in_flight += 1
+        lane.peak_in_flight = max(lane.peak_in_flight, lane.in_flight)
+        lane.admitted += 1
+        self.inflight_bytes += size
+        return Ticket(lane, size)
+
+    def charge(self, ticket: Ticket, size: int) -> None:
+        """Add `size` received bytes to an admitted request of unknown length,
+        or raise Overloaded once they take the in-flight bytes over budget"""
+        ticket.size += size
+        self.inflight_bytes += size
+        # As in admit, a body may exceed the whole budget when it runs alone
+        if self.inflight_bytes > self.max_inflight_bytes and self.inflight_bytes > ticket.size:
+            ticket.lane.rejected += 1
+            self.rejections["memory"] += 1
+            raise Overloaded("Too much request data in flight", 503, ticket.lane.retry_after())
+
+    def hold(self, ticket: Ticket, size: int) -> None:
+        """Charge a streamed request for the `size`-byte chunk it now holds in
+        place of the previous one, which has been consumed"""
+        self.inflight_bytes += size - ticket.size
+        ticket.size = size
+
+    def release(self, ticket: Ticket) -> None:
+        lane = ticket.lane
+        lane.in_flight -= 1
+        self.inflight_bytes -= ticket.size
+        elapsed = time.monotonic() - ticket.started
+        lane.avg_seconds = elapsed if lane.admitted == 1 else 0.9 * lane.avg_seconds + 0.1 * elapsed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "lanes": {name: lane.stats() for name, lane in self.lanes.items()},
+            "inflight_bytes": self.inflight_bytes,
+            "max_inflight_bytes": self.max_inflight_bytes,
+            "large_request_cost": self.large_cost,
+            "rejections": dict(self.rejections),
+        }
+
+    def metric_lines(self) -> Iterable[str]:
+        """Queue depth, in-flight bytes and rejections for the /metrics endpoint"""
+        yield from samples("textpro_scheduler_queue_depth", "gauge", "Admitted requests waiting for a worker",
+                           [({"lane": name}, lane.queue_depth) for name, lane in self.lanes.items()])
+        yield from samples("textpro_scheduler_inflight_bytes", "gauge", "Request body bytes held by admitted requests",
+                           [({}, self.inflight_bytes)])
+        yield from samples("textpro_scheduler_rejections_total", "counter", "Requests shed by admission control",
+                           [({"reason": reason}, count) for reason, count in self.rejections.items()])
+
+
+class SchedulerMiddleware:
+    """ASGI middleware admitting scheduled requests before their body is read.
+
+    The lane chosen for a request is stored in `current_lane`, so every
+    `run_in_executor` call made while handling it runs on that lane.
+    """
+
+    def __init__(self, app: Callable, scheduler: Optional[Scheduler] = None):
+        self.app = app
+        self.scheduler = scheduler or request_scheduler
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        path = scope.get("path")
+        if scope["type"] != "http" or scope["method"] != "POST" or path not in OPERATION_WEIGHTS:
+            await self.app(scope, receive, send)
+            return
+
+        size = None
+        for name, value in scope["headers"]:
+            if name == b"content-length" and value.isdigit():
+                size = int(value)
+                break
+        try:
+            ticket = self.scheduler.admit(path, size)
+        except Overloaded as e:
+            await self._reject(send, e)
+            return
+
+        async def streamed_receive() -> Dict[str, Any]:
+            message = await receive()
+            self.scheduler.hold(ticket, len(message.get("body", b"")))
+            return message
+
+        # Any other body of unknown length is charged as it arrives. Once it goes over
+        # budget the app's next receive() raises, whatever response the app
+        # answers with is dropped and the request is shed with 503 instead.
+        shed: Optional[Overloaded] = None
+        started = False
+
+        async def metered_receive() -> Dict[str, Any]:
+            nonlocal shed
+            if shed is not None:
+                raise shed
+            message = await receive()
+            try:
+                self.scheduler.charge(ticket, len(message.get("body", b"")))
+            except Overloaded as e:
+                # Too late to answer 503 once the app has started its response
+                if not started:
+                    shed = e
+                    raise
+            return message
+
+        async def guarded_send(message: Dict[str, Any]) -> None:
+            nonlocal started
+            if shed is None:
+                started = True
+                await send(message)
+
+        token = current_lane.set(ticket.lane.name)
+        try:
+            if path in STREAMED_PATHS:
+                await self.app(scope, streamed_receive, send)
+            elif size is None:
+                await self.app(scope, metered_receive, guarded_send)
+            else:
+                await self.app(scope, receive, send)
+        except Exception:
+            # Whatever the app raised on the failed receive() is answered with the 503
+            if shed is None:
+                raise
+        finally:
+            current_lane.reset(token)
+            self.scheduler.release(ticket)
+        if shed is not None:
+            await self._reject(send, shed)
+
+    @staticmethod
+    async def _reject(send: Callable, error: Overloaded) -> None:
+        body = json.dumps({"detail": str(error)}).encode("utf-8")
+        await send({
+            "type": "http.response.start",
+            "status": error.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("ascii")),
+                (b"retry-after", str(error.retry_after).encode("ascii")),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+request_scheduler = Scheduler()
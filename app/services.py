@@ -1,16 +1,96 @@
 import text_processor_rust
-from typing import Dict, List, Any
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Tuple, Union
 import time
+from .executor import run_in_executor
+from .cache import result_cache
+from .lexicons import lexicon_generation
+from .metrics import timed
 
 class TextProcessorService:
     @staticmethod
-    def count_words(text: str) -> Dict[str, Any]:
-        start_time = time.time()
+    def count_words(
+        text: Union[str, bytes],
+        top_k: Optional[int] = None,
+        min_count: Optional[int] = None,
+        stopwords: Optional[List[str]] = None,
+        extra_stopwords: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        start_time = time.perf_counter()
         
-        # Call Rust extension
-        word_count = text_processor_rust.count_words(text)
+        # Call Rust extension; filtering and totals are computed before crossing into Python
+        params = (
+            top_k,
+            min_count,
+            tuple(stopwords) if stopwords else None,
+            tuple(extra_stopwords) if extra_stopwords else None,
+        )
+        result = result_cache.get_or_compute(
+            "count_words", text, params,
+            lambda: timed(
+                "count_words", text_processor_rust.count_words_summary,
+                text,
+                top_k=top_k,
+                min_count=min_count,
+                stopwords=stopwords,
+                extra_stopwords=extra_stopwords,
+            ),
+            enabled=use_cache,
+        )
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
+        
+        result["processing_time_ms"] = round(processing_time * 1000, 2)
+        return result
+    
+    @staticmethod
+    def count_words_json(
+        text: Union[str, bytes],
+        top_k: Optional[int] = None,
+        min_count: Optional[int] = None,
+        stopwords: Optional[List[str]] = None,
+        extra_stopwords: Optional[List[str]] = None,
+        use_cache: bool = True,
+    ) -> Dict[str, Any]:
+        """Like count_words, with the response body already JSON-encoded by Rust in result["body"]"""
+        start_time = time.perf_counter()
+        
+        params = (
+            top_k,
+            min_count,
+            tuple(stopwords) if stopwords else None,
+            tuple(extra_stopwords) if extra_stopwords else None,
+        )
+        result = result_cache.get_or_compute(
+            "count_words_json", text, params,
+            lambda: {"body": timed(
+                "count_words", text_processor_rust.count_words_json,
+                text,
+                top_k=top_k,
+                min_count=min_count,
+                stopwords=stopwords,
+                extra_stopwords=extra_stopwords,
+            )},
+            enabled=use_cache,
+        )
+        
+        processing_time = time.perf_counter() - start_time
+        
+        result["processing_time_ms"] = round(processing_time * 1000, 2)
+        return result
+    
+    @staticmethod
+    async def count_words_stream(chunks: AsyncIterable[bytes]) -> Dict[str, Any]:
+        """Count words of a UTF-8 byte stream chunk by chunk, with bounded memory"""
+        start_time = time.perf_counter()
+        
+        counter = text_processor_rust.WordCounter()
+        async for chunk in chunks:
+            if chunk:
+                await run_in_executor(timed, "count_words_stream", counter.feed, chunk)
+        word_count = await run_in_executor(timed, "count_words_stream", counter.finish)
+        
+        processing_time = time.perf_counter() - start_time
         
         return {
             "word_count": word_count,
@@ -20,46 +100,204 @@ class TextProcessorService:
         }
     
     @staticmethod
-    def extract_emails(text: str) -> Dict[str, Any]:
-        start_time = time.time()
+    def extract_emails(text: Union[str, bytes], use_cache: bool = True) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        
+        def compute() -> Dict[str, Any]:
+            emails = timed("extract_emails", text_processor_rust.extract_emails, text)
+            return {"emails": emails, "email_count": len(emails)}
+        
+        result = result_cache.get_or_compute("extract_emails", text, (), compute, enabled=use_cache)
+        
+        processing_time = time.perf_counter() - start_time
+        
+        result["processing_time_ms"] = round(processing_time * 1000, 2)
+        return result
+    
+    @staticmethod
+    def clean_text(text: str, use_cache: bool = True) -> Dict[str, Any]:
+        start_time = time.perf_counter()
         
-        emails = text_processor_rust.extract_emails(text)
+        def compute() -> Dict[str, Any]:
+            cleaned = timed("clean_text", text_processor_rust.clean_text, text)
+            return {
+                "cleaned_text": cleaned,
+                "original_length": len(text),
+                "cleaned_length": len(cleaned),
+            }
         
-        processing_time = time.time() - start_time
+        result = result_cache.get_or_compute("clean_text", text, (), compute, enabled=use_cache)
+        
+        processing_time = time.perf_counter() - start_time
+        
+        result["processing_time_ms"] = round(processing_time * 1000, 2)
+        return result
+    
+    @staticmethod
+    def _batch_items(pairs: List[Tuple[Any, Optional[str]]], build: Callable[[int, Any], Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Turn Rust ``(value, error)`` pairs into per-item result records"""
+        return [
+            {"index": index, "result": build(index, value) if error is None else None, "error": error}
+            for index, (value, error) in enumerate(pairs)
+        ]
+    
+    @staticmethod
+    def count_words_batch(texts: List[str]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        
+        pairs = timed("count_words_batch", text_processor_rust.count_words_batch, texts)
+        results = TextProcessorService._batch_items(pairs, lambda _, word_count: {
+            "word_count": word_count,
+            "total_words": sum(word_count.values()),
+            "unique_words": len(word_count),
+        })
+        
+        processing_time = time.perf_counter() - start_time
         
         return {
-            "emails": emails,
-            "email_count": len(emails),
+            "results": results,
+            "count": len(results),
+            "error_count": sum(1 for item in results if item["error"] is not None),
             "processing_time_ms": round(processing_time * 1000, 2)
         }
     
     @staticmethod
-    def clean_text(text: str) -> Dict[str, Any]:
-        start_time = time.time()
+    def extract_emails_batch(texts: List[str]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
         
-        cleaned = text_processor_rust.clean_text(text)
+        pairs = timed("extract_emails_batch", text_processor_rust.extract_emails_batch, texts)
+        results = TextProcessorService._batch_items(pairs, lambda _, emails: {
+            "emails": emails,
+            "email_count": len(emails),
+        })
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         return {
+            "results": results,
+            "count": len(results),
+            "error_count": sum(1 for item in results if item["error"] is not None),
+            "processing_time_ms": round(processing_time * 1000, 2)
+        }
+    
+    @staticmethod
+    def clean_text_batch(texts: List[str]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        
+        pairs = timed("clean_text_batch", text_processor_rust.clean_text_batch, texts)
+        results = TextProcessorService._batch_items(pairs, lambda index, cleaned: {
             "cleaned_text": cleaned,
-            "original_length": len(text),
+            "original_length": len(texts[index]),
             "cleaned_length": len(cleaned),
+        })
+        
+        processing_time = time.perf_counter() - start_time
+        
+        return {
+            "results": results,
+            "count": len(results),
+            "error_count": sum(1 for item in results if item["error"] is not None),
+            "processing_time_ms": round(processing_time * 1000, 2)
+        }
+    
+    @staticmethod
+    def detect_language_batch(texts: List[str]) -> Dict[str, Any]:
+        start_time = time.perf_counter()
+        
+        pairs = timed("detect_language_batch", text_processor_rust.detect_language_batch, texts)
+        results = TextProcessorService._batch_items(pairs, lambda _, language: {"language": language})
+        
+        processing_time = time.perf_counter() - start_time
+        
+        return {
+            "results": results,
+            "count": len(results),
+            "error_count": sum(1 for item in results if item["error"] is not None),
             "processing_time_ms": round(processing_time * 1000, 2)
         }
     
+    OPERATIONS = ("count_words", "extract_emails", "clean_text", "analyze_sentiment")
+    
+    @staticmethod
+    def parse_operations(operation: str) -> List[str]:
+        """Split a comma-separated operation list, rejecting unknown names"""
+        operations = list(dict.fromkeys(op.strip() for op in operation.split(",") if op.strip()))
+        if not operations:
+            raise ValueError("No operation requested")
+        unknown = [op for op in operations if op not in TextProcessorService.OPERATIONS]
+        if unknown:
+            raise ValueError(f"Unknown operation(s): {', '.join(unknown)}")
+        return operations
+    
+    @staticmethod
+    def process(text: str, operations: List[str], use_cache: bool = True) -> Dict[str, Any]:
+        """Run several operations over one shared scan of the text"""
+        start_time = time.perf_counter()
+        
+        result = result_cache.get_or_compute(
+            "process", text, (tuple(operations), lexicon_generation(None)),
+            lambda: TextProcessorService._process_output(text, operations),
+            enabled=use_cache,
+        )
+        
+        processing_time = time.perf_counter() - start_time
+        
+        result["processing_time_ms"] = round(processing_time * 1000, 2)
+        return result
+    
+    @staticmethod
+    def _process_output(text: str, operations: List[str]) -> Dict[str, Any]:
+        output = timed("process", text_processor_rust.process, text, operations)
+        
+        result: Dict[str, Any] = {"operations": operations}
+        if "word_count" in output:
+            word_count = output["word_count"]
+            result["word_count"] = {
+                "word_count": word_count,
+                "total_words": sum(word_count.values()),
+                "unique_words": len(word_count),
+            }
+        if "emails" in output:
+            result["emails"] = {"emails": output["emails"], "email_count": len(output["emails"])}
+        if "cleaned_text" in output:
+            cleaned = output["cleaned_text"]
+            result["clean_text"] = {
+                "cleaned_text": cleaned,
+                "original_length": len(text),
+                "cleaned_length": len(cleaned),
+            }
+        if "sentiment" in output:
+            result["sentiment"] = output["sentiment"]
+        return result
+    
 class SentimentService:
+    # 启动时构建一次，所有请求线程共享（Rust端线程安全）
+    analyzer = text_processor_rust.SentimentAnalyzer()
+    
     @staticmethod
-    def analyze_sentiment(text: str) -> Dict[str, Any]:
-        """分析文本情感"""
-        start_time = time.time()
+    def analyze_sentiment(
+        text: str,
+        use_cache: bool = True,
+        lexicon: Optional[str] = None,
+        granularity: str = "document",
+    ) -> Dict[str, Any]:
+        """分析文本情感；lexicon 为已加载词典的名称，默认使用 "default"；
+        granularity="sentence" 时逐句打分并附带 sentences"""
+        start_time = time.perf_counter()
         
         try:
-            # 调用Rust扩展
-            result = text_processor_rust.analyze_sentiment(text)
+            # 调用Rust扩展（相同文本命中结果缓存时跳过计算；词典重新加载后缓存键随之改变）
+            result = result_cache.get_or_compute(
+                "analyze_sentiment", text, (lexicon, lexicon_generation(lexicon), granularity),
+                lambda: timed(
+                    "analyze_sentiment", SentimentService.analyzer.analyze,
+                    text, lexicon=lexicon, granularity=granularity,
+                ),
+                enabled=use_cache,
+            )
             
             # 添加处理时间
-            processing_time_ms = int((time.time() - start_time) * 1000)
+            processing_time_ms = int((time.perf_counter() - start_time) * 1000)
             result['processing_time_ms'] = processing_time_ms
             
             return result
@@ -68,6 +306,14 @@ class SentimentService:
             raise ValueError(f"Sentiment analysis failed: {str(e)}")
     
     @staticmethod
-    def batch_analyze_sentiment(texts: List[str]) -> List[Dict[str, Any]]:
-        """批量情感分析"""
-        return [SentimentService.analyze_sentiment(text) for text in texts]
\ No newline at end of file
+    def open_stream(window: int = 20, lexicon: Optional[str] = None) -> "text_processor_rust.SentimentStream":
+        """新建一个流式情感分析状态（每个 WebSocket 连接一个）"""
+        return text_processor_rust.SentimentStream(window=window, lexicon=lexicon)
+    
+    @staticmethod
+    def batch_analyze_sentiment(texts: List[str], lexicon: Optional[str] = None) -> List[Dict[str, Any]]:
+        """批量情感分析（一次跨越FFI，Rust端按文档并行）"""
+        try:
+            return timed("analyze_sentiment_batch", SentimentService.analyzer.analyze_batch, texts, lexicon=lexicon)
+        except Exception as e:
+            raise ValueError(f"Sentiment analysis failed: {str(e)}")
\ No newline at end of file
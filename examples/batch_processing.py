@@ -54,6 +54,23 @@ def batch_process_sync(texts, operation="count_words"):
     
     return results
 
+def batch_process_native(texts, operation="count_words"):
+    """Send every text in a single request to the batch endpoint"""
+    endpoint_map = {
+        "count_words": "/count-words/batch",
+        "extract_emails": "/extract-emails/batch",
+        "clean_text": "/clean-text/batch"
+    }
+    
+    response = requests.post(f"{API_BASE}{endpoint_map[operation]}", json={"texts": texts})
+    if response.status_code != 200:
+        return [{"error": f"HTTP {response.status_code}"}] * len(texts)
+    
+    return [
+        item["result"] if item["error"] is None else {"error": item["error"]}
+        for item in response.json()["results"]
+    ]
+
 def demo_batch_processing():
     """Batch processing demonstration"""
     
@@ -84,6 +101,14 @@ def demo_batch_processing():
     
     print(f"\nPerformance improvement: {sync_time/async_time:.2f}x")
     
+    # Native batch endpoint (one request, parallel in Rust)
+    print("\nNative batch endpoint...")
+    start_time = time.time()
+    batch_process_native(sample_texts, "count_words")
+    native_time = time.time() - start_time
+    print(f"Native batch processing time: {native_time:.2f}s")
+    print(f"Improvement over async requests: {async_time/native_time:.2f}x")
+    
     # Display result summary
     print("\n=== Processing Result Summary ===")
     total_words = sum(result.get('total_words', 0) for result in async_results)
@@ -0,0 +1,53 @@
+"""
+Buffer Input Benchmark
+Compares decoding a UTF-8 body into a str before calling the extension
+with passing the bytes straight through the buffer protocol.
+
+Usage: python examples/buffer_benchmark.py [size_in_mb]
+"""
+import subprocess
+import sys
+
+DEFAULT_SIZE_MB = 100
+
+# Each measurement runs in a fresh interpreter so peak RSS is not shared.
+# The body starts out as bytes, like a request body read by the server.
+MEASURE = """
+import resource, sys, time
+import text_processor_rust
+size_mb, operation, variant = int(sys.argv[1]), sys.argv[2], sys.argv[3]
+line = "Hello wörld, contact user{}@example.com about the 性能 benchmark!\\n"
+block = "".join(line.format(i) for i in range(1000)).encode("utf-8")
+body = block * (size_mb * 1024 * 1024 // len(block) + 1)
+func = getattr(text_processor_rust, operation)
+baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+if variant == "str":
+    func(body.decode("utf-8"))
+elif variant == "bytes":
+    func(body)
+elif variant == "memoryview":
+    func(memoryview(body))
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(elapsed, baseline, peak)
+"""
+
+def measure(size_mb, operation, variant):
+    output = subprocess.check_output(
+        [sys.executable, "-c", MEASURE, str(size_mb), operation, variant], text=True
+    )
+    elapsed, baseline_kb, peak_kb = output.split()
+    return float(elapsed), (int(peak_kb) - int(baseline_kb)) / 1024
+
+def run_benchmark(size_mb):
+    print(f"Input size: {size_mb}MB")
+    print(f"\n{'Operation':<16}{'Input':<12}{'Time (ms)':>10}{'Extra RSS (MB)':>16}")
+    for operation in ("count_words", "extract_emails"):
+        for variant in ("str", "bytes", "memoryview"):
+            elapsed, extra_mb = measure(size_mb, operation, variant)
+            print(f"{operation:<16}{variant:<12}{elapsed * 1000:>10.1f}{extra_mb:>16.1f}")
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MB
+    run_benchmark(size_mb)
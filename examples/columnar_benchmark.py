@@ -0,0 +1,56 @@
+"""
+Columnar Word Count Benchmark
+Compares count_words, which builds a dict entry per vocabulary word, with
+count_words_columnar and its NumPy / Arrow wrappers on large vocabularies.
+
+Usage: python examples/columnar_benchmark.py [vocabulary_size]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import text_processor_rust
+from app.columnar import count_words_arrow, count_words_numpy
+
+DEFAULT_VOCABULARY = 1_000_000
+
+def build_corpus(vocabulary):
+    """Every word appears twice, so the vocabulary is exactly `vocabulary` words"""
+    words = [f"w{i:x}" for i in range(vocabulary)]
+    return " ".join(words + words)
+
+def best_time(func, text, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(vocabulary):
+    text = build_corpus(vocabulary)
+    print(f"Vocabulary: {vocabulary} words, input {len(text) / 1024 / 1024:.1f}MB")
+    
+    variants = [
+        ("dict", text_processor_rust.count_words),
+        ("raw buffers", text_processor_rust.count_words_columnar),
+    ]
+    for name, func in (("numpy", count_words_numpy), ("arrow", count_words_arrow)):
+        try:
+            func("probe")
+            variants.append((name, func))
+        except ImportError:
+            print(f"{name} not installed, skipping")
+    
+    baseline = None
+    print(f"\n{'Output':<14}{'Time (ms)':>12}{'Speedup':>10}")
+    for name, func in variants:
+        elapsed = best_time(func, text)
+        baseline = baseline or elapsed
+        print(f"{name:<14}{elapsed * 1000:>12.1f}{baseline / elapsed:>9.1f}x")
+
+if __name__ == "__main__":
+    vocabulary = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_VOCABULARY
+    run_benchmark(vocabulary)
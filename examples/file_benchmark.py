@@ -0,0 +1,76 @@
+"""
+File Processing Benchmark
+Compares reading a large file into Python before calling the extension
+with the memory-mapped *_file functions.
+
+Usage: python examples/file_benchmark.py [size_in_mb] [path]
+"""
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_SIZE_MB = 1024
+
+LINE = "Hello world, contact user{}@example.com about the performance benchmark!\n"
+
+def generate_file(path, size_mb):
+    """Write roughly size_mb megabytes of text to path"""
+    target = size_mb * 1024 * 1024
+    block = "".join(LINE.format(i) for i in range(1000))
+    written = 0
+    with open(path, "w", encoding="utf-8") as f:
+        while written < target:
+            f.write(block)
+            written += len(block)
+
+# Each measurement runs in a fresh interpreter so peak RSS is not shared
+MEASURE = """
+import resource, sys, time
+import text_processor_rust
+path, mode = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == "read-count_words":
+    with open(path, encoding="utf-8") as f:
+        text_processor_rust.count_words(f.read())
+elif mode == "mmap-count_words":
+    text_processor_rust.count_words_file(path)
+elif mode == "read-extract_emails":
+    with open(path, encoding="utf-8") as f:
+        text_processor_rust.extract_emails(f.read())
+elif mode == "mmap-extract_emails":
+    text_processor_rust.extract_emails_file(path)
+elif mode == "read-clean_text":
+    with open(path, encoding="utf-8") as f:
+        cleaned = text_processor_rust.clean_text(f.read())
+    with open(path + ".clean", "w", encoding="utf-8") as f:
+        f.write(cleaned)
+elif mode == "mmap-clean_text":
+    text_processor_rust.clean_text_file(path, path + ".clean")
+elapsed = time.perf_counter() - start
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+def measure(path, mode):
+    output = subprocess.check_output([sys.executable, "-c", MEASURE, path, mode], text=True)
+    elapsed, max_rss_kb = output.split()
+    return float(elapsed), int(max_rss_kb) / 1024
+
+def run_benchmark(size_mb, path):
+    if not os.path.exists(path):
+        print(f"Generating {size_mb}MB test file at {path}...")
+        generate_file(path, size_mb)
+    
+    print(f"\n{'Operation':<16}{'Path':<8}{'Time (s)':>10}{'Peak RSS (MB)':>16}")
+    for operation in ("count_words", "extract_emails", "clean_text"):
+        for variant in ("read", "mmap"):
+            elapsed, peak_mb = measure(path, f"{variant}-{operation}")
+            print(f"{operation:<16}{variant:<8}{elapsed:>10.2f}{peak_mb:>16.1f}")
+    
+    if os.path.exists(path + ".clean"):
+        os.remove(path + ".clean")
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MB
+    path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(tempfile.gettempdir(), f"textpro_{size_mb}mb.txt")
+    run_benchmark(size_mb, path)
@@ -0,0 +1,55 @@
+"""
+Word Counting Allocation Benchmark
+Times count_words on repetitive 50MB corpora and, when the extension is built
+with the alloc-stats feature, reports how many Rust heap allocations each call
+makes. Allocations should follow the vocabulary size, not the token count.
+
+Build for allocation counts:
+    cd text_processor_rust && maturin develop --release --features alloc-stats
+
+Usage: python examples/interner_benchmark.py [size_in_mb]
+"""
+import sys
+import time
+import text_processor_rust
+
+DEFAULT_SIZE_MB = 50
+
+SENTENCE = "The quick brown Fox jumps over the lazy dog while The DOG sleeps and fox runs {} "
+
+def build_corpus(size_mb, vocabulary):
+    """Repeat a short mixed-case sentence, cycling through `vocabulary` extra words"""
+    block = "".join(SENTENCE.format(f"Word{i}") for i in range(vocabulary))
+    return block * (size_mb * 1024 * 1024 // len(block) + 1)
+
+def measure(text, runs=3):
+    """Best wall time over `runs` calls, with the allocations of the last call"""
+    has_stats = hasattr(text_processor_rust, "allocation_stats")
+    best = float("inf")
+    allocations = None
+    for _ in range(runs):
+        if has_stats:
+            text_processor_rust.reset_allocation_stats()
+        start = time.perf_counter()
+        counts = text_processor_rust.count_words(text)
+        best = min(best, time.perf_counter() - start)
+        if has_stats:
+            allocations = text_processor_rust.allocation_stats()["allocations"]
+    return best, allocations, counts
+
+def run_benchmark(size_mb):
+    print(f"Corpus size: {size_mb}MB")
+    print(f"\n{'Vocabulary':>12}{'Tokens':>14}{'Time (ms)':>12}{'Allocations':>14}")
+    for vocabulary in (1, 100, 10000, 100000):
+        text = build_corpus(size_mb, vocabulary)
+        elapsed, allocations, counts = measure(text)
+        tokens = sum(counts.values())
+        shown = "n/a" if allocations is None else str(allocations)
+        print(f"{len(counts):>12}{tokens:>14}{elapsed * 1000:>12.1f}{shown:>14}")
+
+    if not hasattr(text_processor_rust, "allocation_stats"):
+        print("\nBuild with --features alloc-stats to report allocation counts.")
+
+if __name__ == "__main__":
+    size_mb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_MB
+    run_benchmark(size_mb)
@@ -0,0 +1,58 @@
+"""
+Language Detection Benchmark
+Compares text_processor_rust.detect_language with the two-regex approach it
+replaced, on English, Chinese and mixed corpora, for one long document and a
+batch of short reviews.
+
+Usage: python examples/language_benchmark.py [size_in_kb]
+"""
+import re
+import sys
+import time
+import text_processor_rust
+
+DEFAULT_SIZE_KB = 1024
+
+SENTENCES = {
+    "en": "The quick brown fox jumps over the lazy dog and keeps running. ",
+    "zh": "这个产品非常好，服务也很周到，我对这次购物很满意。",
+    "mixed": "这个 product 很好 but 价格 a bit expensive，总体 satisfied。",
+}
+
+HAN_RUN = re.compile(r"[一-鿿]+")
+LATIN_RUN = re.compile(r"[a-zA-Z]+")
+
+def detect_with_regex(text):
+    """The previous detection: count matches of both regexes over the whole text"""
+    chinese = len(HAN_RUN.findall(text))
+    english = len(LATIN_RUN.findall(text))
+    if chinese > english * 2:
+        return "zh"
+    if english > chinese * 2:
+        return "en"
+    return "mixed"
+
+def best_time(func, arg, runs=5):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def run_benchmark(size_kb):
+    print(f"Document size: {size_kb}KB, batch: 10000 single-sentence reviews")
+    print(f"\n{'Corpus':>8}{'Regex (ms)':>12}{'Rust (ms)':>12}{'Batch (ms)':>12}")
+    for name, sentence in SENTENCES.items():
+        document = sentence * (size_kb * 1024 // len(sentence.encode("utf-8")) + 1)
+        reviews = [sentence] * 10000
+        assert text_processor_rust.detect_language(document) == detect_with_regex(document) == name
+
+        regex_time = best_time(detect_with_regex, document)
+        rust_time = best_time(text_processor_rust.detect_language, document)
+        batch_time = best_time(text_processor_rust.detect_language_batch, reviews)
+        print(f"{name:>8}{regex_time * 1000:>12.2f}{rust_time * 1000:>12.2f}{batch_time * 1000:>12.2f}")
+
+if __name__ == "__main__":
+    size_kb = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE_KB
+    run_benchmark(size_kb)
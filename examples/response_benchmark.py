@@ -0,0 +1,63 @@
+"""
+Response Serialisation Benchmark
+End-to-end /count-words request time by vocabulary size: the API's fast path,
+which sends JSON bytes encoded by Rust, against the previous handler, which
+built WordCountResponse(**result) and let FastAPI validate and serialise it
+again through response_model. Requests go through the ASGI stack in process
+with the result cache disabled.
+
+Usage: python examples/response_benchmark.py [repeats]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import WordCountInput, WordCountResponse
+from app.services import TextProcessorService
+
+VOCABULARY_SIZES = [100, 1000, 10000, 100000, 500000]
+DEFAULT_REPEATS = 5
+
+baseline = FastAPI()
+
+@baseline.post("/count-words", response_model=WordCountResponse)
+def count_words_validated(input_data: WordCountInput):
+    """The handler as it was before the fast path"""
+    result = TextProcessorService.count_words(input_data.text, use_cache=False)
+    return WordCountResponse(**result)
+
+def make_text(vocabulary_size):
+    """Every word appears twice, so the text is about 2 * vocabulary_size words"""
+    words = [f"word{i}" for i in range(vocabulary_size)]
+    return " ".join(words + words)
+
+def best_time(client, payload, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        response = client.post("/count-words", json=payload)
+        best = min(best, time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return best
+
+def run_benchmark(repeats):
+    print(f"Best of {repeats} requests per size, result cache off")
+    print(f"\n{'Vocabulary':>12}{'Validated (ms)':>16}{'Fast path (ms)':>16}{'Speedup':>10}")
+    with TestClient(app) as fast_client, TestClient(baseline) as baseline_client:
+        for size in VOCABULARY_SIZES:
+            payload = {"text": make_text(size), "operation": "count_words", "cache": False}
+            assert fast_client.post("/count-words", json=payload).json() == \
+                baseline_client.post("/count-words", json=payload).json()
+
+            validated = best_time(baseline_client, payload, repeats)
+            fast = best_time(fast_client, payload, repeats)
+            print(f"{size:>12}{validated * 1000:>16.2f}{fast * 1000:>16.2f}{validated / fast:>9.1f}x")
+
+if __name__ == "__main__":
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REPEATS
+    run_benchmark(repeats)
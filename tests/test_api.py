@@ -36,6 +36,33 @@ class TestAPIEndpoints:
         assert "unique_words" in data
         assert data["total_words"] > 0
     
+    def test_count_words_top_k_endpoint(self, client, sample_text):
+        """Test word frequency API with top-K and stopwords"""
+        payload = {"text": sample_text, "operation": "count_words", "top_k": 3, "stopwords": ["en"]}
+        response = client.post("/count-words", json=payload)
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        # Ties are broken alphabetically
+        assert list(data["word_count"]) == ["hello", "test", "world"]
+        assert data["unique_words"] > 3
+        
+        payload["stopwords"] = ["xx"]
+        response = client.post("/count-words", json=payload)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    
+    def test_count_words_rejected_options(self, client, monkeypatch):
+        """Options the extension rejects are a 422, not a server error"""
+        from app.services import TextProcessorService
+        
+        def reject(*args, **kwargs):
+            raise ValueError("unsupported option combination")
+        
+        monkeypatch.setattr(TextProcessorService, "count_words_json", staticmethod(reject))
+        response = client.post("/count-words", json={"text": "a b", "operation": "count_words", "top_k": 1, "cache": False})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert response.json()["detail"] == "unsupported option combination"
+    
     def test_extract_emails_endpoint(self, client, sample_text):
         """Test email extraction API"""
         payload = {"text": sample_text, "operation": "extract_emails"}
@@ -60,6 +87,198 @@ class TestAPIEndpoints:
         assert "original_length" in data
         assert "cleaned_length" in data
 
+    def test_analyze_sentiment_sentence_granularity(self, client):
+        """Test per-sentence sentiment API and its length limits"""
+        text = "I love this phone. The battery is terrible! " * 400
+        
+        response = client.post("/analyze-sentiment", json={"text": text})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        
+        response = client.post("/analyze-sentiment", json={"text": text, "granularity": "sentence"})
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert len(data["sentences"]) == 800
+        assert data["sentences"][1]["label"] == "negative"
+        
+        response = client.post("/analyze-sentiment", json={"text": "Fine."})
+        assert "sentences" not in response.json()
+
+    def test_analyze_sentiment_batch_endpoint(self, client):
+        """Test batch sentiment API"""
+        texts = ["I love this product!", "这个产品很糟糕", "It is a table."]
+        response = client.post("/analyze-sentiment/batch", json={"texts": texts})
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        
+        assert data["count"] == 3
+        assert [r["label"] for r in data["results"]] == ["positive", "negative", "neutral"]
+
+    def test_batch_endpoints(self, client, sample_text):
+        """Test batch word count, email and cleaning APIs"""
+        payload = {"texts": [sample_text, "Hello HELLO"]}
+        
+        response = client.post("/count-words/batch", json=payload)
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] == 2
+        assert data["results"][1]["result"]["word_count"] == {"hello": 2}
+        
+        response = client.post("/extract-emails/batch", json=payload)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"][0]["result"]["email_count"] == 2
+        
+        response = client.post("/clean-text/batch", json=payload)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["results"][1]["result"]["cleaned_text"] == "Hello HELLO"
+
+    def test_sentiment_websocket(self, client):
+        """Test rolling-window sentiment over a WebSocket"""
+        with client.websocket_connect("/ws/sentiment?window=2") as websocket:
+            for message in ["I love this", "great stream", "terrible lag"]:
+                websocket.send_text(message)
+                data = websocket.receive_json()
+            
+            assert data["fragment"]["label"] == "negative"
+            assert data["rolling"]["fragments"] == 2
+            assert data["cumulative"]["fragments"] == 3
+            
+            websocket.send_text("x" * 20000)
+            assert "error" in websocket.receive_json()
+
+    def test_detect_language_endpoint(self, client):
+        """Test batch language detection API"""
+        response = client.post("/detect-language", json={"texts": ["Hello world", "你好世界", "hello 世界"]})
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["count"] == 3
+        assert [r["result"]["language"] for r in data["results"]] == ["en", "zh", "mixed"]
+
+    def test_count_words_stream_endpoint(self, client, sample_text):
+        """Test streaming word count API"""
+        def body():
+            data = sample_text.encode("utf-8")
+            for i in range(0, len(data), 7):
+                yield data[i:i + 7]
+        
+        response = client.post("/count-words/stream", content=body())
+        
+        assert response.status_code == status.HTTP_200_OK
+        data = response.json()
+        assert data["word_count"]["hello"] == 3
+        
+        response = client.post("/count-words/stream", content=b"bad \xff bytes")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_cache_stats_endpoint(self, client):
+        """Test that repeated requests are served from the result cache"""
+        payload = {"text": "cache me cache me", "operation": "count_words"}
+        before = client.get("/cache/stats").json()
+        
+        client.post("/count-words", json=payload)
+        client.post("/count-words", json=payload)
+        client.post("/count-words", json={**payload, "cache": False})
+        
+        after = client.get("/cache/stats").json()
+        assert after["hits"] - before["hits"] >= 1
+        assert after["misses"] - before["misses"] <= 1
+
+    def test_raw_body_endpoints(self, client, sample_text):
+        """Test raw-body word count and email APIs"""
+        response = client.post("/count-words/raw", content=sample_text.encode("utf-8"))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["word_count"]["hello"] == 3
+        
+        response = client.post("/extract-emails/raw", content=sample_text.encode("utf-8"))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["email_count"] == 2
+        
+        response = client.post("/count-words/raw", content=b"bad \xff bytes")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_lexicon_reload_endpoint(self, client, tmp_path, monkeypatch):
+        """Test reloading a configured lexicon and scoring with it"""
+        path = tmp_path / "retail.tsv"
+        path.write_text("bargain\t2.0\n", encoding="utf-8")
+        monkeypatch.setenv("TEXTPRO_LEXICONS", f"retail={path}")
+        
+        response = client.post("/lexicons/retail/reload")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["entries"] == 1
+        
+        names = {entry["name"] for entry in client.get("/lexicons").json()["lexicons"]}
+        assert {"default", "retail"} <= names
+        
+        response = client.post("/analyze-sentiment", json={"text": "a bargain", "lexicon": "retail"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["score"] > 0
+        
+        assert client.post("/lexicons/unknown/reload").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_job_endpoints(self, client, tmp_path, monkeypatch):
+        """Test submitting a batch job, waiting for it and paging its results"""
+        (tmp_path / "reviews.txt").write_text("good product\n\nhello hello world\n", encoding="utf-8")
+        monkeypatch.setenv("TEXTPRO_JOB_DATA_DIR", str(tmp_path))
+        
+        response = client.post("/jobs", json={"operation": "count_words", "texts": ["a b", "c"]})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()["job_id"]
+        
+        job = client.get(f"/jobs/{job_id}", params={"wait": 30}).json()
+        assert job["status"] == "succeeded"
+        assert job["completed"] == 2
+        
+        page = client.get(f"/jobs/{job_id}/results", params={"offset": 1, "limit": 10}).json()
+        assert page["total"] == 2
+        assert [item["index"] for item in page["items"]] == [1]
+        assert page["items"][0]["result"]["total_words"] == 1
+        
+        response = client.post("/jobs", json={"operation": "count_words", "file": "reviews.txt"})
+        job = client.get(f"/jobs/{response.json()['job_id']}", params={"wait": 30}).json()
+        assert job["status"] == "succeeded"
+        assert job["total"] == 2
+        
+        response = client.post("/jobs", json={"operation": "count_words", "file": "../outside.txt"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        response = client.post("/jobs", json={"operation": "count_words", "texts": ["a"], "file": "reviews.txt"})
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+        assert client.get("/jobs/unknown").status_code == status.HTTP_404_NOT_FOUND
+
+    def test_scheduler_stats_endpoint(self, client):
+        """Test that scheduled requests are counted per lane"""
+        before = client.get("/scheduler/stats").json()
+        client.post("/count-words", json={"text": "hello world", "operation": "count_words"})
+        
+        after = client.get("/scheduler/stats").json()
+        assert after["lanes"]["small"]["admitted"] == before["lanes"]["small"]["admitted"] + 1
+        assert after["inflight_bytes"] == 0
+        assert set(after["rejections"]) == {"queue_full", "memory"}
+
+    def test_fast_path_keeps_openapi_schema(self, client):
+        """Handlers returning encoded JSON still document their response models"""
+        schema = client.get("/openapi.json").json()
+        
+        for path, model in (("/count-words", "WordCountResponse"), ("/analyze-sentiment", "SentimentResponse")):
+            content = schema["paths"][path]["post"]["responses"]["200"]["content"]
+            assert content["application/json"]["schema"]["$ref"] == f"#/components/schemas/{model}"
+
+    def test_metrics_endpoint(self, client):
+        """Test that requests show up in the Prometheus metrics"""
+        client.post("/count-words", json={"text": "hello world", "operation": "count_words"})
+        client.post("/analyze-sentiment", json={"text": "x" * 20000})
+        
+        response = client.get("/metrics")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("text/plain")
+        body = response.text
+        assert 'textpro_request_duration_seconds_count{operation="count_words"}' in body
+        assert 'textpro_rust_duration_seconds_count{operation="count_words"}' in body
+        assert 'textpro_request_errors_total{operation="analyze_sentiment",status="422"}' in body
+        assert 'textpro_processed_tokens_total{operation="count_words"}' in body
+        assert "textpro_rayon_threads" in body
+        assert 'textpro_scheduler_queue_depth{lane="large"}' in body
+
 class TestAPIValidation:
     """API input validation tests"""
     
@@ -0,0 +1,99 @@
+import pytest
+import sys
+import time
+from app.cache import ResultCache, cache_key, estimate_size
+
+class TestResultCache:
+    """In-process result cache"""
+    
+    def test_hit_after_miss(self):
+        """The second lookup of the same input is served from the cache"""
+        cache = ResultCache(max_bytes=1024 * 1024)
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            return {"value": 1}
+        
+        assert cache.get_or_compute("op", "text", (), compute) == {"value": 1}
+        assert cache.get_or_compute("op", "text", (), compute) == {"value": 1}
+        
+        assert len(calls) == 1
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+    
+    def test_returned_dict_is_a_copy(self):
+        """Per-request fields added by callers do not leak into the cache"""
+        cache = ResultCache(max_bytes=1024 * 1024)
+        first = cache.get_or_compute("op", "text", (), lambda: {"value": 1})
+        first["processing_time_ms"] = 1.0
+        
+        assert cache.get_or_compute("op", "text", (), lambda: {"value": 2}) == {"value": 1}
+    
+    def test_key_covers_operation_and_params(self):
+        """Keys differ by operation and parameters, but not by str vs bytes"""
+        assert cache_key("a", "text") != cache_key("b", "text")
+        assert cache_key("a", "text", (1,)) != cache_key("a", "text", (2,))
+        assert cache_key("a", "héllo") == cache_key("a", "héllo".encode("utf-8"))
+    
+    def test_key_accepts_surrogates_and_buffers(self):
+        """Lone surrogates are keyed like any other str; buffers are hashed in place"""
+        assert cache_key("a", "bad \ud800 text") != cache_key("a", "bad text")
+        assert cache_key("a", memoryview(b"text")) == cache_key("a", bytearray(b"text")) == cache_key("a", "text")
+    
+    def test_large_inputs_not_cached(self, monkeypatch):
+        """Inputs over the size limit are computed without being hashed"""
+        cache = ResultCache(max_bytes=1024 * 1024, max_input_bytes=10)
+        monkeypatch.setattr("app.cache.cache_key", lambda *args: pytest.fail("large input was hashed"))
+        
+        assert cache.get_or_compute("op", "x" * 11, (), lambda: {"value": 1}) == {"value": 1}
+        assert cache.stats()["entries"] == 0
+    
+    def test_lru_eviction_by_size(self):
+        """Least recently used entries are evicted once the byte budget is exceeded"""
+        entry = {"value": "x" * 100}
+        cache = ResultCache(max_bytes=estimate_size(entry) * 2)
+        cache.put("a", entry)
+        cache.put("b", entry)
+        cache.get("a")
+        cache.put("c", entry)
+        
+        assert cache.get("a") is not None
+        assert cache.get("b") is None
+        assert cache.get("c") is not None
+        assert cache.stats()["evictions"] == 1
+    
+    def test_estimate_samples_large_containers(self):
+        """Large vocabularies are extrapolated from one entry, close to the full walk"""
+        word_count = {f"word{i:06d}": i for i in range(100000)}
+        result = {"word_count": word_count, "total_words": 1, "unique_words": len(word_count)}
+        exact = sys.getsizeof(result) + sys.getsizeof(word_count) + sum(
+            sys.getsizeof(word) + sys.getsizeof(count) for word, count in word_count.items()
+        ) + sum(sys.getsizeof(key) + sys.getsizeof(value) for key, value in result.items() if key != "word_count")
+        
+        assert 0.8 * exact < estimate_size(result) < 1.2 * exact
+    
+    def test_oversized_entry_not_stored(self):
+        """An entry larger than the whole cache is never stored"""
+        cache = ResultCache(max_bytes=64)
+        cache.put("a", {"value": "x" * 1000})
+        
+        assert cache.stats()["entries"] == 0
+    
+    def test_ttl_expiry(self):
+        """Entries older than the TTL are treated as misses"""
+        cache = ResultCache(max_bytes=1024 * 1024, ttl_seconds=0.01)
+        cache.put("a", {"value": 1})
+        time.sleep(0.02)
+        
+        assert cache.get("a") is None
+        assert cache.stats()["expirations"] == 1
+    
+    def test_disabled(self):
+        """Disabled lookups always compute and leave the cache untouched"""
+        cache = ResultCache(max_bytes=1024 * 1024)
+        cache.get_or_compute("op", "text", (), lambda: {"value": 1}, enabled=False)
+        
+        assert cache.stats()["entries"] == 0
+        assert cache.stats()["misses"] == 0
@@ -61,6 +61,28 @@ class TestIntegration:
                              json={"text": "test", "operation": "count_words"})
         assert response.status_code == 200
 
+    def test_process_combined_operations(self, client):
+        """Test fused processing matches the individual endpoints"""
+        text = "Contact: support@company.com. Great service, great team!\nCall us @#$ today."
+        
+        response = client.post("/process", json={
+            "text": text,
+            "operation": "count_words, extract_emails, clean_text, analyze_sentiment"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        
+        assert data["operations"] == ["count_words", "extract_emails", "clean_text", "analyze_sentiment"]
+        words = client.post("/count-words", json={"text": text, "operation": "count_words"}).json()
+        assert data["word_count"]["word_count"] == words["word_count"]
+        assert data["emails"]["emails"] == ["support@company.com"]
+        assert "@" not in data["clean_text"]["cleaned_text"]
+        assert data["sentiment"]["label"] == "positive"
+        
+        # Unknown operations are rejected up front
+        response = client.post("/process", json={"text": text, "operation": "count_words,summarize"})
+        assert response.status_code == 400
+
 class TestRealWorldScenarios:
     """Real-world scenario testing"""
     
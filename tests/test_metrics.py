@@ -0,0 +1,46 @@
+import threading
+import pytest
+from app.metrics import Counter, Histogram
+
+class TestMetrics:
+    """Thread-sharded Prometheus metrics"""
+    
+    def test_counter_sums_thread_shards(self):
+        """Increments from many threads are all counted, per label set"""
+        counter = Counter("test_total", "Test counter", ("operation",))
+        
+        def work():
+            for _ in range(1000):
+                counter.inc(1, "a")
+            counter.inc(5, "b")
+        
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        lines = list(counter.collect())
+        assert lines[:2] == ["# HELP test_total Test counter", "# TYPE test_total counter"]
+        assert 'test_total{operation="a"} 4000' in lines
+        assert 'test_total{operation="b"} 20' in lines
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts include smaller buckets; bounds are inclusive"""
+        histogram = Histogram("test_seconds", "Test histogram", ("operation",), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "op")
+        
+        lines = list(histogram.collect())
+        assert 'test_seconds_bucket{operation="op",le="0.1"} 2' in lines
+        assert 'test_seconds_bucket{operation="op",le="1.0"} 3' in lines
+        assert 'test_seconds_bucket{operation="op",le="+Inf"} 4' in lines
+        assert 'test_seconds_sum{operation="op"} 3.65' in lines
+        assert 'test_seconds_count{operation="op"} 4' in lines
+    
+    def test_label_values_escaped(self):
+        """Quotes and backslashes in label values are escaped"""
+        counter = Counter("test_total", "Test counter", ("path",))
+        counter.inc(1, 'a"b\\c')
+        
+        assert 'test_total{path="a\\"b\\\\c"} 1' in list(counter.collect())
@@ -0,0 +1,45 @@
+import json
+import pytest
+from app import responses
+from app.models import SentimentResponse, WordCountBatchResponse, WordCountResponse
+
+class TestModelResponse:
+    """Responses encoded without re-validation"""
+    
+    def test_matches_response_model(self):
+        """The body equals what response_model validation would produce"""
+        result = {
+            "results": [
+                {"index": 0, "result": {"word_count": {"héllo": 2}, "total_words": 2, "unique_words": 1}, "error": None},
+                {"index": 1, "result": None, "error": "invalid UTF-8"},
+            ],
+            "count": 2,
+            "error_count": 1,
+            "processing_time_ms": 0.5,
+        }
+        response = responses.model_response(result, WordCountBatchResponse)
+        
+        assert response.media_type == "application/json"
+        assert json.loads(response.body) == WordCountBatchResponse(**result).model_dump()
+    
+    def test_drops_undeclared_and_none_fields(self):
+        """Extra keys are dropped, and None values too with exclude_none"""
+        result = {"word_count": {}, "total_words": 0, "unique_words": 0, "processing_time_ms": 1.0}
+        assert json.loads(responses.model_response(result, WordCountResponse).body) == {
+            "word_count": {}, "total_words": 0, "unique_words": 0
+        }
+        
+        result = {
+            "score": 0.0, "label": "neutral", "confidence": 0.5, "word_count": 0, "positive_words": [],
+            "negative_words": [], "language": "en", "sentences": None, "processing_time_ms": 1,
+        }
+        body = json.loads(responses.model_response(result, SentimentResponse, exclude_none=True).body)
+        assert "sentences" not in body
+        assert body["processing_time_ms"] == 1
+    
+    def test_stdlib_fallback(self, monkeypatch):
+        """Without orjson the standard library produces the same compact UTF-8 JSON"""
+        content = {"word_count": {"你好": 1}, "score": 0.25}
+        monkeypatch.setattr(responses, "orjson", None)
+        
+        assert responses.dumps(content) == '{"word_count":{"你好":1},"score":0.25}'.encode("utf-8")
@@ -1,5 +1,7 @@
 import pytest
 import text_processor_rust
+import json
+import struct
 from collections import Counter
 
 class TestRustExtension:
@@ -25,6 +27,70 @@ class TestRustExtension:
         text = "Hello HELLO hello"
         result = text_processor_rust.count_words(text)
         assert result["hello"] == 3
+
+    def test_count_words_unicode_case_folding(self):
+        """Non-ASCII words fold to the same lowercase form as str.lower"""
+        text = "Straße STRASSE Émile émile ÉMILE ΣΟΦΟΣ σοφος ǅemal Ǆemal"
+        result = text_processor_rust.count_words(text)
+
+        assert result["émile"] == 3
+        assert result["straße"] == 1
+        assert result["strasse"] == 1
+        assert result["ǆemal"] == 2
+        assert sum(result.values()) == len(text.split())
+
+    def test_count_words_parallel_matches_sequential(self):
+        """Large inputs counted in parallel give the sequential result"""
+        words = ["Alpha", "beta", "GAMMA", "don't", "naïve", "你好"]
+        text = "\n".join(" ".join(words[(i + j) % 6] for j in range(10)) for i in range(40000))
+        
+        expected = Counter(w.lower() for w in text.split())
+        assert len(text) > 1024 * 1024
+        assert text_processor_rust.count_words(text) == dict(expected)
+        assert text_processor_rust.count_words(text, num_threads=3) == dict(expected)
+        # Every counting function takes num_threads; pools are reused across calls
+        for _ in range(2):
+            summary = text_processor_rust.count_words_summary(text, num_threads=3, top_k=2)
+            assert summary["unique_words"] == len(expected)
+            assert json.loads(text_processor_rust.count_words_json(text, num_threads=3, top_k=2)) == summary
+    
+    def test_count_words_top_k(self):
+        """Top-K returns the most frequent words in descending order"""
+        text = "b b b a a c c d " * 3
+        result = text_processor_rust.count_words(text, top_k=2)
+        
+        assert list(result.items()) == [("b", 9), ("a", 6)]
+    
+    def test_count_words_filters(self):
+        """Stopwords and min_count are applied before returning"""
+        text = "The cat and the dog. The CAT sat. 的 猫"
+        
+        result = text_processor_rust.count_words(text, stopwords=["en", "zh"], min_count=2)
+        assert result == {"cat": 2}
+        
+        result = text_processor_rust.count_words(text, extra_stopwords=["Cat", "dog"])
+        assert "cat" not in result and "dog" not in result and result["the"] == 3
+        
+        with pytest.raises(ValueError):
+            text_processor_rust.count_words(text, stopwords=["fr"])
+    
+    def test_count_words_summary_totals(self):
+        """Totals cover every non-stopword even when trimmed by top_k"""
+        summary = text_processor_rust.count_words_summary("a a b c the", top_k=1, stopwords=["en"])
+        
+        # "a" and "the" are English stopwords
+        assert summary == {"word_count": {"b": 1}, "total_words": 2, "unique_words": 2}
+    
+    def test_count_words_json_matches_summary(self):
+        """The JSON body holds the summary dict, keeping the top_k order"""
+        text = "b a c a b a the"
+        for options in ({}, {"top_k": 2, "stopwords": ["en"]}):
+            body = text_processor_rust.count_words_json(text, **options)
+            summary = text_processor_rust.count_words_summary(text, **options)
+            
+            assert isinstance(body, bytes)
+            assert json.loads(body) == summary
+            assert list(json.loads(body)["word_count"]) == list(summary["word_count"])
     
     def test_extract_emails_basic(self, sample_text):
         """Test basic email extraction"""  # Modified
@@ -89,6 +155,443 @@ class TestRustExtension:
         for char in "@#$%^&*()":
             assert char not in cleaned
 
+class TestRustBatchFunctions:
+    """Batch variants of the text functions"""
+    
+    def test_count_words_batch_order(self):
+        """Results come back in input order and match the single-item function"""
+        texts = ["a b a", "Hello hello", "", "x y z"]
+        pairs = text_processor_rust.count_words_batch(texts)
+        
+        assert [result for result, _ in pairs] == [text_processor_rust.count_words(t) for t in texts]
+        assert all(error is None for _, error in pairs)
+    
+    def test_extract_emails_batch(self, sample_text):
+        """Email batch matches the single-item function"""
+        pairs = text_processor_rust.extract_emails_batch([sample_text, "none here"])
+        
+        assert pairs[0] == (text_processor_rust.extract_emails(sample_text), None)
+        assert pairs[1] == ([], None)
+    
+    def test_clean_text_batch(self):
+        """Cleaning batch matches the single-item function"""
+        texts = ["Hello@#$ world!", "  trim me  "]
+        pairs = text_processor_rust.clean_text_batch(texts)
+        
+        assert [result for result, _ in pairs] == [text_processor_rust.clean_text(t) for t in texts]
+    
+    def test_detect_language(self):
+        """Language detection agrees with the tokenizer and across batch and buffers"""
+        texts = ["Hello wonderful world", "这个产品非常好用", "这个 product 很好 but 太贵", "", "The end. " * 5000 + "好"]
+        expected = ["en", "zh", "mixed", "mixed", "en"]
+        
+        assert [text_processor_rust.detect_language(t) for t in texts] == expected
+        assert text_processor_rust.detect_language_batch(texts) == [(language, None) for language in expected]
+        assert text_processor_rust.detect_language("这个产品非常好用".encode("utf-8")) == "zh"
+        assert [text_processor_rust.Tokenizer().tokenize(t)["language"] for t in texts] == expected
+    
+    def test_batch_reports_per_item_errors(self):
+        """A bad item is reported without failing the rest of the batch"""
+        pairs = text_processor_rust.count_words_batch(["ok ok", 42, "fine"])
+        
+        assert pairs[0] == ({"ok": 2}, None)
+        assert pairs[1][0] is None
+        assert "item 1" in pairs[1][1]
+        assert pairs[2] == ({"fine": 1}, None)
+
+class TestRustProcess:
+    """Fused multi-operation processing"""
+    
+    def test_process_matches_individual_functions(self, sample_text):
+        """Each fused result equals the standalone function's output"""
+        result = text_processor_rust.process(
+            sample_text, ["count_words", "extract_emails", "clean_text", "analyze_sentiment"]
+        )
+        
+        assert result["word_count"] == text_processor_rust.count_words(sample_text)
+        assert result["emails"] == text_processor_rust.extract_emails(sample_text)
+        assert result["cleaned_text"] == text_processor_rust.clean_text(sample_text)
+        assert result["sentiment"] == text_processor_rust.analyze_sentiment(sample_text)
+    
+    def test_process_large_input_matches(self, sample_text):
+        """Inputs scanned in parallel chunks give the standalone results"""
+        text = "\n".join([sample_text] * (2 * 1024 * 1024 // len(sample_text) + 1))
+        assert len(text) > 1024 * 1024
+        
+        for operations in (["count_words", "extract_emails"], ["count_words", "extract_emails", "clean_text"]):
+            result = text_processor_rust.process(text, operations)
+            assert result["word_count"] == text_processor_rust.count_words(text)
+            assert result["emails"] == text_processor_rust.extract_emails(text)
+        assert result["cleaned_text"] == text_processor_rust.clean_text(text)
+    
+    def test_process_only_requested_keys(self):
+        """Only requested operations appear in the result"""
+        result = text_processor_rust.process("a@b.com hello", ["extract_emails"])
+        assert result == {"emails": ["a@b.com"]}
+    
+    def test_process_unknown_operation(self):
+        """Unknown operation names are rejected"""
+        with pytest.raises(ValueError):
+            text_processor_rust.process("text", ["count_words", "summarize"])
+
+class TestWordCounter:
+    """Incremental word counting"""
+    
+    def test_chunked_matches_whole(self, sample_text):
+        """Counting in chunks gives the same result as one call"""
+        expected = text_processor_rust.count_words(sample_text)
+        
+        for size in (1, 3, 7, 64):
+            counter = text_processor_rust.WordCounter()
+            for i in range(0, len(sample_text), size):
+                counter.feed(sample_text[i:i + size])
+            assert counter.finish() == expected
+    
+    def test_bytes_split_inside_character(self):
+        """Multi-byte characters split across byte chunks are reassembled"""
+        text = "héllo wörld 你好 héllo"
+        data = text.encode("utf-8")
+        counter = text_processor_rust.WordCounter()
+        for i in range(len(data)):
+            counter.feed(data[i:i + 1])
+        
+        assert counter.finish() == text_processor_rust.count_words(text)
+    
+    def test_invalid_utf8(self):
+        """Invalid or truncated UTF-8 is reported"""
+        counter = text_processor_rust.WordCounter()
+        with pytest.raises(ValueError):
+            counter.feed(b"abc\xff")
+        
+        counter = text_processor_rust.WordCounter()
+        counter.feed("你".encode("utf-8")[:2])
+        with pytest.raises(ValueError):
+            counter.finish()
+    
+    def test_finish_resets(self):
+        """The counter can be reused after finish"""
+        counter = text_processor_rust.WordCounter()
+        counter.feed("one two")
+        assert counter.finish() == {"one": 1, "two": 1}
+        counter.feed("three")
+        assert counter.finish() == {"three": 1}
+
+class TestColumnarOutput:
+    """Word counts as flat buffers and vectorised arrays"""
+    
+    TEXT = "Hello world hello Wörld 你好 world hello"
+    
+    def test_arrow_buffers(self):
+        """Offsets slice the data buffer into the counted words"""
+        columns = text_processor_rust.count_words_columnar(self.TEXT)
+        offsets = struct.unpack(f"<{columns['length'] + 1}q", columns["offsets"])
+        counts = struct.unpack(f"<{columns['length']}q", columns["counts"])
+        words = [columns["data"][start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+        
+        assert dict(zip(words, counts)) == text_processor_rust.count_words(self.TEXT)
+    
+    def test_numpy_arrays(self):
+        """NumPy arrays hold the same counts as the dict"""
+        pytest.importorskip("numpy")
+        from app.columnar import count_words_numpy
+        
+        vocabulary, counts = count_words_numpy(self.TEXT)
+        
+        assert dict(zip(vocabulary.tolist(), counts.tolist())) == text_processor_rust.count_words(self.TEXT)
+        assert counts.dtype.kind == "i"
+        # One long word does not widen every item to its length
+        vocabulary, _ = count_words_numpy(self.TEXT + " " + "x" * 100000)
+        assert vocabulary.dtype.kind != "U"
+    
+    def test_arrow_table(self):
+        """The Arrow table holds the same counts as the dict"""
+        pytest.importorskip("pyarrow")
+        from app.columnar import count_words_arrow
+        
+        table = count_words_arrow(self.TEXT)
+        
+        assert table.column_names == ["word", "count"]
+        assert dict(zip(table["word"].to_pylist(), table["count"].to_pylist())) == text_processor_rust.count_words(self.TEXT)
+    
+    def test_empty_input(self):
+        """Empty input gives empty buffers"""
+        columns = text_processor_rust.count_words_columnar("")
+        assert columns["length"] == 0
+        assert columns["offsets"] == b"\x00" * 8
+        assert columns["data"] == b"" and columns["counts"] == b""
+
+class TestBufferInput:
+    """bytes-like arguments are read in place as UTF-8"""
+    
+    def test_buffer_types_match_str(self, sample_text):
+        """bytes, bytearray and memoryview give the same results as str"""
+        data = sample_text.encode("utf-8")
+        
+        for buffer in (data, bytearray(data), memoryview(data)):
+            assert text_processor_rust.count_words(buffer) == text_processor_rust.count_words(sample_text)
+            assert text_processor_rust.extract_emails(buffer) == text_processor_rust.extract_emails(sample_text)
+            assert text_processor_rust.clean_text(buffer) == text_processor_rust.clean_text(sample_text)
+            assert text_processor_rust.analyze_sentiment(buffer) == text_processor_rust.analyze_sentiment(sample_text)
+    
+    def test_memoryview_slice(self):
+        """A contiguous slice only sees its own bytes"""
+        view = memoryview(b"skip these words: one two one")[18:]
+        assert text_processor_rust.count_words(view) == {"one": 2, "two": 1}
+    
+    def test_invalid_utf8(self):
+        """Invalid UTF-8 raises ValueError, or a per-item error in batches"""
+        with pytest.raises(ValueError):
+            text_processor_rust.count_words(b"abc \xff")
+        
+        pairs = text_processor_rust.count_words_batch([b"ok", b"\xff"])
+        assert pairs[0] == ({"ok": 1}, None)
+        assert pairs[1][0] is None
+        assert "invalid UTF-8" in pairs[1][1]
+    
+    def test_rejects_unsupported_buffers(self):
+        """Non-contiguous views and non-text objects are rejected"""
+        with pytest.raises(ValueError):
+            text_processor_rust.count_words(memoryview(b"a b c d")[::2])
+        with pytest.raises(TypeError):
+            text_processor_rust.count_words(42)
+
+class TestFileFunctions:
+    """Memory-mapped file processing"""
+    
+    def _write(self, tmp_path, text):
+        path = tmp_path / "input.txt"
+        path.write_text(text, encoding="utf-8")
+        return path
+    
+    def test_count_words_file(self, tmp_path, sample_text):
+        """File counts match the in-memory function, whatever the chunk size"""
+        text = sample_text * 20 + "naïve 你好 end"
+        path = self._write(tmp_path, text)
+        expected = text_processor_rust.count_words(text)
+        
+        assert text_processor_rust.count_words_file(path) == expected
+        for chunk_size in (1, 16, 100):
+            assert text_processor_rust.count_words_file(str(path), chunk_size=chunk_size) == expected
+    
+    def test_extract_emails_file_keeps_order(self, tmp_path):
+        """Emails come back in file order across chunks"""
+        text = " ".join(f"user{i}@example.com filler" for i in range(200))
+        path = self._write(tmp_path, text)
+        
+        emails = text_processor_rust.extract_emails_file(path, chunk_size=64)
+        assert emails == text_processor_rust.extract_emails(text)
+    
+    def test_clean_text_file(self, tmp_path, sample_text):
+        """Cleaned output file matches clean_text"""
+        text = (sample_text + "\r\n\n  trailing @#$ line  \n") * 10
+        src = self._write(tmp_path, text)
+        dst = tmp_path / "output.txt"
+        
+        written = text_processor_rust.clean_text_file(src, dst, chunk_size=32)
+        expected = text_processor_rust.clean_text(text)
+        
+        assert dst.read_text(encoding="utf-8") == expected
+        assert written == len(expected.encode("utf-8"))
+    
+    def test_clean_text_file_refuses_same_file(self, tmp_path, sample_text):
+        """Cleaning a file onto itself, directly or through a link, is rejected untouched"""
+        src = self._write(tmp_path, sample_text)
+        link = tmp_path / "link.txt"
+        link.symlink_to(src)
+        
+        for dst in (src, link):
+            with pytest.raises(OSError):
+                text_processor_rust.clean_text_file(src, dst)
+        assert src.read_text(encoding="utf-8") == sample_text
+    
+    def test_empty_file(self, tmp_path):
+        """Empty files are handled without mapping"""
+        path = self._write(tmp_path, "")
+        assert text_processor_rust.count_words_file(path) == {}
+        assert text_processor_rust.extract_emails_file(path) == []
+    
+    def test_file_errors(self, tmp_path):
+        """Missing files and invalid UTF-8 raise Python exceptions"""
+        with pytest.raises(OSError):
+            text_processor_rust.count_words_file(tmp_path / "missing.txt")
+        
+        path = tmp_path / "bad.txt"
+        path.write_bytes(b"good words \xff bad")
+        with pytest.raises(ValueError):
+            text_processor_rust.count_words_file(path)
+
+class TestRuntimeStats:
+    """Process-wide counters read by the metrics endpoint"""
+    
+    def test_counters_grow(self):
+        """Calls and processed tokens are counted"""
+        before = text_processor_rust.runtime_stats()
+        text_processor_rust.count_words("one two three")
+        text_processor_rust.analyze_sentiment("good service")
+        after = text_processor_rust.runtime_stats()
+        
+        assert after["calls"] >= before["calls"] + 2
+        assert after["words_counted"] >= before["words_counted"] + 3
+        assert after["sentiment_tokens"] > before["sentiment_tokens"]
+        assert after["busy_seconds"] >= before["busy_seconds"]
+        assert after["rayon_threads"] >= 1
+        assert after["calls_in_flight"] >= 0
+
+class TestRustClasses:
+    """Reusable analyzer and tokenizer handles"""
+    
+    def test_sentiment_analyzer_matches_function(self):
+        """The analyzer class and module function agree"""
+        analyzer = text_processor_rust.SentimentAnalyzer()
+        text = "This is a great product!"
+        
+        assert analyzer.analyze(text) == text_processor_rust.analyze_sentiment(text)
+    
+    def test_sentiment_analyzer_thread_safety(self):
+        """One analyzer can be shared between threads"""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        analyzer = text_processor_rust.SentimentAnalyzer()
+        texts = ["I love it", "这个产品很棒", "Terrible and awful"] * 50
+        expected = [analyzer.analyze(text) for text in texts]
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(analyzer.analyze, texts))
+        
+        assert results == expected
+    
+    def test_sentiment_stream(self):
+        """Rolling window keeps the last fragments; cumulative keeps them all"""
+        stream = text_processor_rust.SentimentStream(window=2)
+        messages = ["I love this", "great stream", "terrible lag", "awful, I hate it"]
+        results = [stream.feed(message) for message in messages]
+        singles = [text_processor_rust.analyze_sentiment(message) for message in messages]
+        
+        assert [r["fragment"] for r in results] == singles
+        last = results[-1]
+        assert last["rolling"]["fragments"] == 2
+        assert last["rolling"]["label"] == "negative"
+        assert last["cumulative"]["fragments"] == 4
+        assert last["cumulative"]["word_count"] == sum(s["word_count"] for s in singles)
+        weighted = sum(s["score"] * s["word_count"] for s in singles) / last["cumulative"]["word_count"]
+        assert last["cumulative"]["score"] == pytest.approx(weighted)
+        
+        stream.reset()
+        assert stream.feed("")["cumulative"]["fragments"] == 1
+        with pytest.raises(ValueError):
+            text_processor_rust.SentimentStream(window=0)
+        with pytest.raises(ValueError):
+            text_processor_rust.SentimentStream(lexicon="missing")
+    
+    def test_tokenizer(self):
+        """Tokenizer returns lowercased words and language"""
+        tokenizer = text_processor_rust.Tokenizer()
+        result = tokenizer.tokenize("Hello Wonderful World")
+        
+        assert result["words"] == ["hello", "wonderful", "world"]
+        assert result["language"] == "en"
+    
+    def test_tokenizer_script_runs(self):
+        """Han runs go to jieba whole; the same keep rule applies to every script"""
+        tokenizer = text_processor_rust.Tokenizer()
+        
+        mixed = tokenizer.tokenize("这个iPhone真的很好用，but a bit贵!!")
+        assert "iphone" in mixed["words"]
+        assert "but" in mixed["words"] and "bit" in mixed["words"]
+        assert "贵" in mixed["words"]
+        assert not any(word in mixed["words"] for word in ("a", "，", "!!"))
+        
+        spaced = tokenizer.tokenize("这个 iPhone 真的 很好用 but 贵")
+        assert [w for w in spaced["words"] if w.isascii()] == ["iphone", "but"]
+    
+    def test_tokenize_offsets(self):
+        """Offsets slice the original text; char offsets match str indexing"""
+        text = "Très GOOD 产品，很好用 but 𝄞 pricey"
+        tokens = text_processor_rust.tokenize(text, unit="char")
+        words = [text[s:e] for s, e in zip(tokens["start"], tokens["end"])]
+        
+        assert tokens["start"].format == "I" and tokens["end"].format == "I"
+        assert tokens["length"] == len(words)
+        assert [w.lower() for w in words] == text_processor_rust.Tokenizer().tokenize(text)["words"]
+        assert "Très" in words and "GOOD" in words
+        scripts = [tokens["scripts"][code] for code in tokens["script"]]
+        assert scripts[words.index("GOOD")] == "latin"
+        assert scripts[words.index("产品")] == "han"
+        assert tokens["language"] == text_processor_rust.detect_language(text)
+        
+        data = text.encode("utf-8")
+        by_bytes = text_processor_rust.tokenize(data)
+        assert [data[s:e].decode("utf-8") for s, e in zip(by_bytes["start"], by_bytes["end"])] == words
+        
+        with pytest.raises(ValueError):
+            text_processor_rust.tokenize(text, unit="word")
+    
+    def test_configure_jieba_after_use(self):
+        """The segmenter is fixed once it has been used"""
+        text_processor_rust.Tokenizer().tokenize("这个产品很好")
+        with pytest.raises(ValueError):
+            text_processor_rust.configure_jieba()
+
+class TestLexicons:
+    """Lexicons loaded at runtime"""
+    
+    def _source(self, tmp_path):
+        path = tmp_path / "retail.tsv"
+        path.write_text("# word\tscore\nbargain\t2.0\nrefund\t-1.5\nsuper\tintensifier\t2.0\nnever\tnegator\n", encoding="utf-8")
+        return path
+    
+    def test_compile_and_load(self, tmp_path):
+        """Compiled and source lexicons load to the same entries"""
+        src = self._source(tmp_path)
+        dst = tmp_path / "retail.tplx"
+        
+        assert text_processor_rust.compile_lexicon(src, dst) == 4
+        assert text_processor_rust.load_lexicon("retail", dst) == 4
+        assert text_processor_rust.list_lexicons()["retail"] == 4
+        assert "default" in text_processor_rust.list_lexicons()
+        assert text_processor_rust.unload_lexicon("retail")
+    
+    def test_lexicon_selection(self, tmp_path):
+        """A request scores with the lexicon it names"""
+        text_processor_rust.load_lexicon("retail", self._source(tmp_path))
+        
+        default = text_processor_rust.analyze_sentiment("a super bargain")
+        retail = text_processor_rust.analyze_sentiment("a super bargain", lexicon="retail")
+        negated = text_processor_rust.analyze_sentiment("never a bargain", lexicon="retail")
+        batch = text_processor_rust.analyze_sentiment_batch(["a super bargain"], lexicon="retail")
+        
+        assert retail["score"] > default["score"]
+        assert negated["score"] < 0
+        assert batch == [retail]
+        text_processor_rust.unload_lexicon("retail")
+    
+    def test_lexicon_errors(self, tmp_path):
+        """Unknown names, bad files and the default lexicon are rejected"""
+        with pytest.raises(ValueError):
+            text_processor_rust.analyze_sentiment("good", lexicon="missing")
+        with pytest.raises(OSError):
+            text_processor_rust.load_lexicon("missing", tmp_path / "missing.tplx")
+        
+        corrupt = tmp_path / "corrupt.tplx"
+        corrupt.write_bytes(b"TPLX" + b"\x00" * 20)
+        with pytest.raises(ValueError):
+            text_processor_rust.load_lexicon("corrupt", corrupt)
+        with pytest.raises(ValueError):
+            text_processor_rust.unload_lexicon("default")
+    
+    def test_full_hash_table_rejected(self, tmp_path):
+        """A compiled file whose table has no empty slot is refused instead of hanging lookups"""
+        compiled = tmp_path / "retail.tplx"
+        text_processor_rust.compile_lexicon(self._source(tmp_path), compiled)
+        data = bytearray(compiled.read_bytes())
+        capacity = struct.unpack_from("<I", data, 12)[0]
+        for slot in range(capacity):
+            struct.pack_into("<I", data, 24 + slot * 4, slot % 4 + 1)
+        compiled.write_bytes(bytes(data))
+        
+        with pytest.raises(ValueError):
+            text_processor_rust.load_lexicon("full", compiled)
+
 class TestRustExtensionPerformance:
     """Performance testing for Rust extension"""
     
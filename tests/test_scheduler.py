@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from app.scheduler import Overloaded, Scheduler, SchedulerMiddleware
+
+LANE_WORKERS = {"small": 2, "large": 1}
+
+class TestScheduler:
+    """Size-aware admission control"""
+    
+    def test_routes_by_weighted_size(self):
+        """Requests are costed by body size times the endpoint weight"""
+        scheduler = Scheduler(large_cost=1000, lane_workers=LANE_WORKERS)
+        
+        assert scheduler.route("/count-words", 900).name == "small"
+        assert scheduler.route("/analyze-sentiment", 900).name == "large"
+        assert scheduler.route("/count-words/stream", None).name == "large"
+    
+    def test_queue_full_rejected_with_429(self):
+        """A lane admits its workers plus its queue, then sheds with 429"""
+        scheduler = Scheduler(large_cost=1000, small_queue=1, lane_workers=LANE_WORKERS)
+        tickets = [scheduler.admit("/count-words", 10) for _ in range(3)]
+        
+        with pytest.raises(Overloaded) as excinfo:
+            scheduler.admit("/count-words", 10)
+        assert excinfo.value.status_code == 429
+        assert excinfo.value.retry_after >= 1
+        
+        # The large lane is unaffected by the full small lane
+        assert scheduler.admit("/count-words", 5000).lane.name == "large"
+        
+        scheduler.release(tickets[0])
+        scheduler.admit("/count-words", 10)
+        stats = scheduler.stats()
+        assert stats["lanes"]["small"]["queue_depth"] == 1
+        assert stats["lanes"]["small"]["rejected"] == 1
+        assert stats["rejections"] == {"queue_full": 1, "memory": 0}
+    
+    def test_inflight_bytes_rejected_with_503(self):
+        """Bodies beyond the in-flight byte budget are shed with 503"""
+        scheduler = Scheduler(large_cost=10000, max_inflight_bytes=100, lane_workers=LANE_WORKERS)
+        first = scheduler.admit("/count-words", 80)
+        
+        with pytest.raises(Overloaded) as excinfo:
+            scheduler.admit("/count-words", 30)
+        assert excinfo.value.status_code == 503
+        
+        scheduler.release(first)
+        assert scheduler.stats()["inflight_bytes"] == 0
+        # An oversized body still runs when nothing else is in flight
+        scheduler.admit("/count-words", 500)
+        assert scheduler.stats()["rejections"]["memory"] == 1
+    
+    def test_unknown_length_charged_as_received(self):
+        """Bodies without a Content-Length are charged chunk by chunk"""
+        scheduler = Scheduler(large_cost=10000, max_inflight_bytes=100, lane_workers=LANE_WORKERS)
+        first = scheduler.admit("/count-words", 60)
+        streamed = scheduler.admit("/count-words/stream", None)
+        
+        scheduler.charge(streamed, 30)
+        assert scheduler.stats()["inflight_bytes"] == 90
+        with pytest.raises(Overloaded) as excinfo:
+            scheduler.charge(streamed, 30)
+        assert excinfo.value.status_code == 503
+        
+        scheduler.release(first)
+        scheduler.release(streamed)
+        assert scheduler.stats()["inflight_bytes"] == 0
+        # Alone, a streamed body may exceed the budget
+        streamed = scheduler.admit("/count-words/stream", None)
+        scheduler.charge(streamed, 500)
+        assert scheduler.stats()["rejections"]["memory"] == 1
+    
+    def test_streamed_body_charged_per_chunk(self):
+        """A streamed body larger than the budget runs alongside small requests"""
+        scheduler = Scheduler(large_cost=10000, max_inflight_bytes=100, lane_workers=LANE_WORKERS)
+        received = []
+        
+        async def app(scope, receive, send):
+            while True:
+                message = await receive()
+                received.append(len(message["body"]))
+                # Mid-stream, only the chunk being counted is in flight
+                assert scheduler.stats()["inflight_bytes"] == 40
+                small = scheduler.admit("/count-words", 50)
+                scheduler.release(small)
+                if not message["more_body"]:
+                    break
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+        
+        chunks = [{"type": "http.request", "body": b"x" * 40, "more_body": i < 9} for i in range(10)]
+        sent = []
+        
+        async def receive():
+            return chunks.pop(0)
+        
+        async def send(message):
+            sent.append(message)
+        
+        scope = {"type": "http", "method": "POST", "path": "/count-words/stream",
+                 "headers": [(b"content-length", b"400")]}
+        asyncio.run(SchedulerMiddleware(app, scheduler)(scope, receive, send))
+        
+        assert sum(received) == 400
+        assert sent[0]["status"] == 200
+        stats = scheduler.stats()
+        assert stats["inflight_bytes"] == 0
+        assert stats["rejections"]["memory"] == 0
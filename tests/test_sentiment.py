@@ -131,4 +131,44 @@ class TestSentimentAnalysis:
         
         assert en_result['language'] == 'en'
         assert zh_result['language'] == 'zh'
-        assert mixed_result['language'] == 'mixed'
\ No newline at end of file
+        assert mixed_result['language'] == 'mixed'
+    
+    def test_batch_matches_single(self):
+        """测试批量分析与逐条分析结果一致"""
+        texts = ["Great product!", "这个产品很棒", "Terrible quality.", "", "卓越! Perfect!"]
+        results = SentimentService.batch_analyze_sentiment(texts)
+        
+        assert len(results) == len(texts)
+        for text, result in zip(texts, results):
+            single = SentimentService.analyze_sentiment(text)
+            single.pop('processing_time_ms')
+            assert result == single
+    
+    def test_sentence_granularity(self):
+        """测试逐句情感：句子区间、逐句标签和加权汇总"""
+        text = "I love this phone. The battery is terrible!\n客服很好。物流太慢了，真让人失望。"
+        result = SentimentService.analyze_sentiment(text, granularity="sentence")
+        sentences = result['sentences']
+        
+        assert [text[s['start']:s['end']] for s in sentences] == [
+            "I love this phone.", "The battery is terrible!", "客服很好。", "物流太慢了，真让人失望。",
+        ]
+        assert [s['label'] for s in sentences] == ['positive', 'negative', 'positive', 'negative']
+        assert result['word_count'] == sum(s['word_count'] for s in sentences)
+        weighted = sum(s['score'] * s['word_count'] for s in sentences) / result['word_count']
+        assert result['score'] == pytest.approx(weighted)
+        assert 'sentences' not in SentimentService.analyze_sentiment(text)
+    
+    def test_sentence_granularity_long_document(self):
+        """测试长文档逐句分析：每句结果与单独分析该句一致"""
+        text = "Great service and fast delivery. 质量很差，非常失望。 " * 5000
+        result = SentimentService.analyze_sentiment(text, granularity="sentence", use_cache=False)
+        
+        assert len(result['sentences']) == 10000
+        first, second = result['sentences'][:2]
+        single = SentimentService.analyzer.analyze(text[first['start']:first['end']])
+        assert {k: first[k] for k in single} == single
+        assert first['label'] == 'positive' and second['label'] == 'negative'
+        
+        with pytest.raises(ValueError):
+            SentimentService.analyzer.analyze(text, granularity="paragraph")
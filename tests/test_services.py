@@ -48,6 +48,23 @@ class TestTextProcessorService:
         assert result["original_length"] == len(sample_text)
         assert result["cleaned_length"] == len(result["cleaned_text"])
     
+    def test_batch_services(self, sample_text):
+        """Test batch services keep input order and report per-item results"""
+        texts = [sample_text, "no emails here", ""]
+        
+        words = TextProcessorService.count_words_batch(texts)
+        emails = TextProcessorService.extract_emails_batch(texts)
+        cleaned = TextProcessorService.clean_text_batch(texts)
+        
+        for batch in (words, emails, cleaned):
+            assert batch["count"] == 3
+            assert batch["error_count"] == 0
+            assert [item["index"] for item in batch["results"]] == [0, 1, 2]
+        
+        assert words["results"][0]["result"]["word_count"]["hello"] == 3
+        assert emails["results"][0]["result"]["email_count"] == 2
+        assert cleaned["results"][1]["result"]["original_length"] == len(texts[1])
+    
     def test_service_error_handling(self):
         """Test service layer error handling"""
         # Test None input (if Rust extension doesn't handle it)
@@ -61,11 +78,11 @@ class TestServicePerformance:
     
     def test_performance_tracking(self, large_text):
         """Test performance monitoring accuracy"""
-        result = TextProcessorService.count_words(large_text)
+        result = TextProcessorService.count_words(large_text, use_cache=False)
         
         # Manual timing verification
         start_time = time.time()
-        TextProcessorService.count_words(large_text)
+        TextProcessorService.count_words(large_text, use_cache=False)
         manual_time = (time.time() - start_time) * 1000
         
         # Service reported time should be reasonable
@@ -0,0 +1,41 @@
+use rayon::prelude::*;
+use std::panic::{self, AssertUnwindSafe};
+
+use crate::input::TextView;
+
+/// Outcome of one document in a batch; failures carry a message instead of
+/// aborting the whole batch
+pub type ItemResult<T> = Result<T, String>;
+
+/// Apply `f` to every document in parallel, keeping input order.
+///
+/// Items that already failed (e.g. were not text) are passed through, invalid
+/// UTF-8 fails only its own item, and a panic while processing one document is
+/// reported for that item only.
+pub fn map_batch<T, F>(items: &[ItemResult<TextView<'_>>], f: F) -> Vec<ItemResult<T>>
+where
+    T: Send,
+    F: Fn(&str) -> T + Sync,
+{
+    items
+        .par_iter()
+        .map(|item| match item {
+            Ok(view) => {
+                let text = view.decode()?;
+                panic::catch_unwind(AssertUnwindSafe(|| f(text)))
+                    .map_err(|payload| panic_message(payload.as_ref()))
+            }
+            Err(message) => Err(message.clone()),
+        })
+        .collect()
+}
+
+fn panic_message(payload: &(dyn std::any::Any + Send)) -> String {
+    if let Some(message) = payload.downcast_ref::<&str>() {
+        message.to_string()
+    } else if let Some(message) = payload.downcast_ref::<String>() {
+        message.clone()
+    } else {
+        "processing failed".to_string()
+    }
+}
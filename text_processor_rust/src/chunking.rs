@@ -0,0 +1,42 @@
+use memchr::memchr;
+
+/// A slice of the input together with its byte offset in the whole input
+#[derive(Clone, Copy)]
+pub struct Chunk<'a> {
+    pub offset: usize,
+    pub bytes: &'a [u8],
+}
+
+/// Split `bytes` into chunks of roughly `target` bytes, each ending just after the
+/// first boundary byte that `find_boundary` locates past the target size (or at
+/// the end of the input).
+///
+/// Boundaries are ASCII bytes, so every chunk starts and ends on a character
+/// boundary and can be validated as UTF-8 on its own.
+pub fn split_chunks<'a>(bytes: &'a [u8], target: usize, find_boundary: impl Fn(&[u8]) -> Option<usize>) -> Vec<Chunk<'a>> {
+    let target = target.max(1);
+    let mut chunks = Vec::with_capacity(bytes.len() / target + 1);
+    let mut start = 0;
+    while start < bytes.len() {
+        let mut end = (start + target).min(bytes.len());
+        if end < bytes.len() {
+            end = match find_boundary(&bytes[end..]) {
+                Some(position) => end + position + 1,
+                None => bytes.len(),
+            };
+        }
+        chunks.push(Chunk { offset: start, bytes: &bytes[start..end] });
+        start = end;
+    }
+    chunks
+}
+
+/// Next newline: a boundary no line-oriented operation crosses
+pub fn next_line_break(bytes: &[u8]) -> Option<usize> {
+    memchr(b'\n', bytes)
+}
+
+/// Next ASCII whitespace byte: a boundary no word or email match crosses
+pub fn next_word_break(bytes: &[u8]) -> Option<usize> {
+    bytes.iter().position(|b| b.is_ascii_whitespace())
+}
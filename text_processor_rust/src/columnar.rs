@@ -0,0 +1,32 @@
+use crate::interner::WordCounts;
+
+/// Width of one offset or count value in the int64 columns
+pub const VALUE_WIDTH: usize = 8;
+
+/// Arrow `large_utf8` offsets: `len + 1` little-endian int64 values into
+/// `WordCounts::words_buffer`, which serves as the data buffer as-is
+pub fn write_offsets(counts: &WordCounts, out: &mut [u8]) {
+    let mut offset = 0i64;
+    let mut slots = out.chunks_exact_mut(VALUE_WIDTH);
+    for ((word, _), slot) in counts.iter().zip(&mut slots) {
+        slot.copy_from_slice(&offset.to_le_bytes());
+        offset += word.len() as i64;
+    }
+    if let Some(last) = slots.next() {
+        last.copy_from_slice(&offset.to_le_bytes());
+    }
+}
+
+/// Counts as little-endian int64 values, parallel to the words
+pub fn write_counts(counts: &WordCounts, out: &mut [u8]) {
+    for ((_, count), slot) in counts.iter().zip(out.chunks_exact_mut(VALUE_WIDTH)) {
+        slot.copy_from_slice(&(count as i64).to_le_bytes());
+    }
+}
+
+/// Values as native-endian uint32, the layout of a `memoryview` cast to "I"
+pub fn write_u32(values: &[u32], out: &mut [u8]) {
+    for (value, slot) in values.iter().zip(out.chunks_exact_mut(4)) {
+        slot.copy_from_slice(&value.to_ne_bytes());
+    }
+}
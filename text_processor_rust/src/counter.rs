@@ -0,0 +1,124 @@
+use once_cell::sync::Lazy;
+use regex::Regex;
+use std::mem;
+
+use crate::interner::WordCounts;
+use crate::text;
+
+// Same character class as the word pattern in `text`, for a single character
+static WORD_CHAR: Lazy<Regex> = Lazy::new(|| Regex::new(r"^[\w']$").unwrap());
+
+fn is_word_char(c: char) -> bool {
+    let mut buf = [0u8; 4];
+    WORD_CHAR.is_match(c.encode_utf8(&mut buf))
+}
+
+/// Incremental word counter for text that arrives in chunks.
+///
+/// A word split across two chunks is held back in `carry` until its end is
+/// seen, and an incomplete UTF-8 sequence at the end of a byte chunk is held
+/// in `pending`, so feeding a document in pieces gives exactly the same
+/// counts as `text::count_words` on the whole document.
+#[derive(Debug, Default)]
+pub struct WordCounter {
+    counts: WordCounts,
+    carry: String,
+    pending: Vec<u8>,
+    bytes_seen: usize,
+}
+
+impl WordCounter {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    pub fn feed_str(&mut self, chunk: &str) {
+        let mut rest = chunk;
+
+        if !self.carry.is_empty() {
+            let head_len = rest
+                .char_indices()
+                .find(|(_, c)| !is_word_char(*c))
+                .map_or(rest.len(), |(i, _)| i);
+            self.carry.push_str(&rest[..head_len]);
+            if head_len == rest.len() {
+                return;
+            }
+            text::count_words_into(&mut self.counts, &self.carry);
+            self.carry.clear();
+            rest = &rest[head_len..];
+        }
+
+        let tail_start = rest
+            .char_indices()
+            .rev()
+            .take_while(|(_, c)| is_word_char(*c))
+            .last()
+            .map_or(rest.len(), |(i, _)| i);
+        text::count_words_into(&mut self.counts, &rest[..tail_start]);
+        self.carry.push_str(&rest[tail_start..]);
+    }
+
+    pub fn feed_bytes(&mut self, chunk: &[u8]) -> Result<(), String> {
+        let mut rest = chunk;
+
+        if !self.pending.is_empty() {
+            let pending_start = self.bytes_seen - self.pending.len();
+            let width = utf8_width(self.pending[0]).ok_or_else(|| invalid_utf8(pending_start))?;
+            let needed = (width - self.pending.len()).min(rest.len());
+            self.pending.extend_from_slice(&rest[..needed]);
+            rest = &rest[needed..];
+            if self.pending.len() < width {
+                self.bytes_seen += needed;
+                return Ok(());
+            }
+            let pending = mem::take(&mut self.pending);
+            let decoded = std::str::from_utf8(&pending).map_err(|_| invalid_utf8(pending_start))?;
+            self.feed_str(decoded);
+            self.bytes_seen += needed;
+        }
+
+        match std::str::from_utf8(rest) {
+            Ok(decoded) => self.feed_str(decoded),
+            Err(error) => {
+                let valid = error.valid_up_to();
+                if error.error_len().is_some() {
+                    return Err(invalid_utf8(self.bytes_seen + valid));
+                }
+                // The chunk ends in the middle of a character; keep its first bytes
+                let decoded = std::str::from_utf8(&rest[..valid]).expect("validated prefix");
+                self.feed_str(decoded);
+                self.pending.extend_from_slice(&rest[valid..]);
+            }
+        }
+        self.bytes_seen += rest.len();
+        Ok(())
+    }
+
+    /// Flush the trailing word and return the counts, leaving the counter empty
+    pub fn finish(&mut self) -> Result<WordCounts, String> {
+        if !self.pending.is_empty() {
+            return Err(format!(
+                "stream ends with a truncated UTF-8 sequence at byte {}",
+                self.bytes_seen - self.pending.len()
+            ));
+        }
+        text::count_words_into(&mut self.counts, &self.carry);
+        self.carry.clear();
+        self.bytes_seen = 0;
+        Ok(mem::take(&mut self.counts))
+    }
+}
+
+fn invalid_utf8(offset: usize) -> String {
+    format!("invalid UTF-8 at byte {}", offset)
+}
+
+fn utf8_width(first_byte: u8) -> Option<usize> {
+    match first_byte {
+        0xC2..=0xDF => Some(2),
+        0xE0..=0xEF => Some(3),
+        0xF0..=0xF4 => Some(4),
+        _ => None,
+    }
+}
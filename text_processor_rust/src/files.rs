@@ -0,0 +1,164 @@
+use memmap2::Mmap;
+use rayon::prelude::*;
+use std::fmt;
+use std::fs::{self, File};
+use std::io::{self, BufWriter, Write};
+use std::ops::Deref;
+use std::path::Path;
+
+use crate::chunking::{next_line_break, next_word_break, split_chunks, Chunk};
+use crate::interner::WordCounts;
+use crate::text;
+
+/// Default amount of input handed to one worker at a time
+pub const DEFAULT_CHUNK_SIZE: usize = 4 * 1024 * 1024;
+
+#[derive(Debug)]
+pub enum FileError {
+    Io(io::Error),
+    InvalidUtf8 { offset: usize },
+}
+
+impl From<io::Error> for FileError {
+    fn from(error: io::Error) -> Self {
+        FileError::Io(error)
+    }
+}
+
+impl fmt::Display for FileError {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        match self {
+            FileError::Io(error) => write!(f, "{}", error),
+            FileError::InvalidUtf8 { offset } => write!(f, "invalid UTF-8 at byte {}", offset),
+        }
+    }
+}
+
+/// Read-only view of a file's contents, memory-mapped when non-empty
+pub enum FileBytes {
+    Empty,
+    Mapped(Mmap),
+}
+
+impl FileBytes {
+    pub fn open(path: &Path) -> io::Result<Self> {
+        let file = File::open(path)?;
+        if file.metadata()?.len() == 0 {
+            return Ok(FileBytes::Empty);
+        }
+        // Safety: the map is read-only; callers must not truncate the file while it is mapped
+        let mmap = unsafe { Mmap::map(&file)? };
+        Ok(FileBytes::Mapped(mmap))
+    }
+}
+
+impl Deref for FileBytes {
+    type Target = [u8];
+
+    fn deref(&self) -> &[u8] {
+        match self {
+            FileBytes::Empty => &[],
+            FileBytes::Mapped(mmap) => mmap,
+        }
+    }
+}
+
+impl<'a> Chunk<'a> {
+    /// Validate this chunk as UTF-8, reporting errors at their absolute offset
+    pub fn as_str(&self) -> Result<&'a str, FileError> {
+        std::str::from_utf8(self.bytes).map_err(|error| FileError::InvalidUtf8 {
+            offset: self.offset + error.valid_up_to(),
+        })
+    }
+}
+
+/// Count words in memory-mapped `bytes`, in parallel chunks
+pub fn count_words_bytes(bytes: &[u8], chunk_size: usize) -> Result<WordCounts, FileError> {
+    split_chunks(bytes, chunk_size, next_word_break)
+        .par_iter()
+        .try_fold(WordCounts::new, |mut counts, chunk| -> Result<WordCounts, FileError> {
+            text::count_words_into(&mut counts, chunk.as_str()?);
+            Ok(counts)
+        })
+        .try_reduce(WordCounts::new, |a, b| Ok(a.merge(b)))
+}
+
+pub fn count_words_file(path: &Path, chunk_size: usize) -> Result<WordCounts, FileError> {
+    let bytes = FileBytes::open(path)?;
+    count_words_bytes(&bytes, chunk_size)
+}
+
+pub fn extract_emails_file(path: &Path, chunk_size: usize) -> Result<Vec<String>, FileError> {
+    let bytes = FileBytes::open(path)?;
+    let per_chunk: Vec<Vec<String>> = split_chunks(&bytes, chunk_size, next_word_break)
+        .par_iter()
+        .map(|chunk| -> Result<Vec<String>, FileError> { Ok(text::extract_emails(chunk.as_str()?)) })
+        .collect::<Result<_, FileError>>()?;
+    Ok(per_chunk.into_iter().flatten().collect())
+}
+
+/// Whether `dst` exists and is the file at `src`, whatever path or link leads to it
+fn same_file(src: &Path, dst: &Path) -> io::Result<bool> {
+    let dst_metadata = match fs::metadata(dst) {
+        Ok(metadata) => metadata,
+        Err(error) if error.kind() == io::ErrorKind::NotFound => return Ok(false),
+        Err(error) => return Err(error),
+    };
+    #[cfg(unix)]
+    {
+        use std::os::unix::fs::MetadataExt;
+        let src_metadata = fs::metadata(src)?;
+        Ok(src_metadata.dev() == dst_metadata.dev() && src_metadata.ino() == dst_metadata.ino())
+    }
+    #[cfg(not(unix))]
+    {
+        let _ = dst_metadata;
+        Ok(fs::canonicalize(src)? == fs::canonicalize(dst)?)
+    }
+}
+
+/// Clean `src` into `dst` line by line, returning the number of bytes written.
+///
+/// Chunks are cleaned in parallel a window at a time and written in order, so
+/// memory use is bounded by the window rather than the file size. `dst` must
+/// not be `src`: truncating it would pull the mapped pages from under the
+/// reader.
+pub fn clean_text_file(src: &Path, dst: &Path, chunk_size: usize) -> Result<u64, FileError> {
+    if same_file(src, dst)? {
+        return Err(io::Error::new(io::ErrorKind::InvalidInput, "src and dst are the same file").into());
+    }
+    let bytes = FileBytes::open(src)?;
+    let chunks = split_chunks(&bytes, chunk_size, next_line_break);
+    let mut writer = BufWriter::new(File::create(dst)?);
+    let mut written = 0u64;
+    let window = rayon::current_num_threads() * 2;
+
+    for (window_index, group) in chunks.chunks(window).enumerate() {
+        let cleaned: Vec<String> = group
+            .par_iter()
+            .map(|chunk| -> Result<String, FileError> {
+                let decoded = chunk.as_str()?;
+                let mut cleaned = String::with_capacity(decoded.len());
+                for (index, line) in decoded.lines().enumerate() {
+                    if index > 0 {
+                        cleaned.push('\n');
+                    }
+                    text::push_clean_line(&mut cleaned, line);
+                }
+                Ok(cleaned)
+            })
+            .collect::<Result<_, FileError>>()?;
+
+        for (index, part) in cleaned.iter().enumerate() {
+            // Chunks end on a newline, so each new chunk starts a new line
+            if window_index > 0 || index > 0 {
+                writer.write_all(b"\n")?;
+                written += 1;
+            }
+            writer.write_all(part.as_bytes())?;
+            written += part.len() as u64;
+        }
+    }
+    writer.flush()?;
+    Ok(written)
+}
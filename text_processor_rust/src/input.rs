@@ -0,0 +1,81 @@
+use pyo3::buffer::PyBuffer;
+use pyo3::exceptions::{PyTypeError, PyValueError};
+use pyo3::prelude::*;
+use pyo3::types::PyString;
+
+use crate::runtime;
+
+/// Text argument accepted by the extension functions: a `str`, or any
+/// C-contiguous byte buffer (`bytes`, `bytearray`, `memoryview`, `mmap`, ...)
+/// holding UTF-8, which is read in place without copying.
+///
+/// Writable buffers must not be modified by another thread while a call that
+/// received them is running.
+pub enum TextArg<'py> {
+    Str(&'py str),
+    Buffer(PyBuffer<u8>),
+}
+
+impl<'py> FromPyObject<'py> for TextArg<'py> {
+    fn extract(ob: &'py PyAny) -> PyResult<Self> {
+        if let Ok(string) = ob.downcast::<PyString>() {
+            return Ok(TextArg::Str(string.to_str()?));
+        }
+        let buffer = PyBuffer::<u8>::get(ob).map_err(|_| {
+            PyTypeError::new_err(format!(
+                "expected str or a bytes-like object, got {}",
+                ob.get_type().name().unwrap_or("unknown")
+            ))
+        })?;
+        if !buffer.is_c_contiguous() {
+            return Err(PyValueError::new_err("buffer must be C-contiguous"));
+        }
+        Ok(TextArg::Buffer(buffer))
+    }
+}
+
+impl TextArg<'_> {
+    /// A borrowed view that can be moved into `allow_threads`
+    pub fn view(&self) -> TextView<'_> {
+        match self {
+            TextArg::Str(text) => TextView::Str(text),
+            TextArg::Buffer(buffer) => {
+                let len = buffer.len_bytes();
+                if len == 0 {
+                    return TextView::Bytes(&[]);
+                }
+                // Safety: the buffer stays exported for as long as `self` lives,
+                // which also stops a bytearray from being resized under us
+                let bytes = unsafe { std::slice::from_raw_parts(buffer.buf_ptr() as *const u8, len) };
+                TextView::Bytes(bytes)
+            }
+        }
+    }
+}
+
+/// Borrowed text that may still need UTF-8 validation
+#[derive(Clone, Copy)]
+pub enum TextView<'a> {
+    Str(&'a str),
+    Bytes(&'a [u8]),
+}
+
+impl<'a> TextView<'a> {
+    pub fn decode(self) -> Result<&'a str, String> {
+        match self {
+            TextView::Str(text) => Ok(text),
+            TextView::Bytes(bytes) => std::str::from_utf8(bytes)
+                .map_err(|error| format!("invalid UTF-8 at byte {}", error.valid_up_to())),
+        }
+    }
+}
+
+/// Validate `text` and run `f` on it with the GIL released
+pub fn with_text<T, F>(py: Python<'_>, text: &TextArg<'_>, f: F) -> PyResult<T>
+where
+    T: Send,
+    F: FnOnce(&str) -> T + Send,
+{
+    let view = text.view();
+    runtime::allow_threads(py, move || view.decode().map(f).map_err(PyValueError::new_err))
+}
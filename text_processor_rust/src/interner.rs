@@ -0,0 +1,186 @@
+use std::collections::HashMap;
+use std::mem;
+
+// Multiplier of the Fx hash used by rustc: one rotate, xor and multiply per
+// 8 bytes, which is all a table of short words needs
+const FX_SEED: u64 = 0x51_7c_c1_b7_27_22_0a_95;
+
+#[inline]
+fn fx_add(hash: u64, word: u64) -> u64 {
+    (hash.rotate_left(5) ^ word).wrapping_mul(FX_SEED)
+}
+
+pub(crate) fn fx_hash(bytes: &[u8]) -> u64 {
+    let mut hash = fx_add(0, bytes.len() as u64);
+    let mut words = bytes.chunks_exact(8);
+    for word in &mut words {
+        hash = fx_add(hash, u64::from_le_bytes(word.try_into().unwrap()));
+    }
+    let rest = words.remainder();
+    if !rest.is_empty() {
+        let mut tail = [0u8; 8];
+        tail[..rest.len()].copy_from_slice(rest);
+        hash = fx_add(hash, u64::from_le_bytes(tail));
+    }
+    hash
+}
+
+#[derive(Debug, Clone, Copy)]
+struct Entry {
+    start: usize,
+    len: usize,
+    hash: u64,
+    count: usize,
+}
+
+/// Lowercased word counts backed by a string interner.
+///
+/// Every distinct word is copied once into a shared arena and looked up by
+/// hashing borrowed slices in an open-addressing table, so counting allocates
+/// in proportion to the vocabulary, not to the number of tokens. Case folding
+/// goes through a reused scratch buffer and matches `str::to_lowercase`.
+#[derive(Debug, Default)]
+pub struct WordCounts {
+    arena: String,
+    entries: Vec<Entry>,
+    /// Slots hold an entry index plus one; zero marks an empty slot
+    table: Vec<u32>,
+    scratch: String,
+}
+
+impl WordCounts {
+    pub fn new() -> Self {
+        Self::default()
+    }
+
+    /// Number of distinct words
+    pub fn len(&self) -> usize {
+        self.entries.len()
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.entries.is_empty()
+    }
+
+    /// Count one occurrence of `word`, lowercasing it first
+    pub fn add(&mut self, word: &str) {
+        if word.is_ascii() {
+            if !word.bytes().any(|b| b.is_ascii_uppercase()) {
+                return self.add_folded(word, 1);
+            }
+            let mut scratch = mem::take(&mut self.scratch);
+            scratch.clear();
+            scratch.extend(word.chars().map(|c| c.to_ascii_lowercase()));
+            self.add_folded(&scratch, 1);
+            self.scratch = scratch;
+        } else if word.chars().all(lowercase_is_identity) {
+            self.add_folded(word, 1);
+        } else if word.contains('Σ') {
+            // Sigma lowercases differently at the end of a word; leave that to std
+            self.add_folded(&word.to_lowercase(), 1);
+        } else {
+            let mut scratch = mem::take(&mut self.scratch);
+            scratch.clear();
+            scratch.extend(word.chars().flat_map(char::to_lowercase));
+            self.add_folded(&scratch, 1);
+            self.scratch = scratch;
+        }
+    }
+
+    /// Add `count` occurrences of an already lowercased word
+    pub fn add_folded(&mut self, word: &str, count: usize) {
+        if (self.entries.len() + 1) * 2 > self.table.len() {
+            self.grow();
+        }
+        let hash = fx_hash(word.as_bytes());
+        let mask = self.table.len() - 1;
+        let mut slot = self.home_slot(hash);
+        loop {
+            match self.table[slot] {
+                0 => break,
+                index => {
+                    let entry = &mut self.entries[index as usize - 1];
+                    if entry.hash == hash && &self.arena[entry.start..entry.start + entry.len] == word {
+                        entry.count += count;
+                        return;
+                    }
+                }
+            }
+            slot = (slot + 1) & mask;
+        }
+        let start = self.arena.len();
+        self.arena.push_str(word);
+        self.entries.push(Entry { start, len: word.len(), hash, count });
+        self.table[slot] = self.entries.len() as u32;
+    }
+
+    /// Count of an already lowercased word
+    pub fn get(&self, word: &str) -> Option<usize> {
+        if self.table.is_empty() {
+            return None;
+        }
+        let hash = fx_hash(word.as_bytes());
+        let mask = self.table.len() - 1;
+        let mut slot = self.home_slot(hash);
+        while self.table[slot] != 0 {
+            let entry = &self.entries[self.table[slot] as usize - 1];
+            if entry.hash == hash && self.word(entry) == word {
+                return Some(entry.count);
+            }
+            slot = (slot + 1) & mask;
+        }
+        None
+    }
+
+    /// Words and their counts, in insertion order. After `merge` that is not
+    /// first-seen order: the smaller side's new words follow the larger side's.
+    pub fn iter(&self) -> impl Iterator<Item = (&str, usize)> + '_ {
+        self.entries.iter().map(move |entry| (self.word(entry), entry.count))
+    }
+
+    /// Merge two partial counts, folding the smaller into the larger one
+    pub fn merge(self, other: WordCounts) -> WordCounts {
+        let (mut into, from) = if self.len() >= other.len() { (self, other) } else { (other, self) };
+        for (word, count) in from.iter() {
+            into.add_folded(word, count);
+        }
+        into
+    }
+
+    /// Every word back to back in `iter` order, each one starting where the previous ends
+    pub fn words_buffer(&self) -> &str {
+        &self.arena
+    }
+
+    pub fn into_map(self) -> HashMap<String, usize> {
+        self.iter().map(|(word, count)| (word.to_string(), count)).collect()
+    }
+
+    fn word(&self, entry: &Entry) -> &str {
+        &self.arena[entry.start..entry.start + entry.len]
+    }
+
+    /// Fx mixes upward, so the table index comes from the high bits
+    fn home_slot(&self, hash: u64) -> usize {
+        let bits = self.table.len().trailing_zeros();
+        (hash >> (64 - bits)) as usize
+    }
+
+    fn grow(&mut self) {
+        let capacity = (self.table.len() * 2).max(64);
+        self.table = vec![0; capacity];
+        let mask = capacity - 1;
+        for (index, entry) in self.entries.iter().enumerate() {
+            let mut slot = self.home_slot(entry.hash);
+            while self.table[slot] != 0 {
+                slot = (slot + 1) & mask;
+            }
+            self.table[slot] = index as u32 + 1;
+        }
+    }
+}
+
+pub(crate) fn lowercase_is_identity(c: char) -> bool {
+    let mut lower = c.to_lowercase();
+    lower.next() == Some(c) && lower.next().is_none()
+}
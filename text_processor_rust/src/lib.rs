@@ -1,78 +1,784 @@
 use pyo3::prelude::*;
-use regex::Regex;
 use rayon::prelude::*;
-use std::collections::HashMap;
-use pyo3::types::PyDict;
+use pyo3::types::{IntoPyDict, PyBytes, PyDict, PyMemoryView};
+use once_cell::sync::Lazy;
+#[cfg(feature = "alloc-stats")]
+mod alloc_stats;
+mod batch;
+mod chunking;
+mod columnar;
+mod counter;
+mod files;
+mod input;
+mod interner;
+mod pipeline;
+mod runtime;
 mod sentiment;
-use sentiment::SentimentAnalyzer;
+mod stopwords;
+mod summary;
+mod text;
+use batch::{map_batch, ItemResult};
+use pipeline::Operations;
+use pyo3::exceptions::{PyIOError, PyValueError};
+use std::path::PathBuf;
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex};
+use files::FileError;
+use input::{with_text, TextArg, TextView};
+use interner::WordCounts;
+use stopwords::StopwordFilter;
+use summary::CountOptions;
+use sentiment::{SentimentAnalyzer, SentimentResult, language};
+use sentiment::stream::{SentimentStream, StreamSummary};
+use sentiment::tokenizer::{self, CharCursor, MultiLanguageTokenizer, OffsetUnit, Script};
+use sentiment::lexicon::{Lexicon, LexiconError};
+use sentiment::registry;
+
+static SHARED_ANALYZER: Lazy<SentimentAnalyzer> = Lazy::new(SentimentAnalyzer::new);
+
+// Word counts become a `dict` straight from the interner's borrowed words
+impl ToPyObject for WordCounts {
+    fn to_object(&self, py: Python<'_>) -> PyObject {
+        let dict = PyDict::new(py);
+        for (word, count) in self.iter() {
+            dict.set_item(word, count).expect("inserting a str key cannot fail");
+        }
+        dict.into()
+    }
+}
+
+impl IntoPy<PyObject> for WordCounts {
+    fn into_py(self, py: Python<'_>) -> PyObject {
+        self.to_object(py)
+    }
+}
+
+// Pools for explicit `num_threads` values, built on first use and kept for
+// the life of the process
+static THREAD_POOLS: Lazy<Mutex<HashMap<usize, Arc<rayon::ThreadPool>>>> = Lazy::new(Default::default);
 
-/// Count word frequencies in text (computationally intensive)
+fn thread_pool(threads: usize) -> PyResult<Arc<rayon::ThreadPool>> {
+    let mut pools = THREAD_POOLS.lock().unwrap_or_else(|poisoned| poisoned.into_inner());
+    if let Some(pool) = pools.get(&threads) {
+        return Ok(Arc::clone(pool));
+    }
+    let pool = rayon::ThreadPoolBuilder::new()
+        .num_threads(threads)
+        .build()
+        .map_err(|error| PyValueError::new_err(error.to_string()))?;
+    Ok(Arc::clone(pools.entry(threads).or_insert_with(|| Arc::new(pool))))
+}
+
+/// Count word frequencies on the global rayon pool, or on a shared pool of
+/// `num_threads` threads when given
+fn count_with_threads(text: &str, num_threads: Option<usize>) -> PyResult<WordCounts> {
+    match num_threads {
+        Some(threads) => Ok(thread_pool(threads)?.install(|| text::count_words(text))),
+        None => Ok(text::count_words(text)),
+    }
+}
+
+fn count_options(
+    top_k: Option<usize>,
+    min_count: Option<usize>,
+    stopwords: Option<Vec<&str>>,
+    extra_stopwords: Option<Vec<&str>>,
+) -> PyResult<CountOptions> {
+    let stopwords = StopwordFilter::new(
+        &stopwords.unwrap_or_default(),
+        &extra_stopwords.unwrap_or_default(),
+    )
+    .map_err(PyValueError::new_err)?;
+    Ok(CountOptions { top_k, min_count: min_count.unwrap_or(0), stopwords })
+}
+
+/// Count word frequencies in text (computationally intensive).
+///
+/// Inputs above 1 MiB are counted in parallel. `stopwords` names built-in
+/// lists ("en", "zh") and `extra_stopwords` adds custom words; both are
+/// removed, then `min_count` and `top_k` trim the vocabulary before anything
+/// is converted to Python. With `top_k` the dict is ordered by descending count.
+///
+/// Like every text function here, `text` may be a `str` or a bytes-like
+/// object holding UTF-8, which is read in place.
 #[pyfunction]
-fn count_words(text: String) -> PyResult<HashMap<String, usize>> {
-    let re = Regex::new(r"[\w']+").unwrap();
-    let mut word_count: HashMap<String, usize> = HashMap::new();
-    for mat in re.find_iter(&text) {
-        let word = mat.as_str().to_lowercase();
-        *word_count.entry(word).or_insert(0) += 1;
+#[pyo3(signature = (text, num_threads = None, *, top_k = None, min_count = None, stopwords = None, extra_stopwords = None))]
+fn count_words(
+    py: Python<'_>,
+    text: TextArg<'_>,
+    num_threads: Option<usize>,
+    top_k: Option<usize>,
+    min_count: Option<usize>,
+    stopwords: Option<Vec<&str>>,
+    extra_stopwords: Option<Vec<&str>>,
+) -> PyResult<PyObject> {
+    if top_k.is_none() && min_count.is_none() && stopwords.is_none() && extra_stopwords.is_none() {
+        // The GIL is released while counting so other Python threads keep running
+        let counts = with_text(py, &text, |text| count_with_threads(text, num_threads))??;
+        return Ok(counts.into_py(py));
     }
-    Ok(word_count)
+    let options = count_options(top_k, min_count, stopwords, extra_stopwords)?;
+    let selected = with_text(py, &text, |text| {
+        count_with_threads(text, num_threads).map(|counts| summary::summarize(&counts, &options))
+    })??;
+    Ok(selected.words.into_py_dict(py).into())
+}
+
+/// Count words and return `{"word_count", "total_words", "unique_words"}`.
+///
+/// Takes the same `num_threads` and filtering options as `count_words`; the
+/// totals cover every non-stopword, even those trimmed by `min_count` or
+/// `top_k`.
+#[pyfunction]
+#[pyo3(signature = (text, num_threads = None, *, top_k = None, min_count = None, stopwords = None, extra_stopwords = None))]
+fn count_words_summary(
+    py: Python<'_>,
+    text: TextArg<'_>,
+    num_threads: Option<usize>,
+    top_k: Option<usize>,
+    min_count: Option<usize>,
+    stopwords: Option<Vec<&str>>,
+    extra_stopwords: Option<Vec<&str>>,
+) -> PyResult<PyObject> {
+    let options = count_options(top_k, min_count, stopwords, extra_stopwords)?;
+    let selected = with_text(py, &text, |decoded| {
+        count_with_threads(decoded, num_threads).map(|counts| summary::summarize(&counts, &options))
+    })??;
+
+    let dict = PyDict::new(py);
+    dict.set_item("word_count", selected.words.into_py_dict(py))?;
+    dict.set_item("total_words", selected.total_words)?;
+    dict.set_item("unique_words", selected.unique_words)?;
+    Ok(dict.into())
+}
+
+/// Like `count_words_summary`, but return the result already encoded as JSON
+/// bytes, so a web handler can send it without building a dict per word.
+#[pyfunction]
+#[pyo3(signature = (text, num_threads = None, *, top_k = None, min_count = None, stopwords = None, extra_stopwords = None))]
+fn count_words_json(
+    py: Python<'_>,
+    text: TextArg<'_>,
+    num_threads: Option<usize>,
+    top_k: Option<usize>,
+    min_count: Option<usize>,
+    stopwords: Option<Vec<&str>>,
+    extra_stopwords: Option<Vec<&str>>,
+) -> PyResult<PyObject> {
+    let options = count_options(top_k, min_count, stopwords, extra_stopwords)?;
+    let body = with_text(py, &text, |decoded| {
+        count_with_threads(decoded, num_threads).map(|counts| {
+            let selected = summary::summarize(&counts, &options);
+            serde_json::to_vec(&selected).expect("word counts always serialise")
+        })
+    })??;
+    Ok(PyBytes::new(py, &body).into())
+}
+
+/// Count word frequencies into flat buffers instead of a dict.
+///
+/// The result holds `data` (every word back to back, UTF-8), `offsets`
+/// (`length + 1` int64 values) and `counts` (int64), the buffers of an Arrow
+/// `large_string` array and an `int64` array. Word order is unspecified:
+/// inputs counted in parallel do not keep first-seen order.
+#[pyfunction]
+#[pyo3(signature = (text, num_threads = None))]
+fn count_words_columnar(
+    py: Python<'_>,
+    text: TextArg<'_>,
+    num_threads: Option<usize>,
+) -> PyResult<PyObject> {
+    let counts = with_text(py, &text, |text| count_with_threads(text, num_threads))??;
+    let length = counts.len();
+
+    let dict = PyDict::new(py);
+    dict.set_item("length", length)?;
+    dict.set_item("data", PyBytes::new(py, counts.words_buffer().as_bytes()))?;
+    let offsets = PyBytes::new_with(py, (length + 1) * columnar::VALUE_WIDTH, |out| {
+        columnar::write_offsets(&counts, out);
+        Ok(())
+    })?;
+    dict.set_item("offsets", offsets)?;
+    let values = PyBytes::new_with(py, length * columnar::VALUE_WIDTH, |out| {
+        columnar::write_counts(&counts, out);
+        Ok(())
+    })?;
+    dict.set_item("counts", values)?;
+    Ok(dict.into())
 }
 
 /// Extract email addresses from text
 #[pyfunction]
-fn extract_emails(text: &str) -> PyResult<Vec<String>> {
-    let email_regex = Regex::new(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b").unwrap();
-    let emails: Vec<String> = email_regex
-        .find_iter(text)
-        .map(|mat| mat.as_str().to_string())
-        .collect();
-    
-    Ok(emails)
+fn extract_emails(py: Python<'_>, text: TextArg<'_>) -> PyResult<Vec<String>> {
+    with_text(py, &text, text::extract_emails)
 }
 
 /// Clean and normalize text (parallel processing)
 #[pyfunction]
-fn clean_text(text: &str) -> PyResult<String> {
-    let lines: Vec<&str> = text.lines().collect();
-    let cleaned_lines: Vec<String> = lines
-        .par_iter()
-        .map(|line| {
-            line.trim()
-                .chars()
-                .filter(|c| c.is_alphanumeric() || c.is_whitespace() || ".,!?".contains(*c))
-                .collect()
+fn clean_text(py: Python<'_>, text: TextArg<'_>) -> PyResult<String> {
+    with_text(py, &text, text::clean_text)
+}
+
+fn file_error_to_py(error: FileError) -> PyErr {
+    match error {
+        FileError::Io(error) => PyIOError::new_err(error.to_string()),
+        FileError::InvalidUtf8 { .. } => PyValueError::new_err(error.to_string()),
+    }
+}
+
+/// Count word frequencies in a UTF-8 file without loading it into Python.
+///
+/// The file is memory-mapped and counted in parallel chunks split at
+/// whitespace; each chunk is validated as UTF-8 by the worker that counts it.
+#[pyfunction]
+#[pyo3(signature = (path, chunk_size = files::DEFAULT_CHUNK_SIZE))]
+fn count_words_file(py: Python<'_>, path: PathBuf, chunk_size: usize) -> PyResult<WordCounts> {
+    runtime::allow_threads(py, || files::count_words_file(&path, chunk_size))
+        .map_err(file_error_to_py)
+}
+
+/// Extract email addresses from a UTF-8 file, in order of appearance
+#[pyfunction]
+#[pyo3(signature = (path, chunk_size = files::DEFAULT_CHUNK_SIZE))]
+fn extract_emails_file(py: Python<'_>, path: PathBuf, chunk_size: usize) -> PyResult<Vec<String>> {
+    runtime::allow_threads(py, || files::extract_emails_file(&path, chunk_size))
+        .map_err(file_error_to_py)
+}
+
+/// Clean the UTF-8 file `src` into `dst`, returning the number of bytes written
+#[pyfunction]
+#[pyo3(signature = (src, dst, chunk_size = files::DEFAULT_CHUNK_SIZE))]
+fn clean_text_file(py: Python<'_>, src: PathBuf, dst: PathBuf, chunk_size: usize) -> PyResult<u64> {
+    runtime::allow_threads(py, || files::clean_text_file(&src, &dst, chunk_size))
+        .map_err(file_error_to_py)
+}
+
+/// Extract every batch item as text, recording a per-item error for anything else
+fn extract_batch_items<'py>(texts: &[&'py PyAny]) -> Vec<ItemResult<TextArg<'py>>> {
+    texts
+        .iter()
+        .enumerate()
+        .map(|(index, item)| {
+            item.extract::<TextArg>()
+                .map_err(|_| format!("item {} is not a str or bytes-like object", index))
+        })
+        .collect()
+}
+
+fn batch_views<'a>(items: &'a [ItemResult<TextArg<'_>>]) -> Vec<ItemResult<TextView<'a>>> {
+    items
+        .iter()
+        .map(|item| item.as_ref().map(TextArg::view).map_err(Clone::clone))
+        .collect()
+}
+
+/// Convert batch results into `(result, error)` tuples
+fn batch_to_py<T: IntoPy<PyObject>>(py: Python<'_>, results: Vec<ItemResult<T>>) -> Vec<PyObject> {
+    results
+        .into_iter()
+        .map(|result| match result {
+            Ok(value) => (value, py.None()).into_py(py),
+            Err(message) => (py.None(), message).into_py(py),
         })
-        .collect();
-    
-    Ok(cleaned_lines.join("\n"))
+        .collect()
+}
+
+/// Count word frequencies for many documents, in parallel across documents.
+/// Returns one `(word_count, error)` tuple per input, in input order.
+#[pyfunction]
+fn count_words_batch(py: Python<'_>, texts: Vec<&PyAny>) -> PyResult<Vec<PyObject>> {
+    let items = extract_batch_items(&texts);
+    let views = batch_views(&items);
+    let results = runtime::allow_threads(py, || map_batch(&views, text::count_words));
+    Ok(batch_to_py(py, results))
+}
+
+/// Extract emails from many documents, in parallel across documents.
+/// Returns one `(emails, error)` tuple per input, in input order.
+#[pyfunction]
+fn extract_emails_batch(py: Python<'_>, texts: Vec<&PyAny>) -> PyResult<Vec<PyObject>> {
+    let items = extract_batch_items(&texts);
+    let views = batch_views(&items);
+    let results = runtime::allow_threads(py, || map_batch(&views, text::extract_emails));
+    Ok(batch_to_py(py, results))
+}
+
+/// Clean many documents, in parallel across documents.
+/// Returns one `(cleaned_text, error)` tuple per input, in input order.
+#[pyfunction]
+fn clean_text_batch(py: Python<'_>, texts: Vec<&PyAny>) -> PyResult<Vec<PyObject>> {
+    let items = extract_batch_items(&texts);
+    let views = batch_views(&items);
+    let results = runtime::allow_threads(py, || map_batch(&views, text::clean_text));
+    Ok(batch_to_py(py, results))
+}
+
+/// Detect the language of a document: "en", "zh" or "mixed".
+///
+/// A single byte scan that stops as soon as the rest of the text can no
+/// longer change the answer, so it is cheap enough to route requests with.
+#[pyfunction]
+fn detect_language(py: Python<'_>, text: TextArg<'_>) -> PyResult<&'static str> {
+    with_text(py, &text, |text| language::detect_language(text).as_str())
 }
 
+/// Detect the language of many documents, in parallel across documents.
+/// Returns one `(language, error)` tuple per input, in input order.
 #[pyfunction]
-fn analyze_sentiment(text: &str) -> PyResult<PyObject> {
-    let analyzer = SentimentAnalyzer::new();
-    let result = analyzer.analyze(text);
-    
-    Python::with_gil(|py| {
+fn detect_language_batch(py: Python<'_>, texts: Vec<&PyAny>) -> PyResult<Vec<PyObject>> {
+    let items = extract_batch_items(&texts);
+    let views = batch_views(&items);
+    let results = runtime::allow_threads(py, || map_batch(&views, |text| language::detect_language(text).as_str()));
+    Ok(batch_to_py(py, results))
+}
+
+/// Run several operations over one document in a single shared scan.
+///
+/// `operations` is any combination of "count_words", "extract_emails",
+/// "clean_text" and "analyze_sentiment"; only the requested keys are present
+/// in the returned dict.
+#[pyfunction]
+fn process(py: Python<'_>, text: TextArg<'_>, operations: Vec<&str>) -> PyResult<PyObject> {
+    let operations = Operations::parse(&operations).map_err(PyValueError::new_err)?;
+    let output = with_text(py, &text, |text| pipeline::process(text, operations, &SHARED_ANALYZER))?;
+
+    let dict = PyDict::new(py);
+    if let Some(word_count) = output.word_count {
+        dict.set_item("word_count", word_count)?;
+    }
+    if let Some(emails) = output.emails {
+        dict.set_item("emails", emails)?;
+    }
+    if let Some(cleaned_text) = output.cleaned_text {
+        dict.set_item("cleaned_text", cleaned_text)?;
+    }
+    if let Some(sentiment) = output.sentiment {
+        dict.set_item("sentiment", sentiment_to_dict(py, sentiment)?)?;
+    }
+    Ok(dict.into())
+}
+
+fn sentiment_to_dict(py: Python<'_>, result: SentimentResult) -> PyResult<PyObject> {
+    let dict = PyDict::new(py);
+    dict.set_item("score", result.score)?;
+    dict.set_item("label", result.label)?;
+    dict.set_item("confidence", result.confidence)?;
+    dict.set_item("word_count", result.word_count)?;
+    dict.set_item("positive_words", result.positive_words)?;
+    dict.set_item("negative_words", result.negative_words)?;
+    dict.set_item("language", result.language)?;
+    Ok(dict.into())
+}
+
+/// The named lexicon, or the current default when `name` is None
+fn resolve_lexicon(name: Option<&str>) -> PyResult<Arc<Lexicon>> {
+    match name {
+        None => Ok(registry::default_lexicon()),
+        Some(name) => registry::get(name)
+            .ok_or_else(|| PyValueError::new_err(format!("unknown lexicon: {}", name))),
+    }
+}
+
+fn lexicon_error_to_py(error: LexiconError) -> PyErr {
+    match error {
+        LexiconError::Io(error) => PyIOError::new_err(error.to_string()),
+        LexiconError::Format(_) => PyValueError::new_err(error.to_string()),
+    }
+}
+
+/// Score `text` as one document, or sentence by sentence when `granularity`
+/// is "sentence"
+fn analyze_with_granularity(
+    py: Python<'_>,
+    analyzer: &SentimentAnalyzer,
+    text: &TextArg<'_>,
+    lexicon: Option<&str>,
+    granularity: &str,
+) -> PyResult<PyObject> {
+    let lexicon = resolve_lexicon(lexicon)?;
+    match granularity {
+        "document" => {
+            let result = with_text(py, text, |text| analyzer.analyze_with(text, &lexicon))?;
+            sentiment_to_dict(py, result)
+        }
+        "sentence" => {
+            let (overall, sentences) = with_text(py, text, |text| {
+                let (overall, mut sentences) = analyzer.analyze_sentences(text, &lexicon);
+                // Spans go out as code point offsets so they slice the Python str
+                let mut cursor = CharCursor::new(text);
+                for sentence in &mut sentences {
+                    sentence.start = cursor.advance_to(sentence.start);
+                    sentence.end = cursor.advance_to(sentence.end);
+                }
+                (overall, sentences)
+            })?;
+            let items = sentences
+                .into_iter()
+                .map(|sentence| {
+                    let item = sentiment_to_dict(py, sentence.result)?;
+                    let dict: &PyDict = item.downcast(py)?;
+                    dict.set_item("start", sentence.start)?;
+                    dict.set_item("end", sentence.end)?;
+                    Ok(item)
+                })
+                .collect::<PyResult<Vec<PyObject>>>()?;
+            let result = sentiment_to_dict(py, overall)?;
+            result.downcast::<PyDict>(py)?.set_item("sentences", items)?;
+            Ok(result)
+        }
+        other => Err(PyValueError::new_err(format!(
+            "unknown granularity: {} (expected \"document\" or \"sentence\")",
+            other
+        ))),
+    }
+}
+
+/// Analyze sentiment with the process-wide shared analyzer.
+///
+/// `lexicon` names a lexicon registered with `load_lexicon`; by default the
+/// "default" lexicon is used. With `granularity="sentence"` the text is split
+/// on Chinese and English sentence boundaries, sentences are scored in
+/// parallel, and the result also holds `sentences`: one dict per sentence with
+/// its `start`/`end` code point offsets. The top-level score is the
+/// word-weighted mean of the sentence scores.
+#[pyfunction]
+#[pyo3(signature = (text, lexicon = None, granularity = "document"))]
+fn analyze_sentiment(py: Python<'_>, text: TextArg<'_>, lexicon: Option<&str>, granularity: &str) -> PyResult<PyObject> {
+    analyze_with_granularity(py, &SHARED_ANALYZER, &text, lexicon, granularity)
+}
+
+/// Score every text with `analyzer`, in parallel across documents
+fn analyze_batch_with(
+    py: Python<'_>,
+    analyzer: &SentimentAnalyzer,
+    texts: &[TextArg<'_>],
+    lexicon: Option<&str>,
+) -> PyResult<Vec<PyObject>> {
+    let lexicon = resolve_lexicon(lexicon)?;
+    let views: Vec<TextView> = texts.iter().map(TextArg::view).collect();
+    let results: Vec<SentimentResult> = runtime::allow_threads(py, || {
+        views
+            .par_iter()
+            .map(|view| view.decode().map(|text| analyzer.analyze_with(text, &lexicon)))
+            .collect::<Result<_, String>>()
+    })
+    .map_err(PyValueError::new_err)?;
+    results.into_iter().map(|result| sentiment_to_dict(py, result)).collect()
+}
+
+/// Analyze many documents in one call, in parallel across documents
+#[pyfunction]
+#[pyo3(signature = (texts, lexicon = None))]
+fn analyze_sentiment_batch(py: Python<'_>, texts: Vec<TextArg<'_>>, lexicon: Option<&str>) -> PyResult<Vec<PyObject>> {
+    analyze_batch_with(py, &SHARED_ANALYZER, &texts, lexicon)
+}
+
+/// Compile a TSV or JSON lexicon at `src` into the binary format at `dst`.
+/// Returns the number of entries.
+#[pyfunction]
+fn compile_lexicon(py: Python<'_>, src: PathBuf, dst: PathBuf) -> PyResult<usize> {
+    runtime::allow_threads(py, || -> Result<usize, LexiconError> {
+        let lexicon = Lexicon::open(&src)?;
+        lexicon.write_to(&dst)?;
+        Ok(lexicon.len())
+    })
+    .map_err(lexicon_error_to_py)
+}
+
+/// Load a lexicon file (`.tsv`, `.json`, or a compiled file, which is
+/// memory-mapped) and register it under `name`, atomically replacing any
+/// lexicon of that name. Requests already running keep the lexicon they
+/// started with. Returns the number of entries.
+#[pyfunction]
+fn load_lexicon(py: Python<'_>, name: &str, path: PathBuf) -> PyResult<usize> {
+    let lexicon = runtime::allow_threads(py, || Lexicon::open(&path)).map_err(lexicon_error_to_py)?;
+    let len = lexicon.len();
+    registry::install(name, lexicon);
+    Ok(len)
+}
+
+/// Remove a registered lexicon; returns whether it existed
+#[pyfunction]
+fn unload_lexicon(name: &str) -> PyResult<bool> {
+    registry::remove(name).map_err(PyValueError::new_err)
+}
+
+/// Registered lexicon names mapped to their entry counts
+#[pyfunction]
+fn list_lexicons(py: Python<'_>) -> PyObject {
+    registry::list().into_py_dict(py).into()
+}
+
+/// Packed uint32 values as a `memoryview` of format "I"
+fn u32_view<'py>(py: Python<'py>, values: &[u32]) -> PyResult<&'py PyAny> {
+    let bytes = PyBytes::new_with(py, values.len() * 4, |out| {
+        columnar::write_u32(values, out);
+        Ok(())
+    })?;
+    PyMemoryView::from(bytes)?.call_method1("cast", ("I",))
+}
+
+/// Tokenize text without creating a Python string per token.
+///
+/// Returns `start` and `end` as uint32 memoryviews of token offsets into the
+/// original text, in UTF-8 bytes (`unit="byte"`) or code points
+/// (`unit="char"`, matching `str` indexing), `script` as one byte per token
+/// indexing `scripts` ("latin", "han", "other"), and the detected `language`.
+/// Tokens are the ones the sentiment analyzer scores: original case, in order.
+#[pyfunction]
+#[pyo3(signature = (text, unit = "byte"))]
+fn tokenize(py: Python<'_>, text: TextArg<'_>, unit: &str) -> PyResult<PyObject> {
+    let unit = match unit {
+        "byte" => OffsetUnit::Byte,
+        "char" => OffsetUnit::Char,
+        other => {
+            return Err(PyValueError::new_err(format!(
+                "unknown unit: {} (expected \"byte\" or \"char\")",
+                other
+            )))
+        }
+    };
+    let (starts, ends, scripts, language) = with_text(py, &text, |text| {
+        if text.len() > u32::MAX as usize {
+            return Err("text is too long for 32-bit offsets".to_string());
+        }
+        let tokenized = MultiLanguageTokenizer::new().tokenize(text);
+        let (starts, ends) = tokenized.offsets(text, unit);
+        let scripts: Vec<u8> = tokenized.tokens.iter().map(|token| token.script.code()).collect();
+        Ok((starts, ends, scripts, tokenized.language))
+    })?
+    .map_err(PyValueError::new_err)?;
+
+    let dict = PyDict::new(py);
+    dict.set_item("length", starts.len())?;
+    dict.set_item("start", u32_view(py, &starts)?)?;
+    dict.set_item("end", u32_view(py, &ends)?)?;
+    dict.set_item("script", PyBytes::new(py, &scripts))?;
+    dict.set_item("scripts", Script::NAMES.to_vec())?;
+    dict.set_item("language", language.as_str())?;
+    Ok(dict.into())
+}
+
+/// Load jieba with an optional user dictionary (`word [freq] [tag]` per line).
+///
+/// Call once at startup, before anything tokenizes Chinese text; afterwards
+/// the segmenter is fixed and this raises ValueError.
+#[pyfunction]
+#[pyo3(signature = (user_dict = None))]
+fn configure_jieba(py: Python<'_>, user_dict: Option<PathBuf>) -> PyResult<()> {
+    runtime::allow_threads(py, || tokenizer::configure_jieba(user_dict.as_deref()))
+        .map_err(PyValueError::new_err)
+}
+
+/// Reusable sentiment analyzer; build it once and share it between threads
+#[pyclass(name = "SentimentAnalyzer", frozen)]
+struct PySentimentAnalyzer {
+    inner: SentimentAnalyzer,
+}
+
+#[pymethods]
+impl PySentimentAnalyzer {
+    #[new]
+    fn new() -> Self {
+        Self { inner: SentimentAnalyzer::new() }
+    }
+
+    #[pyo3(signature = (text, lexicon = None, granularity = "document"))]
+    fn analyze(&self, py: Python<'_>, text: TextArg<'_>, lexicon: Option<&str>, granularity: &str) -> PyResult<PyObject> {
+        analyze_with_granularity(py, &self.inner, &text, lexicon, granularity)
+    }
+
+    #[pyo3(signature = (texts, lexicon = None))]
+    fn analyze_batch(&self, py: Python<'_>, texts: Vec<TextArg<'_>>, lexicon: Option<&str>) -> PyResult<Vec<PyObject>> {
+        analyze_batch_with(py, &self.inner, &texts, lexicon)
+    }
+}
+
+fn summary_to_dict(py: Python<'_>, summary: StreamSummary) -> PyResult<PyObject> {
+    let dict = PyDict::new(py);
+    dict.set_item("score", summary.score)?;
+    dict.set_item("label", summary.label)?;
+    dict.set_item("confidence", summary.confidence)?;
+    dict.set_item("word_count", summary.word_count)?;
+    dict.set_item("fragments", summary.fragments)?;
+    Ok(dict.into())
+}
+
+/// Rolling-window sentiment over a stream of text fragments (e.g. chat
+/// messages).
+///
+/// Each `feed` scores only the new fragment and updates the last-`window`
+/// and since-start aggregates in O(1). The result holds `fragment` (the
+/// fragment's own result), `rolling` and `cumulative`. A stream keeps one
+/// small record per fragment in the window and no text, so thousands of them
+/// fit in one worker. The lexicon is fixed when the stream is created.
+#[pyclass(name = "SentimentStream")]
+struct PySentimentStream {
+    inner: SentimentStream,
+}
+
+#[pymethods]
+impl PySentimentStream {
+    #[new]
+    #[pyo3(signature = (window = 20, lexicon = None))]
+    fn new(window: usize, lexicon: Option<&str>) -> PyResult<Self> {
+        if window == 0 {
+            return Err(PyValueError::new_err("window must be at least 1"));
+        }
+        Ok(Self { inner: SentimentStream::new(resolve_lexicon(lexicon)?, window) })
+    }
+
+    fn feed(&mut self, py: Python<'_>, fragment: TextArg<'_>) -> PyResult<PyObject> {
+        let inner = &mut self.inner;
+        let (result, rolling, cumulative) = with_text(py, &fragment, |text| {
+            let result = inner.feed(&SHARED_ANALYZER, text);
+            (result, inner.rolling(&SHARED_ANALYZER), inner.cumulative(&SHARED_ANALYZER))
+        })?;
         let dict = PyDict::new(py);
-        dict.set_item("score", result.score)?;
-        dict.set_item("label", result.label)?;
-        dict.set_item("confidence", result.confidence)?;
-        dict.set_item("word_count", result.word_count)?;
-        dict.set_item("positive_words", result.positive_words)?;
-        dict.set_item("negative_words", result.negative_words)?;
-        dict.set_item("language", result.language)?;
+        dict.set_item("fragment", sentiment_to_dict(py, result)?)?;
+        dict.set_item("rolling", summary_to_dict(py, rolling)?)?;
+        dict.set_item("cumulative", summary_to_dict(py, cumulative)?)?;
         Ok(dict.into())
-    })
+    }
+
+    /// Clear the window and the cumulative totals
+    fn reset(&mut self) {
+        self.inner.reset();
+    }
+}
+
+/// Reusable multi-language tokenizer
+#[pyclass(name = "Tokenizer", frozen)]
+struct PyTokenizer {
+    inner: MultiLanguageTokenizer,
+}
+
+#[pymethods]
+impl PyTokenizer {
+    #[new]
+    fn new() -> Self {
+        Self { inner: MultiLanguageTokenizer::new() }
+    }
+
+    /// Return the lowercased tokens and the detected language
+    fn tokenize(&self, py: Python<'_>, text: TextArg<'_>) -> PyResult<PyObject> {
+        let (words, language) = with_text(py, &text, |text| {
+            let tokenized = self.inner.tokenize(text);
+            let words: Vec<String> = tokenized.words(text).map(str::to_lowercase).collect();
+            (words, tokenized.language)
+        })?;
+        let dict = PyDict::new(py);
+        dict.set_item("words", words)?;
+        dict.set_item("language", language.as_str())?;
+        Ok(dict.into())
+    }
+}
+
+/// Incremental word counter for streamed input.
+///
+/// Call `feed` with each `str` or bytes-like UTF-8 chunk as it arrives and
+/// `finish` once at the end. Words and multi-byte characters split across
+/// chunk boundaries are counted exactly once.
+#[pyclass(name = "WordCounter")]
+struct PyWordCounter {
+    inner: counter::WordCounter,
+}
+
+#[pymethods]
+impl PyWordCounter {
+    #[new]
+    fn new() -> Self {
+        Self { inner: counter::WordCounter::new() }
+    }
+
+    fn feed(&mut self, py: Python<'_>, chunk: TextArg<'_>) -> PyResult<()> {
+        let inner = &mut self.inner;
+        match chunk.view() {
+            TextView::Str(text) => {
+                runtime::allow_threads(py, || inner.feed_str(text));
+                Ok(())
+            }
+            // Raw bytes may end mid-character, so they are decoded incrementally
+            TextView::Bytes(bytes) => runtime::allow_threads(py, || inner.feed_bytes(bytes))
+                .map_err(PyValueError::new_err),
+        }
+    }
+
+    /// Return the word counts and reset the counter
+    fn finish(&mut self, py: Python<'_>) -> PyResult<WordCounts> {
+        let inner = &mut self.inner;
+        runtime::allow_threads(py, || inner.finish()).map_err(PyValueError::new_err)
+    }
+}
+
+/// Process-wide counters for monitoring: calls running with the GIL released
+/// (`calls_in_flight`), completed `calls` and their total `busy_seconds`,
+/// tokens processed by word counting and by sentiment analysis, and the size
+/// of the global rayon pool. Counters only grow; reading them is lock-free.
+#[pyfunction]
+fn runtime_stats(py: Python<'_>) -> PyResult<PyObject> {
+    let stats = runtime::snapshot();
+    let dict = PyDict::new(py);
+    dict.set_item("calls_in_flight", stats.calls_in_flight)?;
+    dict.set_item("calls", stats.calls)?;
+    dict.set_item("busy_seconds", stats.busy_seconds)?;
+    dict.set_item("words_counted", stats.words_counted)?;
+    dict.set_item("sentiment_tokens", stats.sentiment_tokens)?;
+    dict.set_item("rayon_threads", stats.rayon_threads)?;
+    Ok(dict.into())
+}
+
+/// Number of heap allocations and bytes requested by Rust code since the last reset
+#[cfg(feature = "alloc-stats")]
+#[pyfunction]
+fn allocation_stats(py: Python<'_>) -> PyObject {
+    let (allocations, bytes) = alloc_stats::snapshot();
+    [("allocations", allocations), ("bytes", bytes)].into_py_dict(py).into()
+}
+
+#[cfg(feature = "alloc-stats")]
+#[pyfunction]
+fn reset_allocation_stats() {
+    alloc_stats::reset();
 }
 
 /// A Python module implemented in Rust
 #[pymodule]
 fn text_processor_rust(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(count_words, m)?)?;
+    m.add_function(wrap_pyfunction!(count_words_summary, m)?)?;
+    m.add_function(wrap_pyfunction!(count_words_json, m)?)?;
+    m.add_function(wrap_pyfunction!(count_words_columnar, m)?)?;
     m.add_function(wrap_pyfunction!(extract_emails, m)?)?;
     m.add_function(wrap_pyfunction!(clean_text, m)?)?;
+    m.add_function(wrap_pyfunction!(count_words_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(extract_emails_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(clean_text_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(detect_language, m)?)?;
+    m.add_function(wrap_pyfunction!(detect_language_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(process, m)?)?;
+    m.add_function(wrap_pyfunction!(count_words_file, m)?)?;
+    m.add_function(wrap_pyfunction!(extract_emails_file, m)?)?;
+    m.add_function(wrap_pyfunction!(clean_text_file, m)?)?;
     // 新增情感分析函数
     m.add_function(wrap_pyfunction!(analyze_sentiment, m)?)?;
+    m.add_function(wrap_pyfunction!(analyze_sentiment_batch, m)?)?;
+    m.add_function(wrap_pyfunction!(compile_lexicon, m)?)?;
+    m.add_function(wrap_pyfunction!(load_lexicon, m)?)?;
+    m.add_function(wrap_pyfunction!(unload_lexicon, m)?)?;
+    m.add_function(wrap_pyfunction!(list_lexicons, m)?)?;
+    m.add_function(wrap_pyfunction!(tokenize, m)?)?;
+    m.add_function(wrap_pyfunction!(configure_jieba, m)?)?;
+    m.add_function(wrap_pyfunction!(runtime_stats, m)?)?;
+    m.add_class::<PySentimentAnalyzer>()?;
+    m.add_class::<PySentimentStream>()?;
+    m.add_class::<PyTokenizer>()?;
+    m.add_class::<PyWordCounter>()?;
+    #[cfg(feature = "alloc-stats")]
+    {
+        m.add_function(wrap_pyfunction!(allocation_stats, m)?)?;
+        m.add_function(wrap_pyfunction!(reset_allocation_stats, m)?)?;
+    }
 
     Ok(())
 }
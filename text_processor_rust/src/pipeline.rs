@@ -0,0 +1,142 @@
+use rayon::prelude::*;
+
+use crate::chunking::{next_line_break, next_word_break, split_chunks};
+use crate::interner::WordCounts;
+use crate::sentiment::{SentimentAnalyzer, SentimentResult};
+use crate::text;
+
+/// The set of operations requested for one document
+#[derive(Debug, Clone, Copy, Default)]
+pub struct Operations {
+    pub count_words: bool,
+    pub extract_emails: bool,
+    pub clean_text: bool,
+    pub analyze_sentiment: bool,
+}
+
+impl Operations {
+    pub fn parse<S: AsRef<str>>(names: &[S]) -> Result<Self, String> {
+        let mut operations = Operations::default();
+        for name in names {
+            match name.as_ref() {
+                "count_words" => operations.count_words = true,
+                "extract_emails" => operations.extract_emails = true,
+                "clean_text" => operations.clean_text = true,
+                "analyze_sentiment" => operations.analyze_sentiment = true,
+                other => return Err(format!("unknown operation: {}", other)),
+            }
+        }
+        Ok(operations)
+    }
+
+    fn needs_line_scan(&self) -> bool {
+        self.count_words || self.extract_emails || self.clean_text
+    }
+}
+
+#[derive(Debug, Default)]
+pub struct ProcessOutput {
+    pub word_count: Option<WordCounts>,
+    pub emails: Option<Vec<String>>,
+    pub cleaned_text: Option<String>,
+    pub sentiment: Option<SentimentResult>,
+}
+
+/// Run every requested operation, visiting each line once for all the
+/// line-oriented ones.
+///
+/// Word counting, email extraction and cleaning all operate line by line, so
+/// each line is visited once while it is still in cache and every operation
+/// reads it there. None of the patterns can match across a newline, so the
+/// results are identical to running the operations separately. Inputs of
+/// `PARALLEL_THRESHOLD` bytes or more are scanned in parallel chunks, as
+/// `count_words` counts them.
+///
+/// Sentiment analysis is not part of that scan: it segments words with its
+/// own tokenizer (jieba for Chinese, Unicode word boundaries otherwise), whose
+/// tokens differ from the word counter's, so it makes a second pass over the
+/// text, run concurrently with the first.
+pub fn process(text: &str, operations: Operations, analyzer: &SentimentAnalyzer) -> ProcessOutput {
+    let (mut output, sentiment) = rayon::join(
+        || scan(text, operations),
+        || operations.analyze_sentiment.then(|| analyzer.analyze(text)),
+    );
+    output.sentiment = sentiment;
+    output
+}
+
+fn scan(text: &str, operations: Operations) -> ProcessOutput {
+    if !operations.needs_line_scan() {
+        return ProcessOutput::default();
+    }
+    if text.len() < text::PARALLEL_THRESHOLD {
+        return scan_lines(text, operations);
+    }
+
+    // Cleaning keeps the line structure, so its chunks must end at a newline;
+    // words and emails never cross any whitespace
+    let boundary: fn(&[u8]) -> Option<usize> =
+        if operations.clean_text { next_line_break } else { next_word_break };
+    let chunks = split_chunks(text.as_bytes(), text::parallel_chunk_size(text.len()), boundary);
+    let parts: Vec<ProcessOutput> = chunks
+        .par_iter()
+        // Chunk boundaries are ASCII bytes, so these are valid char boundaries
+        .map(|chunk| scan_lines(&text[chunk.offset..chunk.offset + chunk.bytes.len()], operations))
+        .collect();
+
+    let mut emails = Vec::new();
+    let mut cleaned = String::new();
+    let mut counts = Vec::with_capacity(parts.len());
+    for (index, part) in parts.into_iter().enumerate() {
+        counts.extend(part.word_count);
+        emails.extend(part.emails.into_iter().flatten());
+        if let Some(part_cleaned) = part.cleaned_text {
+            // Every chunk but the last ends with the newline between its last
+            // line and the next chunk's first
+            if index > 0 {
+                cleaned.push('\n');
+            }
+            cleaned.push_str(&part_cleaned);
+        }
+    }
+    ProcessOutput {
+        word_count: operations
+            .count_words
+            .then(|| counts.into_par_iter().reduce(WordCounts::new, WordCounts::merge)),
+        emails: operations.extract_emails.then_some(emails),
+        cleaned_text: operations.clean_text.then_some(cleaned),
+        sentiment: None,
+    }
+}
+
+fn scan_lines(text: &str, operations: Operations) -> ProcessOutput {
+    let mut word_count = WordCounts::new();
+    let mut emails = Vec::new();
+    let mut cleaned = String::new();
+    if operations.clean_text {
+        cleaned.reserve(text.len());
+    }
+
+    for (index, line) in text.lines().enumerate() {
+        if operations.count_words {
+            text::count_words_into(&mut word_count, line);
+        }
+        // Every address contains '@', so most lines skip the regex entirely
+        if operations.extract_emails && line.contains('@') {
+            text::extract_emails_into(&mut emails, line);
+        }
+        if operations.clean_text {
+            if index > 0 {
+                cleaned.push('\n');
+            }
+            text::push_clean_line(&mut cleaned, line);
+        }
+    }
+
+    ProcessOutput {
+        word_count: operations.count_words.then_some(word_count),
+        emails: operations.extract_emails.then_some(emails),
+        cleaned_text: operations.clean_text.then_some(cleaned),
+        sentiment: None,
+    }
+}
@@ -0,0 +1,77 @@
+use std::sync::atomic::{AtomicU64, AtomicUsize, Ordering};
+use std::time::Instant;
+
+use pyo3::Python;
+
+// Process-wide counters behind `runtime_stats`. Each update is a single
+// relaxed atomic add: recording takes no lock and does not need the GIL.
+static CALLS_IN_FLIGHT: AtomicUsize = AtomicUsize::new(0);
+static CALLS: AtomicU64 = AtomicU64::new(0);
+static BUSY_NANOS: AtomicU64 = AtomicU64::new(0);
+static WORDS_COUNTED: AtomicU64 = AtomicU64::new(0);
+static SENTIMENT_TOKENS: AtomicU64 = AtomicU64::new(0);
+
+/// What a batch of processed tokens was used for
+pub enum Tokens {
+    Words,
+    Sentiment,
+}
+
+pub fn add_tokens(kind: Tokens, count: usize) {
+    let counter = match kind {
+        Tokens::Words => &WORDS_COUNTED,
+        Tokens::Sentiment => &SENTIMENT_TOKENS,
+    };
+    counter.fetch_add(count as u64, Ordering::Relaxed);
+}
+
+/// Counts a call as in flight until dropped, then adds its duration
+struct Call(Instant);
+
+impl Call {
+    fn start() -> Self {
+        CALLS_IN_FLIGHT.fetch_add(1, Ordering::Relaxed);
+        Call(Instant::now())
+    }
+}
+
+impl Drop for Call {
+    fn drop(&mut self) {
+        CALLS_IN_FLIGHT.fetch_sub(1, Ordering::Relaxed);
+        CALLS.fetch_add(1, Ordering::Relaxed);
+        BUSY_NANOS.fetch_add(self.0.elapsed().as_nanos() as u64, Ordering::Relaxed);
+    }
+}
+
+/// `Python::allow_threads` that also counts the call in `runtime_stats`
+pub fn allow_threads<T, F>(py: Python<'_>, f: F) -> T
+where
+    T: Send,
+    F: FnOnce() -> T + Send,
+{
+    py.allow_threads(|| {
+        let _call = Call::start();
+        f()
+    })
+}
+
+#[derive(Debug)]
+pub struct RuntimeStats {
+    pub calls_in_flight: usize,
+    pub calls: u64,
+    pub busy_seconds: f64,
+    pub words_counted: u64,
+    pub sentiment_tokens: u64,
+    pub rayon_threads: usize,
+}
+
+pub fn snapshot() -> RuntimeStats {
+    RuntimeStats {
+        calls_in_flight: CALLS_IN_FLIGHT.load(Ordering::Relaxed),
+        calls: CALLS.load(Ordering::Relaxed),
+        busy_seconds: BUSY_NANOS.load(Ordering::Relaxed) as f64 / 1e9,
+        words_counted: WORDS_COUNTED.load(Ordering::Relaxed),
+        sentiment_tokens: SENTIMENT_TOKENS.load(Ordering::Relaxed),
+        rayon_threads: rayon::current_num_threads(),
+    }
+}
@@ -1,6 +1,11 @@
 pub mod dictionary;
+pub mod lexicon;    // 统一的预编译词典
+pub mod registry;   // 运行时加载、按名称选择的词典
 pub mod analyzer;
 pub mod rules;
+pub mod sentences;  // 中英文断句
+pub mod stream;     // 流式滚动窗口情感
+pub mod language;   // 单遍扫描的语言检测
 pub mod tokenizer;  // 新增：多语言分词器
 
 pub use analyzer::SentimentAnalyzer;
@@ -1,10 +1,27 @@
 use crate::sentiment::{
     SentimentResult, 
+    language,
+    lexicon::Lexicon,
+    registry,
     rules::RuleProcessor, 
+    sentences,
     tokenizer::{MultiLanguageTokenizer, Language}
 };
 use rayon::prelude::*;
 
+use crate::runtime::{self, Tokens};
+
+// 一个句子的打分太小，按这么多句子一组交给线程池
+const SENTENCES_PER_TASK: usize = 32;
+
+/// 一个句子的结果，`start..end` 是它在原文中的字节区间
+#[derive(Debug, Clone)]
+pub struct SentenceSentiment {
+    pub start: usize,
+    pub end: usize,
+    pub result: SentimentResult,
+}
+
 pub struct SentimentAnalyzer {
     rule_processor: RuleProcessor,
     tokenizer: MultiLanguageTokenizer,  // 修复：添加缺少的tokenizer字段
@@ -18,14 +35,20 @@ impl SentimentAnalyzer {
         }
     }
     
+    /// 使用当前的默认词典分析
     pub fn analyze(&self, text: &str) -> SentimentResult {
+        self.analyze_with(text, &registry::default_lexicon())
+    }
+    
+    pub fn analyze_with(&self, text: &str, lexicon: &Lexicon) -> SentimentResult {
         let _start_time = std::time::Instant::now();
         
         // 多语言分词（使用tokenizer）
         let tokenized = self.tokenizer.tokenize(text);
-        let words = tokenized.words;
+        let tokens = tokenized.tokens;
         let language = tokenized.language;
-        let word_count = words.len();
+        let word_count = tokens.len();
+        runtime::add_tokens(Tokens::Sentiment, word_count);
         
         if word_count == 0 {
             return SentimentResult {
@@ -39,19 +62,12 @@ impl SentimentAnalyzer {
             };
         }
         
-        // 并行处理每个词的情感分数
-        let word_sentiments: Vec<(String, f64)> = words
-            .par_iter()
-            .enumerate()
-            .map(|(i, word)| {
-                // 修复：添加缺少的language参数
-                let sentiment = self.rule_processor.process_context(&words, i, &language);
-                (word.clone(), sentiment)
-            })
-            .collect();
+        // 每个词查一次词典，再顺序扫描一遍得到逐词分数
+        let entries = self.rule_processor.lookup_all(lexicon, text, &tokens);
+        let scores = self.rule_processor.score_all(text, &tokens, &entries, &language);
         
         // 计算总体情感分数
-        let total_score: f64 = word_sentiments.iter().map(|(_, score)| score).sum();
+        let total_score: f64 = scores.iter().sum();
         
         // 根据语言调整归一化策略
         let normalized_score = match language {
@@ -72,17 +88,19 @@ impl SentimentAnalyzer {
         // 分类和置信度（需要language参数）
         let (label, confidence) = self.classify_sentiment(normalized_score, &language);
         
-        // 提取积极和消极词汇
-        let positive_words: Vec<String> = word_sentiments
+        // 提取积极和消极词汇（只有这些词才复制成小写字符串）
+        let positive_words: Vec<String> = scores
             .iter()
-            .filter(|(_, score)| *score > 0.1)
-            .map(|(word, _)| word.clone())
+            .zip(&tokens)
+            .filter(|(score, _)| **score > 0.1)
+            .map(|(_, token)| text[token.range()].to_lowercase())
             .collect();
             
-        let negative_words: Vec<String> = word_sentiments
+        let negative_words: Vec<String> = scores
             .iter()
-            .filter(|(_, score)| *score < -0.1)
-            .map(|(word, _)| word.clone())
+            .zip(&tokens)
+            .filter(|(score, _)| **score < -0.1)
+            .map(|(_, token)| text[token.range()].to_lowercase())
             .collect();
         
         SentimentResult {
@@ -96,7 +114,44 @@ impl SentimentAnalyzer {
         }
     }
     
-    fn classify_sentiment(&self, score: f64, language: &Language) -> (String, f64) {
+    /// 逐句打分（句子之间并行），再按词数加权汇总成整篇的结果。
+    /// 整篇的语言由全文检测，积极、消极词按句子顺序拼接。
+    pub fn analyze_sentences(&self, text: &str, lexicon: &Lexicon) -> (SentimentResult, Vec<SentenceSentiment>) {
+        let sentences: Vec<SentenceSentiment> = sentences::split_sentences(text)
+            .into_par_iter()
+            .with_min_len(SENTENCES_PER_TASK)
+            .map(|range| SentenceSentiment {
+                start: range.start,
+                end: range.end,
+                result: self.analyze_with(&text[range], lexicon),
+            })
+            .collect();
+        
+        let language = language::detect_language(text);
+        let word_count: usize = sentences.iter().map(|sentence| sentence.result.word_count).sum();
+        let score = if word_count == 0 {
+            0.0
+        } else {
+            sentences
+                .iter()
+                .map(|sentence| sentence.result.score * sentence.result.word_count as f64)
+                .sum::<f64>()
+                / word_count as f64
+        };
+        let (label, confidence) = self.classify_sentiment(score, &language);
+        let overall = SentimentResult {
+            score,
+            label,
+            confidence,
+            word_count,
+            positive_words: sentences.iter().flat_map(|s| s.result.positive_words.iter().cloned()).collect(),
+            negative_words: sentences.iter().flat_map(|s| s.result.negative_words.iter().cloned()).collect(),
+            language: self.language_to_string(&language),
+        };
+        (overall, sentences)
+    }
+    
+    pub(crate) fn classify_sentiment(&self, score: f64, language: &Language) -> (String, f64) {
         let abs_score = score.abs();
         
         // 根据语言调整分类阈值
@@ -120,10 +175,6 @@ impl SentimentAnalyzer {
     }
     
     fn language_to_string(&self, language: &Language) -> String {
-        match language {
-            Language::English => "en".to_string(),
-            Language::Chinese => "zh".to_string(),
-            Language::Mixed => "mixed".to_string(),
-        }
+        language.as_str().to_string()
     }
 }
\ No newline at end of file
@@ -1,187 +1,151 @@
-use std::collections::HashMap;
 use once_cell::sync::Lazy;
+use std::sync::Arc;
+
+use crate::sentiment::lexicon::Lexicon;
 
 // 英文情感词典
-static EN_POSITIVE_WORDS: Lazy<HashMap<&'static str, f64>> = Lazy::new(|| {
-    let mut map = HashMap::new();
+const EN_POSITIVE_WORDS: &[(&str, f64)] = &[
     // 基础积极词汇
-    map.insert("good", 0.5);
-    map.insert("great", 0.8);
-    map.insert("excellent", 1.0);
-    map.insert("amazing", 0.9);
-    map.insert("wonderful", 0.8);
-    map.insert("fantastic", 0.9);
-    map.insert("love", 0.7);
-    map.insert("like", 0.3);
-    map.insert("happy", 0.6);
-    map.insert("satisfied", 0.5);
-    map.insert("awesome", 0.8);
-    map.insert("perfect", 0.9);
-    map.insert("outstanding", 0.9);
-    map.insert("brilliant", 0.8);
-    map.insert("superb", 0.8);
-    map
-});
+    ("good", 0.5),
+    ("great", 0.8),
+    ("excellent", 1.0),
+    ("amazing", 0.9),
+    ("wonderful", 0.8),
+    ("fantastic", 0.9),
+    ("love", 0.7),
+    ("like", 0.3),
+    ("happy", 0.6),
+    ("satisfied", 0.5),
+    ("awesome", 0.8),
+    ("perfect", 0.9),
+    ("outstanding", 0.9),
+    ("brilliant", 0.8),
+    ("superb", 0.8),
+];
 
-static EN_NEGATIVE_WORDS: Lazy<HashMap<&'static str, f64>> = Lazy::new(|| {
-    let mut map = HashMap::new();
-    map.insert("bad", -0.5);
-    map.insert("terrible", -1.0);
-    map.insert("awful", -0.9);
-    map.insert("hate", -0.8);
-    map.insert("dislike", -0.4);
-    map.insert("sad", -0.6);
-    map.insert("angry", -0.7);
-    map.insert("disappointed", -0.6);
-    map.insert("horrible", -0.9);
-    map.insert("disgusting", -0.8);
-    map.insert("annoying", -0.5);
-    map.insert("boring", -0.4);
-    map
-});
+const EN_NEGATIVE_WORDS: &[(&str, f64)] = &[
+    ("bad", -0.5),
+    ("terrible", -1.0),
+    ("awful", -0.9),
+    ("hate", -0.8),
+    ("dislike", -0.4),
+    ("sad", -0.6),
+    ("angry", -0.7),
+    ("disappointed", -0.6),
+    ("horrible", -0.9),
+    ("disgusting", -0.8),
+    ("annoying", -0.5),
+    ("boring", -0.4),
+];
 
 // 中文情感词典
-static ZH_POSITIVE_WORDS: Lazy<HashMap<&'static str, f64>> = Lazy::new(|| {
-    let mut map = HashMap::new();
+const ZH_POSITIVE_WORDS: &[(&str, f64)] = &[
     // 中文积极词汇
-    map.insert("好", 0.5);
-    map.insert("很好", 0.7);
-    map.insert("棒", 0.6);
-    map.insert("不错", 0.5);
-    map.insert("喜欢", 0.6);
-    map.insert("爱", 0.8);
-    map.insert("满意", 0.6);
-    map.insert("开心", 0.7);
-    map.insert("高兴", 0.7);
-    map.insert("优秀", 0.8);
-    map.insert("完美", 0.9);
-    map.insert("赞", 0.6);
-    map.insert("给力", 0.7);
-    map.insert("超棒", 0.8);
-    map.insert("惊喜", 0.7);
-    map.insert("优质", 0.7);
-    map.insert("精彩", 0.8);
-    map.insert("杰出", 0.8);
-    map.insert("卓越", 0.9);
-    map.insert("出色", 0.8);
-    map
-});
+    ("好", 0.5),
+    ("很好", 0.7),
+    ("棒", 0.6),
+    ("不错", 0.5),
+    ("喜欢", 0.6),
+    ("爱", 0.8),
+    ("满意", 0.6),
+    ("开心", 0.7),
+    ("高兴", 0.7),
+    ("优秀", 0.8),
+    ("完美", 0.9),
+    ("赞", 0.6),
+    ("给力", 0.7),
+    ("超棒", 0.8),
+    ("惊喜", 0.7),
+    ("优质", 0.7),
+    ("精彩", 0.8),
+    ("杰出", 0.8),
+    ("卓越", 0.9),
+    ("出色", 0.8),
+];
 
-static ZH_NEGATIVE_WORDS: Lazy<HashMap<&'static str, f64>> = Lazy::new(|| {
-    let mut map = HashMap::new();
-    map.insert("坏", -0.5);
-    map.insert("差", -0.5);
-    map.insert("糟糕", -0.8);
-    map.insert("讨厌", -0.7);
-    map.insert("恨", -0.8);
-    map.insert("失望", -0.6);
-    map.insert("难过", -0.6);
-    map.insert("生气", -0.7);
-    map.insert("愤怒", -0.8);
-    map.insert("垃圾", -0.9);
-    map.insert("烂", -0.8);
-    map.insert("无聊", -0.4);
-    map.insert("恶心", -0.8);
-    map.insert("可怕", -0.7);
-    map.insert("糟", -0.6);
-    map.insert("臭", -0.6);
-    map.insert("破", -0.5);
-    map.insert("烦", -0.5);
-    map.insert("恼火", -0.6);
-    map.insert("郁闷", -0.5);
-    map
-});
+const ZH_NEGATIVE_WORDS: &[(&str, f64)] = &[
+    ("坏", -0.5),
+    ("差", -0.5),
+    ("糟糕", -0.8),
+    ("讨厌", -0.7),
+    ("恨", -0.8),
+    ("失望", -0.6),
+    ("难过", -0.6),
+    ("生气", -0.7),
+    ("愤怒", -0.8),
+    ("垃圾", -0.9),
+    ("烂", -0.8),
+    ("无聊", -0.4),
+    ("恶心", -0.8),
+    ("可怕", -0.7),
+    ("糟", -0.6),
+    ("臭", -0.6),
+    ("破", -0.5),
+    ("烦", -0.5),
+    ("恼火", -0.6),
+    ("郁闷", -0.5),
+];
 
 // 程度副词
-static EN_INTENSIFIERS: Lazy<HashMap<&'static str, f64>> = Lazy::new(|| {
-    let mut map = HashMap::new();
-    map.insert("very", 1.5);
-    map.insert("extremely", 2.0);
-    map.insert("really", 1.3);
-    map.insert("quite", 1.2);
-    map.insert("somewhat", 0.8);
-    map.insert("slightly", 0.7);
-    map.insert("absolutely", 1.8);
-    map.insert("totally", 1.6);
-    map.insert("incredibly", 1.7);
-    map.insert("super", 1.4);
-    map
-});
+const EN_INTENSIFIERS: &[(&str, f64)] = &[
+    ("very", 1.5),
+    ("extremely", 2.0),
+    ("really", 1.3),
+    ("quite", 1.2),
+    ("somewhat", 0.8),
+    ("slightly", 0.7),
+    ("absolutely", 1.8),
+    ("totally", 1.6),
+    ("incredibly", 1.7),
+    ("super", 1.4),
+];
 
-static ZH_INTENSIFIERS: Lazy<HashMap<&'static str, f64>> = Lazy::new(|| {
-    let mut map = HashMap::new();
-    map.insert("很", 1.3);
-    map.insert("非常", 1.6);
-    map.insert("极其", 1.8);
-    map.insert("超级", 1.5);
-    map.insert("特别", 1.4);
-    map.insert("相当", 1.2);
-    map.insert("比较", 0.8);
-    map.insert("有点", 0.7);
-    map.insert("稍微", 0.6);
-    map.insert("十分", 1.5);
-    map.insert("格外", 1.4);
-    map.insert("异常", 1.6);
-    map.insert("超", 1.4);
-    map.insert("巨", 1.5);
-    map.insert("贼", 1.3);
-    map
-});
+const ZH_INTENSIFIERS: &[(&str, f64)] = &[
+    ("很", 1.3),
+    ("非常", 1.6),
+    ("极其", 1.8),
+    ("超级", 1.5),
+    ("特别", 1.4),
+    ("相当", 1.2),
+    ("比较", 0.8),
+    ("有点", 0.7),
+    ("稍微", 0.6),
+    ("十分", 1.5),
+    ("格外", 1.4),
+    ("异常", 1.6),
+    ("超", 1.4),
+    ("巨", 1.5),
+    ("贼", 1.3),
+];
 
 // 否定词
-static EN_NEGATORS: Lazy<Vec<&'static str>> = Lazy::new(|| {
-    vec![
-        "not", "no", "never", "none", "nobody", "nothing", 
-        "neither", "nowhere", "isn't", "wasn't", "shouldn't",
-        "wouldn't", "couldn't", "won't", "can't", "don't",
-        "doesn't", "didn't", "haven't", "hasn't", "hadn't"
-    ]
-});
+const EN_NEGATORS: &[&str] = &[
+    "not", "no", "never", "none", "nobody", "nothing", 
+    "neither", "nowhere", "isn't", "wasn't", "shouldn't",
+    "wouldn't", "couldn't", "won't", "can't", "don't",
+    "doesn't", "didn't", "haven't", "hasn't", "hadn't"
+];
 
-static ZH_NEGATORS: Lazy<Vec<&'static str>> = Lazy::new(|| {
-    vec![
-        "不", "没", "没有", "不是", "非", "无", "未", "勿",
-        "别", "莫", "毋", "不用", "不要", "不能", "不会",
-        "不可", "不得", "不必", "不该", "不应", "不许"
-    ]
-});
+const ZH_NEGATORS: &[&str] = &[
+    "不", "没", "没有", "不是", "非", "无", "未", "勿",
+    "别", "莫", "毋", "不用", "不要", "不能", "不会",
+    "不可", "不得", "不必", "不该", "不应", "不许"
+];
 
-pub struct SentimentDictionary;
+// 编译后的默认词典，进程内只构建一次，所有分析器共享
+pub static DEFAULT_LEXICON: Lazy<Arc<Lexicon>> = Lazy::new(|| Arc::new(build_default_lexicon()));
 
-impl SentimentDictionary {
-    pub fn new() -> Self {
-        Self
-    }
-    
-    pub fn get_word_sentiment(&self, word: &str) -> Option<f64> {
-        // 先检查中文词典
-        if let Some(score) = ZH_POSITIVE_WORDS.get(word).or_else(|| ZH_NEGATIVE_WORDS.get(word)) {
-            return Some(*score);
-        }
-        
-        // 再检查英文词典
-        let word_lower = word.to_lowercase();
-        EN_POSITIVE_WORDS.get(word_lower.as_str()).copied()
-            .or_else(|| EN_NEGATIVE_WORDS.get(word_lower.as_str()).copied())
+/// 把上面的词表合并成一个统一词典
+pub fn build_default_lexicon() -> Lexicon {
+    let mut builder = Lexicon::builder();
+    for (word, score) in EN_POSITIVE_WORDS.iter().chain(EN_NEGATIVE_WORDS).chain(ZH_POSITIVE_WORDS).chain(ZH_NEGATIVE_WORDS) {
+        builder = builder.polarity(word, *score);
     }
-    
-    pub fn get_intensifier(&self, word: &str) -> Option<f64> {
-        // 检查中文程度副词
-        if let Some(multiplier) = ZH_INTENSIFIERS.get(word) {
-            return Some(*multiplier);
-        }
-        
-        // 检查英文程度副词
-        EN_INTENSIFIERS.get(word.to_lowercase().as_str()).copied()
+    for (word, multiplier) in EN_INTENSIFIERS.iter().chain(ZH_INTENSIFIERS) {
+        builder = builder.intensifier(word, *multiplier);
     }
-    
-    pub fn is_negator(&self, word: &str) -> bool {
-        // 检查中文否定词
-        if ZH_NEGATORS.contains(&word) {
-            return true;
-        }
-        
-        // 检查英文否定词
-        EN_NEGATORS.contains(&word.to_lowercase().as_str())
+    for word in EN_NEGATORS.iter().chain(ZH_NEGATORS) {
+        builder = builder.negator(word);
     }
-}
\ No newline at end of file
+    builder.build()
+}
@@ -0,0 +1,106 @@
+use std::ops::Range;
+
+use crate::sentiment::tokenizer::Language;
+
+// 每扫描这么多字节检查一次结果是否已经确定
+const CHECK_INTERVAL: usize = 256;
+
+/// 检测结果；`runs` 只在要求收集时给出，此时不会提前结束
+pub struct Detection {
+    pub language: Language,
+    pub runs: Vec<ScriptRun>,
+}
+
+/// 按文字切分的连续片段：汉字段交给 jieba，其余按 Unicode 单词切分。
+/// 标点、空白和数字不单独成段，归入前面的片段，汉字段因此尽量长。
+#[derive(Debug, Clone, PartialEq)]
+pub struct ScriptRun {
+    pub range: Range<usize>,
+    pub han: bool,
+}
+
+/// 检测文本语言：汉字连续段数超过英文单词数的两倍为中文，反之为英文，否则为混合
+pub fn detect_language(text: &str) -> Language {
+    scan(text, false).language
+}
+
+pub(crate) fn is_han(c: char) -> bool {
+    ('\u{4e00}'..='\u{9fff}').contains(&c)
+}
+
+fn classify(han_runs: usize, latin_runs: usize) -> Language {
+    if han_runs > latin_runs * 2 {
+        Language::Chinese
+    } else if latin_runs > han_runs * 2 {
+        Language::English
+    } else {
+        Language::Mixed
+    }
+}
+
+/// 剩余 `remaining` 字节无论是什么内容都改变不了结论时返回该结论。
+/// 每个新汉字段至少 3 个字节，每个新英文单词至少占 1 个字母加 1 个分隔符。
+fn settled(han_runs: usize, latin_runs: usize, remaining: usize) -> Option<Language> {
+    let max_han = han_runs + remaining / 3;
+    let max_latin = latin_runs + (remaining + 1) / 2;
+    if han_runs > max_latin * 2 {
+        Some(Language::Chinese)
+    } else if latin_runs > max_han * 2 {
+        Some(Language::English)
+    } else {
+        None
+    }
+}
+
+/// 一次按字节/码点扫描统计汉字段和英文单词数（与 `[一-鿿]+`、`[a-zA-Z]+`
+/// 的匹配次数相同），同时按文字切分片段，供分词直接使用。
+/// 不收集片段时，结论确定后提前结束。
+pub fn scan(text: &str, collect_runs: bool) -> Detection {
+    let bytes = text.as_bytes();
+    let mut han_runs = 0;
+    let mut latin_runs = 0;
+    let mut in_han = false;
+    let mut in_latin = false;
+    let mut runs: Vec<ScriptRun> = Vec::new();
+    let mut next_check = CHECK_INTERVAL;
+
+    let mut i = 0;
+    while i < bytes.len() {
+        if !collect_runs && i >= next_check {
+            next_check = i + CHECK_INTERVAL;
+            if let Some(language) = settled(han_runs, latin_runs, bytes.len() - i) {
+                return Detection { language, runs };
+            }
+        }
+
+        let byte = bytes[i];
+        let (han, latin, letter, width) = if byte < 0x80 {
+            let latin = byte.is_ascii_alphabetic();
+            (false, latin, latin, 1)
+        } else {
+            let c = text[i..].chars().next().unwrap();
+            let han = is_han(c);
+            (han, false, !han && c.is_alphabetic(), c.len_utf8())
+        };
+
+        if han && !in_han {
+            han_runs += 1;
+        }
+        if latin && !in_latin {
+            latin_runs += 1;
+        }
+        in_han = han;
+        in_latin = latin;
+
+        if collect_runs {
+            match runs.last_mut() {
+                // 文字类别变化时开始新片段，其余字符并入当前片段
+                Some(run) if !(han && !run.han) && !(letter && run.han) => run.range.end = i + width,
+                _ => runs.push(ScriptRun { range: i..i + width, han }),
+            }
+        }
+        i += width;
+    }
+
+    Detection { language: classify(han_runs, latin_runs), runs }
+}
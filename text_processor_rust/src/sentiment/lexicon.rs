@@ -0,0 +1,427 @@
+use memmap2::Mmap;
+use serde::Deserialize;
+use std::collections::{BTreeMap, HashMap};
+use std::fmt;
+use std::fs::File;
+use std::io;
+use std::ops::Deref;
+use std::path::Path;
+
+use crate::interner::{fx_hash, lowercase_is_identity};
+
+/// 一个词在词典中的全部属性：一次查找同时得到情感极性、程度副词权重和否定词标记
+#[derive(Debug, Clone, Copy, Default, PartialEq)]
+pub struct LexiconEntry {
+    pub polarity: Option<f64>,
+    pub intensifier: Option<f64>,
+    pub negator: bool,
+}
+
+impl LexiconEntry {
+    pub const EMPTY: LexiconEntry = LexiconEntry { polarity: None, intensifier: None, negator: false };
+}
+
+#[derive(Debug)]
+pub enum LexiconError {
+    Io(io::Error),
+    Format(String),
+}
+
+impl fmt::Display for LexiconError {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        match self {
+            LexiconError::Io(error) => write!(f, "{}", error),
+            LexiconError::Format(message) => write!(f, "invalid lexicon: {}", message),
+        }
+    }
+}
+
+impl From<io::Error> for LexiconError {
+    fn from(error: io::Error) -> Self {
+        LexiconError::Io(error)
+    }
+}
+
+fn format_error(message: impl Into<String>) -> LexiconError {
+    LexiconError::Format(message.into())
+}
+
+// 二进制格式 "TPLX"（小端）：
+//   头部 24 字节：magic, version, 词条数 n, 哈希表槽数, 字符串区长度, 保留
+//   哈希表：槽数 × u32（词条下标加一，0为空槽，线性探测，起始槽取Fx哈希高位）
+//   词键：n × (u32 起点, u32 长度)，按词排序
+//   哈希：n × u64
+//   属性：n × 24 字节（polarity f64, intensifier f64, 标志 u32, 填充 u32）
+//   字符串区：所有词按顺序首尾相接（UTF-8）
+// 哈希函数是格式的一部分，修改时必须提升版本号。
+const MAGIC: &[u8; 4] = b"TPLX";
+const VERSION: u32 = 1;
+const HEADER_LEN: usize = 24;
+const VALUE_LEN: usize = 24;
+const HAS_POLARITY: u32 = 1;
+const HAS_INTENSIFIER: u32 = 2;
+const IS_NEGATOR: u32 = 4;
+
+enum LexiconBytes {
+    Owned(Vec<u8>),
+    Mapped(Mmap),
+}
+
+impl Deref for LexiconBytes {
+    type Target = [u8];
+
+    fn deref(&self) -> &[u8] {
+        match self {
+            LexiconBytes::Owned(bytes) => bytes,
+            LexiconBytes::Mapped(map) => map,
+        }
+    }
+}
+
+/// 预编译的统一情感词典。
+///
+/// 词典始终以二进制格式存放，查找直接读取这段字节：既可以是内存中构建的，
+/// 也可以是 mmap 的编译文件。多个 worker 映射同一文件时共享页缓存中的同一份内存。
+/// 查找哈希借用的切片，不分配内存。
+pub struct Lexicon {
+    bytes: LexiconBytes,
+    len: usize,
+    capacity: usize,
+    keys_at: usize,
+    hashes_at: usize,
+    values_at: usize,
+    arena_at: usize,
+}
+
+impl fmt::Debug for Lexicon {
+    fn fmt(&self, f: &mut fmt::Formatter<'_>) -> fmt::Result {
+        f.debug_struct("Lexicon").field("len", &self.len).field("bytes", &self.bytes.len()).finish()
+    }
+}
+
+impl Lexicon {
+    pub fn builder() -> LexiconBuilder {
+        LexiconBuilder::default()
+    }
+
+    /// 按扩展名读取词典：`.tsv`、`.json`，其余按编译后的二进制文件 mmap
+    pub fn open(path: &Path) -> Result<Lexicon, LexiconError> {
+        match path.extension().and_then(|ext| ext.to_str()) {
+            Some("tsv") | Some("txt") => Ok(LexiconBuilder::from_tsv(&std::fs::read_to_string(path)?)?.build()),
+            Some("json") => Ok(LexiconBuilder::from_json(&std::fs::read_to_string(path)?)?.build()),
+            _ => Lexicon::open_compiled(path),
+        }
+    }
+
+    /// mmap 一个编译后的词典文件
+    pub fn open_compiled(path: &Path) -> Result<Lexicon, LexiconError> {
+        let file = File::open(path)?;
+        // Safety: 编译后的词典文件只整体替换（写临时文件再重命名），不会原地修改
+        let map = unsafe { Mmap::map(&file)? };
+        Lexicon::from_storage(LexiconBytes::Mapped(map))
+    }
+
+    pub fn from_bytes(bytes: Vec<u8>) -> Result<Lexicon, LexiconError> {
+        Lexicon::from_storage(LexiconBytes::Owned(bytes))
+    }
+
+    fn from_storage(bytes: LexiconBytes) -> Result<Lexicon, LexiconError> {
+        if bytes.len() < HEADER_LEN || &bytes[..4] != MAGIC {
+            return Err(format_error("not a compiled lexicon (bad magic)"));
+        }
+        let version = read_u32(&bytes, 4);
+        if version != VERSION {
+            return Err(format_error(format!("unsupported version {}", version)));
+        }
+        let len = read_u32(&bytes, 8) as usize;
+        let capacity = read_u32(&bytes, 12) as usize;
+        let arena_len = read_u32(&bytes, 16) as usize;
+        if !capacity.is_power_of_two() || capacity < len * 2 {
+            return Err(format_error("bad table size"));
+        }
+        let keys_at = HEADER_LEN + capacity * 4;
+        let hashes_at = keys_at + len * 8;
+        let values_at = hashes_at + len * 8;
+        let arena_at = values_at + len * VALUE_LEN;
+        if bytes.len() != arena_at + arena_len {
+            return Err(format_error("truncated or oversized file"));
+        }
+        let lexicon = Lexicon { bytes, len, capacity, keys_at, hashes_at, values_at, arena_at };
+        lexicon.validate()?;
+        Ok(lexicon)
+    }
+
+    /// 一次性检查所有下标和字符串，之后的查找无需再校验
+    fn validate(&self) -> Result<(), LexiconError> {
+        let arena = &self.bytes[self.arena_at..];
+        std::str::from_utf8(arena).map_err(|_| format_error("words are not valid UTF-8"))?;
+        // 槽数是否为2的幂已在 from_storage 中检查。
+        // 每个词条恰好占一个槽，且至少留一个空槽，否则未命中的探测不会结束
+        let mut seen = vec![false; self.len];
+        let mut empty_slots = 0;
+        for slot in 0..self.capacity {
+            match read_u32(&self.bytes, HEADER_LEN + slot * 4) as usize {
+                0 => empty_slots += 1,
+                index if index > self.len => return Err(format_error("table slot out of range")),
+                index if seen[index - 1] => return Err(format_error("duplicate table slot")),
+                index => seen[index - 1] = true,
+            }
+        }
+        if empty_slots == 0 {
+            return Err(format_error("hash table has no empty slot"));
+        }
+        for index in 0..self.len {
+            let (start, len) = self.key_range(index);
+            if start + len > arena.len() || !self.is_char_boundary(start) || !self.is_char_boundary(start + len) {
+                return Err(format_error("word out of range"));
+            }
+        }
+        Ok(())
+    }
+
+    fn is_char_boundary(&self, offset: usize) -> bool {
+        let arena = &self.bytes[self.arena_at..];
+        offset == arena.len() || (offset < arena.len() && (arena[offset] as i8) >= -0x40)
+    }
+
+    /// 词典的二进制表示，可直接写入文件
+    pub fn as_bytes(&self) -> &[u8] {
+        &self.bytes
+    }
+
+    /// 写入编译文件：先写临时文件再重命名，正在映射旧文件的进程不受影响
+    pub fn write_to(&self, path: &Path) -> Result<(), LexiconError> {
+        let tmp = path.with_extension("tplx.tmp");
+        std::fs::write(&tmp, self.as_bytes())?;
+        std::fs::rename(&tmp, path)?;
+        Ok(())
+    }
+
+    /// 词条数
+    pub fn len(&self) -> usize {
+        self.len
+    }
+
+    pub fn is_empty(&self) -> bool {
+        self.len == 0
+    }
+
+    /// 查找一个词；未命中时按小写形式再查一次（词条均为小写）
+    pub fn lookup(&self, word: &str) -> LexiconEntry {
+        if let Some(entry) = self.probe(word) {
+            return entry;
+        }
+        if word.is_ascii() {
+            if !word.bytes().any(|b| b.is_ascii_uppercase()) {
+                return LexiconEntry::EMPTY;
+            }
+            // 短的英文词在栈上转小写
+            let mut buffer = [0u8; 64];
+            if word.len() <= buffer.len() {
+                let lower = &mut buffer[..word.len()];
+                lower.copy_from_slice(word.as_bytes());
+                lower.make_ascii_lowercase();
+                let lower = std::str::from_utf8(lower).expect("ASCII is valid UTF-8");
+                return self.probe(lower).unwrap_or_default();
+            }
+        } else if word.chars().all(lowercase_is_identity) {
+            return LexiconEntry::EMPTY;
+        }
+        self.probe(&word.to_lowercase()).unwrap_or_default()
+    }
+
+    /// 词条及其属性，按词排序
+    pub fn iter(&self) -> impl Iterator<Item = (&str, LexiconEntry)> + '_ {
+        (0..self.len).map(move |index| (self.key(index), self.entry(index)))
+    }
+
+    fn key_range(&self, index: usize) -> (usize, usize) {
+        let at = self.keys_at + index * 8;
+        (read_u32(&self.bytes, at) as usize, read_u32(&self.bytes, at + 4) as usize)
+    }
+
+    fn key(&self, index: usize) -> &str {
+        let (start, len) = self.key_range(index);
+        let bytes = &self.bytes[self.arena_at + start..self.arena_at + start + len];
+        // Safety: validate() 已检查字符串区是合法 UTF-8 且每个词落在字符边界上
+        unsafe { std::str::from_utf8_unchecked(bytes) }
+    }
+
+    fn entry(&self, index: usize) -> LexiconEntry {
+        let at = self.values_at + index * VALUE_LEN;
+        let flags = read_u32(&self.bytes, at + 16);
+        LexiconEntry {
+            polarity: (flags & HAS_POLARITY != 0).then(|| read_f64(&self.bytes, at)),
+            intensifier: (flags & HAS_INTENSIFIER != 0).then(|| read_f64(&self.bytes, at + 8)),
+            negator: flags & IS_NEGATOR != 0,
+        }
+    }
+
+    fn probe(&self, word: &str) -> Option<LexiconEntry> {
+        if self.len == 0 {
+            return None;
+        }
+        let hash = fx_hash(word.as_bytes());
+        let mask = self.capacity - 1;
+        let mut slot = home_slot(hash, self.capacity);
+        // validate() 保证有空槽；探测次数仍以槽数为上限，坏文件也不会让查找卡住
+        for _ in 0..self.capacity {
+            let index = read_u32(&self.bytes, HEADER_LEN + slot * 4) as usize;
+            if index == 0 {
+                return None;
+            }
+            let index = index - 1;
+            if read_u64(&self.bytes, self.hashes_at + index * 8) == hash && self.key(index) == word {
+                return Some(self.entry(index));
+            }
+            slot = (slot + 1) & mask;
+        }
+        None
+    }
+}
+
+fn read_u32(bytes: &[u8], at: usize) -> u32 {
+    u32::from_le_bytes(bytes[at..at + 4].try_into().unwrap())
+}
+
+fn read_u64(bytes: &[u8], at: usize) -> u64 {
+    u64::from_le_bytes(bytes[at..at + 8].try_into().unwrap())
+}
+
+fn read_f64(bytes: &[u8], at: usize) -> f64 {
+    f64::from_le_bytes(bytes[at..at + 8].try_into().unwrap())
+}
+
+/// 表长为2的幂，取哈希的高位作为起始槽位
+fn home_slot(hash: u64, capacity: usize) -> usize {
+    (hash >> (64 - capacity.trailing_zeros())) as usize
+}
+
+#[derive(Default, Deserialize)]
+#[serde(default, deny_unknown_fields)]
+struct JsonLexicon {
+    polarity: HashMap<String, f64>,
+    intensifiers: HashMap<String, f64>,
+    negators: Vec<String>,
+}
+
+/// 词典构建器：同一个词的多种属性合并为一个词条，词统一转为小写
+#[derive(Debug, Default)]
+pub struct LexiconBuilder {
+    entries: BTreeMap<String, LexiconEntry>,
+}
+
+impl LexiconBuilder {
+    pub fn polarity(mut self, word: &str, score: f64) -> Self {
+        self.entries.entry(word.to_lowercase()).or_default().polarity = Some(score);
+        self
+    }
+
+    pub fn intensifier(mut self, word: &str, multiplier: f64) -> Self {
+        self.entries.entry(word.to_lowercase()).or_default().intensifier = Some(multiplier);
+        self
+    }
+
+    pub fn negator(mut self, word: &str) -> Self {
+        self.entries.entry(word.to_lowercase()).or_default().negator = true;
+        self
+    }
+
+    /// 每行 `词<TAB>分数`，或 `词<TAB>polarity|intensifier|negator<TAB>值`；
+    /// 空行和 `#` 开头的行被忽略
+    pub fn from_tsv(source: &str) -> Result<Self, LexiconError> {
+        let mut builder = LexiconBuilder::default();
+        for (number, line) in source.lines().enumerate() {
+            let line = line.trim_end_matches('\r');
+            if line.trim().is_empty() || line.starts_with('#') {
+                continue;
+            }
+            let fields: Vec<&str> = line.split('\t').collect();
+            let value = |text: &str| {
+                text.trim()
+                    .parse::<f64>()
+                    .map_err(|_| format_error(format!("line {}: bad number {:?}", number + 1, text)))
+            };
+            builder = match fields.as_slice() {
+                [word, "negator"] | [word, "negator", _] => builder.negator(word.trim()),
+                [word, "polarity", score] => builder.polarity(word.trim(), value(score)?),
+                [word, "intensifier", multiplier] => builder.intensifier(word.trim(), value(multiplier)?),
+                [word, score] => builder.polarity(word.trim(), value(score)?),
+                _ => return Err(format_error(format!("line {}: expected word and score", number + 1))),
+            };
+        }
+        Ok(builder)
+    }
+
+    /// `{"polarity": {词: 分数}, "intensifiers": {词: 权重}, "negators": [词]}`
+    pub fn from_json(source: &str) -> Result<Self, LexiconError> {
+        let parsed: JsonLexicon = serde_json::from_str(source).map_err(|error| format_error(error.to_string()))?;
+        let mut builder = LexiconBuilder::default();
+        for (word, score) in &parsed.polarity {
+            builder = builder.polarity(word, *score);
+        }
+        for (word, multiplier) in &parsed.intensifiers {
+            builder = builder.intensifier(word, *multiplier);
+        }
+        for word in &parsed.negators {
+            builder = builder.negator(word);
+        }
+        Ok(builder)
+    }
+
+    pub fn build(self) -> Lexicon {
+        let len = self.entries.len();
+        let capacity = (len * 2).next_power_of_two().max(8);
+        let arena_len: usize = self.entries.keys().map(String::len).sum();
+        let keys_at = HEADER_LEN + capacity * 4;
+        let hashes_at = keys_at + len * 8;
+        let values_at = hashes_at + len * 8;
+        let arena_at = values_at + len * VALUE_LEN;
+
+        let mut bytes = vec![0u8; arena_at + arena_len];
+        bytes[..4].copy_from_slice(MAGIC);
+        bytes[4..8].copy_from_slice(&VERSION.to_le_bytes());
+        bytes[8..12].copy_from_slice(&(len as u32).to_le_bytes());
+        bytes[12..16].copy_from_slice(&(capacity as u32).to_le_bytes());
+        bytes[16..20].copy_from_slice(&(arena_len as u32).to_le_bytes());
+
+        let mask = capacity - 1;
+        let mut offset = 0;
+        for (index, (word, entry)) in self.entries.iter().enumerate() {
+            let hash = fx_hash(word.as_bytes());
+            let mut slot = home_slot(hash, capacity);
+            while read_u32(&bytes, HEADER_LEN + slot * 4) != 0 {
+                slot = (slot + 1) & mask;
+            }
+            let at = HEADER_LEN + slot * 4;
+            bytes[at..at + 4].copy_from_slice(&(index as u32 + 1).to_le_bytes());
+
+            let at = keys_at + index * 8;
+            bytes[at..at + 4].copy_from_slice(&(offset as u32).to_le_bytes());
+            bytes[at + 4..at + 8].copy_from_slice(&(word.len() as u32).to_le_bytes());
+            let at = hashes_at + index * 8;
+            bytes[at..at + 8].copy_from_slice(&hash.to_le_bytes());
+
+            let at = values_at + index * VALUE_LEN;
+            let mut flags = 0;
+            if let Some(polarity) = entry.polarity {
+                bytes[at..at + 8].copy_from_slice(&polarity.to_le_bytes());
+                flags |= HAS_POLARITY;
+            }
+            if let Some(intensifier) = entry.intensifier {
+                bytes[at + 8..at + 16].copy_from_slice(&intensifier.to_le_bytes());
+                flags |= HAS_INTENSIFIER;
+            }
+            if entry.negator {
+                flags |= IS_NEGATOR;
+            }
+            bytes[at + 16..at + 20].copy_from_slice(&flags.to_le_bytes());
+
+            let at = arena_at + offset;
+            bytes[at..at + word.len()].copy_from_slice(word.as_bytes());
+            offset += word.len();
+        }
+
+        Lexicon::from_bytes(bytes).expect("builder output is a valid lexicon")
+    }
+}
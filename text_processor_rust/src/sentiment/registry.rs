@@ -0,0 +1,49 @@
+use once_cell::sync::Lazy;
+use std::collections::HashMap;
+use std::sync::{Arc, PoisonError, RwLock};
+
+use crate::sentiment::{dictionary::DEFAULT_LEXICON, lexicon::Lexicon};
+
+/// 未指定词典时使用的名称；启动时指向内置词典，可以被替换
+pub const DEFAULT_NAME: &str = "default";
+
+// 按名称注册的词典。写锁只在替换指针时持有，正在进行的分析持有旧词典的 Arc，
+// 不会被阻塞，旧词典在最后一个请求结束后释放
+static LEXICONS: Lazy<RwLock<HashMap<String, Arc<Lexicon>>>> = Lazy::new(|| {
+    let mut lexicons = HashMap::new();
+    lexicons.insert(DEFAULT_NAME.to_string(), Arc::clone(&DEFAULT_LEXICON));
+    RwLock::new(lexicons)
+});
+
+pub fn get(name: &str) -> Option<Arc<Lexicon>> {
+    LEXICONS.read().unwrap_or_else(PoisonError::into_inner).get(name).cloned()
+}
+
+pub fn default_lexicon() -> Arc<Lexicon> {
+    get(DEFAULT_NAME).unwrap_or_else(|| Arc::clone(&DEFAULT_LEXICON))
+}
+
+/// 注册或原子替换一个词典，返回被替换的旧词典
+pub fn install(name: &str, lexicon: Lexicon) -> Option<Arc<Lexicon>> {
+    let lexicon = Arc::new(lexicon);
+    LEXICONS
+        .write()
+        .unwrap_or_else(PoisonError::into_inner)
+        .insert(name.to_string(), lexicon)
+}
+
+/// 移除一个词典；默认词典不能移除，只能替换
+pub fn remove(name: &str) -> Result<bool, String> {
+    if name == DEFAULT_NAME {
+        return Err("the default lexicon cannot be removed".to_string());
+    }
+    Ok(LEXICONS.write().unwrap_or_else(PoisonError::into_inner).remove(name).is_some())
+}
+
+/// 已注册的词典名称及词条数，按名称排序
+pub fn list() -> Vec<(String, usize)> {
+    let lexicons = LEXICONS.read().unwrap_or_else(PoisonError::into_inner);
+    let mut entries: Vec<(String, usize)> = lexicons.iter().map(|(name, lexicon)| (name.clone(), lexicon.len())).collect();
+    entries.sort();
+    entries
+}
@@ -1,80 +1,125 @@
-use crate::sentiment::{dictionary::SentimentDictionary, tokenizer::Language};
+use crate::sentiment::{
+    lexicon::{Lexicon, LexiconEntry},
+    tokenizer::{Language, Token},
+};
+use rayon::prelude::*;
 
-pub struct RuleProcessor {
-    dictionary: SentimentDictionary,
-}
+// 短文本逐词并行的调度开销远大于打分本身，只有长文档才按段并行
+const PARALLEL_MIN_TOKENS: usize = 32 * 1024;
+const SEGMENT_TOKENS: usize = 8 * 1024;
+
+pub struct RuleProcessor;
 
 impl RuleProcessor {
     pub fn new() -> Self {
-        Self {
-            dictionary: SentimentDictionary::new(),
+        Self
+    }
+    
+    /// 每个词只查一次词典，窗口扫描直接复用查找结果
+    /// 词典查找直接用原文切片，大小写由词典处理
+    pub fn lookup_all(&self, lexicon: &Lexicon, text: &str, tokens: &[Token]) -> Vec<LexiconEntry> {
+        let lookup = |token: &Token| lexicon.lookup(&text[token.range()]);
+        if tokens.len() < PARALLEL_MIN_TOKENS {
+            tokens.iter().map(lookup).collect()
+        } else {
+            tokens.par_iter().with_min_len(SEGMENT_TOKENS).map(lookup).collect()
         }
     }
     
-    pub fn process_context(&self, words: &[String], index: usize, language: &Language) -> f64 {
-        let current_word = &words[index];
-        let mut sentiment = self.dictionary.get_word_sentiment(current_word).unwrap_or(0.0);
-        
+    /// 逐词情感分数，与 `tokens` 一一对应
+    ///
+    /// 否定词个数和程度副词在滑动窗口中增量维护，整体线性时间；
+    /// 长文本按段并行，每段先用前面的窗口补齐状态，结果与顺序计算完全一致
+    pub fn score_all(&self, text: &str, tokens: &[Token], entries: &[LexiconEntry], language: &Language) -> Vec<f64> {
+        let mut scores = vec![0.0; tokens.len()];
+        if tokens.len() < PARALLEL_MIN_TOKENS {
+            self.score_range(text, tokens, entries, language, 0, &mut scores);
+        } else {
+            scores
+                .par_chunks_mut(SEGMENT_TOKENS)
+                .enumerate()
+                .for_each(|(segment, out)| {
+                    self.score_range(text, tokens, entries, language, segment * SEGMENT_TOKENS, out)
+                });
+        }
+        scores
+    }
+    
+    /// 为 `start..start + out.len()` 的词打分
+    fn score_range(&self, text: &str, tokens: &[Token], entries: &[LexiconEntry], language: &Language, start: usize, out: &mut [f64]) {
         // 根据语言选择不同的处理窗口大小
         let negation_window = match language {
             Language::Chinese => 2,  // 中文否定词通常更靠近被修饰词
             Language::English => 3,  // 英文可能有更复杂的语法结构
             Language::Mixed => 3,
         };
+        let chinese = matches!(language, Language::Chinese | Language::Mixed);
+        // 中文否定通常更直接
+        let negation_factor = match language {
+            Language::Chinese => -0.9,
+            _ => -0.8,
+        };
         
-        let start = if index >= negation_window { index - negation_window } else { 0 };
-        
-        let mut negation_count = 0;
-        let mut intensifier_multiplier = 1.0;
+        // 窗口 entries[index - negation_window..index] 内的否定词和程度副词个数
+        let mut negation_count = 0usize;
+        let mut intensifier_count = 0usize;
+        for entry in &entries[start.saturating_sub(negation_window)..start] {
+            negation_count += entry.negator as usize;
+            intensifier_count += entry.intensifier.is_some() as usize;
+        }
         
-        // 向前扫描否定词和程度副词
-        for i in start..index {
-            let word = &words[i];
+        for (offset, score) in out.iter_mut().enumerate() {
+            let index = start + offset;
+            let window_start = index.saturating_sub(negation_window);
+            let mut sentiment = entries[index].polarity.unwrap_or(0.0);
+            
+            // 窗口最多三个词，按原顺序连乘，保证浮点结果不变
+            let intensifier_multiplier = if intensifier_count == 0 {
+                1.0
+            } else {
+                entries[window_start..index]
+                    .iter()
+                    .filter_map(|entry| entry.intensifier)
+                    .fold(1.0, |product, multiplier| product * multiplier)
+            };
             
-            // 检查否定词
-            if self.dictionary.is_negator(word) {
-                negation_count += 1;
+            // 中文特殊处理：检查相邻词汇的组合
+            if chinese {
+                sentiment = self.handle_chinese_patterns(text, tokens, entries, index, sentiment);
             }
             
-            // 检查程度副词
-            if let Some(multiplier) = self.dictionary.get_intensifier(word) {
-                intensifier_multiplier *= multiplier;
+            // 应用程度副词
+            sentiment *= intensifier_multiplier;
+            
+            // 应用否定规则
+            if negation_count % 2 == 1 {
+                sentiment *= negation_factor;
+            }
+            *score = sentiment;
+            
+            // 窗口右移一个词
+            negation_count += entries[index].negator as usize;
+            intensifier_count += entries[index].intensifier.is_some() as usize;
+            if index >= negation_window {
+                let leaving = &entries[index - negation_window];
+                negation_count -= leaving.negator as usize;
+                intensifier_count -= leaving.intensifier.is_some() as usize;
             }
         }
-        
-        // 中文特殊处理：检查相邻词汇的组合
-        if matches!(language, Language::Chinese | Language::Mixed) {
-            sentiment = self.handle_chinese_patterns(words, index, sentiment);
-        }
-        
-        // 应用程度副词
-        sentiment *= intensifier_multiplier;
-        
-        // 应用否定规则
-        if negation_count % 2 == 1 {
-            // 中文否定通常更直接
-            let negation_factor = match language {
-                Language::Chinese => -0.9,
-                _ => -0.8,
-            };
-            sentiment *= negation_factor;
-        }
-        
-        sentiment
     }
     
-    fn handle_chinese_patterns(&self, words: &[String], index: usize, mut sentiment: f64) -> f64 {
+    fn handle_chinese_patterns(&self, text: &str, tokens: &[Token], entries: &[LexiconEntry], index: usize, mut sentiment: f64) -> f64 {
         // 处理中文特殊语法模式
         if index > 0 {
-            let prev_word = &words[index - 1];
-            let current_word = &words[index];
+            let prev_word = &text[tokens[index - 1].range()];
+            let current_word = &text[tokens[index].range()];
             
             // 处理常见的中文情感模式
-            match (prev_word.as_str(), current_word.as_str()) {
+            match (prev_word, current_word) {
                 ("不", "好") => sentiment = -0.5,      // "不好"
                 ("不", "错") => sentiment = 0.4,       // "不错" (实际是积极的)
                 ("没", "用") => sentiment = -0.6,      // "没用"
-                ("很", word) if self.dictionary.get_word_sentiment(word).is_some() => {
+                ("很", _) if entries[index].polarity.is_some() => {
                     // "很"字修饰情感词
                     sentiment *= 1.3;
                 }
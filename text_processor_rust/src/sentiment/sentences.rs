@@ -0,0 +1,56 @@
+use std::ops::Range;
+
+/// 句末标点：中文句号、叹号、问号、省略号，以及英文的 `.`、`!`、`?`
+fn is_terminator(c: char) -> bool {
+    matches!(c, '。' | '！' | '？' | '…' | '!' | '?' | '.')
+}
+
+/// 句末标点之后仍属于本句的右引号和右括号
+fn is_closer(c: char) -> bool {
+    matches!(c, '"' | '\'' | '”' | '’' | '」' | '』' | '）' | ')' | '】')
+}
+
+/// 按中英文句子边界切分，返回去掉首尾空白后的非空句子的字节区间。
+///
+/// 中文句末标点总是断句；英文 `.` 只有后面是空白、文本末尾或非 ASCII 字符时
+/// 才断句，避免拆开 "3.14" 这样的数字。换行也结束一句。线性时间。
+pub fn split_sentences(text: &str) -> Vec<Range<usize>> {
+    let mut sentences = Vec::new();
+    let mut start = 0;
+    let mut chars = text.char_indices().peekable();
+    while let Some((i, c)) = chars.next() {
+        let end = if c == '\n' || c == '\r' {
+            Some(i)
+        } else if is_terminator(c) {
+            // 连续的句末标点和右引号都并入本句
+            let mut end = i + c.len_utf8();
+            while let Some(&(j, next)) = chars.peek() {
+                if !is_terminator(next) && !is_closer(next) {
+                    break;
+                }
+                end = j + next.len_utf8();
+                chars.next();
+            }
+            let boundary = c != '.'
+                || chars.peek().map_or(true, |&(_, next)| next.is_whitespace() || !next.is_ascii());
+            boundary.then_some(end)
+        } else {
+            None
+        };
+        if let Some(end) = end {
+            push_trimmed(text, start..end, &mut sentences);
+            start = end;
+        }
+    }
+    push_trimmed(text, start..text.len(), &mut sentences);
+    sentences
+}
+
+fn push_trimmed(text: &str, range: Range<usize>, sentences: &mut Vec<Range<usize>>) {
+    let sentence = &text[range.clone()];
+    let trimmed = sentence.trim();
+    if !trimmed.is_empty() {
+        let start = range.start + (sentence.len() - sentence.trim_start().len());
+        sentences.push(start..start + trimmed.len());
+    }
+}
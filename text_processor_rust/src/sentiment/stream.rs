@@ -0,0 +1,159 @@
+use std::collections::VecDeque;
+use std::sync::Arc;
+
+use crate::sentiment::{
+    SentimentResult,
+    analyzer::SentimentAnalyzer,
+    lexicon::Lexicon,
+    tokenizer::Language,
+};
+
+/// 滚动窗口或累计的汇总结果
+#[derive(Debug, Clone)]
+pub struct StreamSummary {
+    pub score: f64,
+    pub label: String,
+    pub confidence: f64,
+    pub word_count: usize,
+    pub fragments: usize,
+}
+
+/// 一个片段在窗口中只保留分数、词数和语言
+#[derive(Debug, Clone, Copy)]
+struct FragmentScore {
+    weighted: f64,
+    word_count: usize,
+    language: Option<u8>,
+}
+
+/// 窗口或累计的运行总和，加入和移出都是 O(1)
+#[derive(Debug, Clone, Default)]
+struct Totals {
+    weighted: f64,
+    word_count: usize,
+    fragments: usize,
+    // 含词片段按语言计数，下标为 `language_index`
+    languages: [usize; 3],
+}
+
+impl Totals {
+    fn add(&mut self, fragment: &FragmentScore) {
+        self.weighted += fragment.weighted;
+        self.word_count += fragment.word_count;
+        self.fragments += 1;
+        if let Some(index) = fragment.language {
+            self.languages[index as usize] += 1;
+        }
+    }
+
+    fn remove(&mut self, fragment: &FragmentScore) {
+        self.weighted -= fragment.weighted;
+        self.word_count -= fragment.word_count;
+        self.fragments -= 1;
+        if let Some(index) = fragment.language {
+            self.languages[index as usize] -= 1;
+        }
+    }
+
+    /// 所有含词片段语言相同时用该语言的阈值，否则按混合语言
+    fn language(&self) -> Language {
+        match self.languages {
+            [_, 0, 0] => Language::English,
+            [0, _, 0] => Language::Chinese,
+            _ => Language::Mixed,
+        }
+    }
+}
+
+fn language_index(language: &str) -> u8 {
+    match language {
+        "en" => 0,
+        "zh" => 1,
+        _ => 2,
+    }
+}
+
+/// 流式情感分析：每个片段（如一条聊天消息）单独打分，
+/// 滚动窗口保留最近 `window` 个片段，累计值覆盖流开始以来的全部片段。
+///
+/// 汇总分数与逐句模式相同，是各片段分数按词数加权的平均值。
+/// 每次 `feed` 只处理新片段本身，窗口更新为 O(1)；
+/// 每个流只保存 `window` 个片段的分数，不保存文本。
+pub struct SentimentStream {
+    lexicon: Arc<Lexicon>,
+    window: usize,
+    recent: VecDeque<FragmentScore>,
+    rolling: Totals,
+    cumulative: Totals,
+    // 移出的片段数，每满一个窗口重新求和一次，避免浮点减法误差累积
+    evicted: usize,
+}
+
+impl SentimentStream {
+    pub fn new(lexicon: Arc<Lexicon>, window: usize) -> Self {
+        Self {
+            lexicon,
+            window: window.max(1),
+            recent: VecDeque::with_capacity(window.max(1)),
+            rolling: Totals::default(),
+            cumulative: Totals::default(),
+            evicted: 0,
+        }
+    }
+
+    /// 为一个片段打分并更新滚动窗口和累计值
+    pub fn feed(&mut self, analyzer: &SentimentAnalyzer, fragment: &str) -> SentimentResult {
+        let result = analyzer.analyze_with(fragment, &self.lexicon);
+        let score = FragmentScore {
+            weighted: result.score * result.word_count as f64,
+            word_count: result.word_count,
+            language: (result.word_count > 0).then(|| language_index(&result.language)),
+        };
+
+        if self.recent.len() == self.window {
+            let oldest = self.recent.pop_front().expect("window is full");
+            self.rolling.remove(&oldest);
+            self.evicted += 1;
+        }
+        self.recent.push_back(score);
+        self.rolling.add(&score);
+        self.cumulative.add(&score);
+
+        if self.evicted >= self.window {
+            self.evicted = 0;
+            self.rolling.weighted = self.recent.iter().map(|fragment| fragment.weighted).sum();
+        }
+        result
+    }
+
+    pub fn rolling(&self, analyzer: &SentimentAnalyzer) -> StreamSummary {
+        Self::summarize(analyzer, &self.rolling)
+    }
+
+    pub fn cumulative(&self, analyzer: &SentimentAnalyzer) -> StreamSummary {
+        Self::summarize(analyzer, &self.cumulative)
+    }
+
+    pub fn reset(&mut self) {
+        self.recent.clear();
+        self.rolling = Totals::default();
+        self.cumulative = Totals::default();
+        self.evicted = 0;
+    }
+
+    fn summarize(analyzer: &SentimentAnalyzer, totals: &Totals) -> StreamSummary {
+        let score = if totals.word_count == 0 {
+            0.0
+        } else {
+            totals.weighted / totals.word_count as f64
+        };
+        let (label, confidence) = analyzer.classify_sentiment(score, &totals.language());
+        StreamSummary {
+            score,
+            label,
+            confidence,
+            word_count: totals.word_count,
+            fragments: totals.fragments,
+        }
+    }
+}
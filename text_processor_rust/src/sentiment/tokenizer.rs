@@ -1,10 +1,45 @@
 use jieba_rs::Jieba;
-use once_cell::sync::Lazy;
-use regex::Regex;
+use once_cell::sync::OnceCell;
+use std::fs::File;
+use std::io::BufReader;
+use std::ops::Range;
+use std::path::Path;
 use unicode_segmentation::UnicodeSegmentation;
 
-// 全局初始化分词器
-static JIEBA: Lazy<Jieba> = Lazy::new(|| Jieba::new());
+use crate::sentiment::language::{self, is_han};
+
+// 全局分词器，第一次分词时初始化；需要用户词典时在此之前调用 `configure_jieba`
+static JIEBA: OnceCell<Jieba> = OnceCell::new();
+
+fn jieba() -> &'static Jieba {
+    JIEBA.get_or_init(Jieba::new)
+}
+
+/// 加载 jieba 默认词典和可选的用户词典（每行 `词 [词频] [词性]`）。
+/// 只能在第一次分词之前调用一次。
+pub fn configure_jieba(user_dict: Option<&Path>) -> Result<(), String> {
+    let mut jieba = Jieba::new();
+    if let Some(path) = user_dict {
+        let file = File::open(path).map_err(|error| format!("{}: {}", path.display(), error))?;
+        jieba
+            .load_dict(&mut BufReader::new(file))
+            .map_err(|error| format!("{}: {}", path.display(), error))?;
+    }
+    JIEBA
+        .set(jieba)
+        .map_err(|_| "jieba is already initialised; configure it before the first tokenization".to_string())
+}
+
+/// 所有分词路径共用的保留规则：至少含一个字母或数字，
+/// 且长度至少两个字符；单个汉字本身可以是词，也保留
+fn keep_token(token: &str) -> bool {
+    let mut chars = token.chars();
+    match (chars.next(), chars.next()) {
+        (Some(c), None) => is_han(c),
+        (Some(_), Some(_)) => token.chars().any(char::is_alphanumeric),
+        _ => false,
+    }
+}
 
 #[derive(Debug, Clone)]
 pub enum Language {
@@ -13,77 +48,159 @@ pub enum Language {
     Mixed,
 }
 
+impl Language {
+    pub fn as_str(&self) -> &'static str {
+        match self {
+            Language::English => "en",
+            Language::Chinese => "zh",
+            Language::Mixed => "mixed",
+        }
+    }
+}
+
+/// 词的文字类别，按首字符判断
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum Script {
+    Latin,
+    Han,
+    Other,
+}
+
+impl Script {
+    /// 对外的编号，与 `Script::NAMES` 的下标一致
+    pub const NAMES: [&'static str; 3] = ["latin", "han", "other"];
+
+    pub fn code(self) -> u8 {
+        self as u8
+    }
+
+    fn of(token: &str) -> Script {
+        match token.chars().next() {
+            Some(c) if is_han(c) => Script::Han,
+            Some(c) if c.is_ascii_alphabetic() || ('\u{c0}'..='\u{24f}').contains(&c) => Script::Latin,
+            _ => Script::Other,
+        }
+    }
+}
+
+/// 原文中的一个词：字节区间加文字类别，不复制字符串
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub struct Token {
+    pub start: usize,
+    pub end: usize,
+    pub script: Script,
+}
+
+impl Token {
+    fn new(start: usize, word: &str) -> Self {
+        Self { start, end: start + word.len(), script: Script::of(word) }
+    }
+
+    pub fn range(&self) -> Range<usize> {
+        self.start..self.end
+    }
+}
+
 #[derive(Debug, Clone)]
 pub struct TokenizedText {
-    pub words: Vec<String>,
+    pub tokens: Vec<Token>,
     pub language: Language,
 }
 
-pub struct MultiLanguageTokenizer {
-    chinese_regex: Regex,
-    english_regex: Regex,
+/// 把递增的字节偏移换算成码点偏移：游标只向前移动，总共扫描原文一遍
+pub struct CharCursor<'a> {
+    bytes: &'a [u8],
+    byte: usize,
+    chars: usize,
 }
 
-impl MultiLanguageTokenizer {
-    pub fn new() -> Self {
-        Self {
-            chinese_regex: Regex::new(r"[\u4e00-\u9fff]+").unwrap(),
-            english_regex: Regex::new(r"[a-zA-Z]+").unwrap(),
-        }
+impl<'a> CharCursor<'a> {
+    pub fn new(text: &'a str) -> Self {
+        Self { bytes: text.as_bytes(), byte: 0, chars: 0 }
     }
     
-    pub fn tokenize(&self, text: &str) -> TokenizedText {
-        let language = self.detect_language(text);
-        let words = match language {
-            Language::Chinese => self.tokenize_chinese(text),
-            Language::English => self.tokenize_english(text),
-            Language::Mixed => self.tokenize_mixed(text),
-        };
-        
-        TokenizedText { words, language }
+    /// `target` 不能小于上一次的参数
+    pub fn advance_to(&mut self, target: usize) -> usize {
+        // 非续字节（不是 0b10xxxxxx）才是一个码点的开头
+        self.chars += self.bytes[self.byte..target].iter().filter(|&&b| (b as i8) >= -0x40).count();
+        self.byte = target;
+        self.chars
     }
-    
-    fn detect_language(&self, text: &str) -> Language {
-        let chinese_chars = self.chinese_regex.find_iter(text).count();
-        let english_words = self.english_regex.find_iter(text).count();
-        
-        if chinese_chars > english_words * 2 {
-            Language::Chinese
-        } else if english_words > chinese_chars * 2 {
-            Language::English
-        } else {
-            Language::Mixed
-        }
+}
+
+/// 对外偏移量的单位：UTF-8 字节，或 Python `str` 下标所用的码点
+#[derive(Debug, Clone, Copy, PartialEq, Eq)]
+pub enum OffsetUnit {
+    Byte,
+    Char,
+}
+
+impl TokenizedText {
+    /// 每个词在原文中的切片（未转小写）
+    pub fn words<'a>(&'a self, text: &'a str) -> impl Iterator<Item = &'a str> + 'a {
+        self.tokens.iter().map(move |token| &text[token.range()])
     }
     
-    fn tokenize_chinese(&self, text: &str) -> Vec<String> {
-        JIEBA.cut(text, false)
-            .into_iter()
-            .map(|s| s.trim().to_lowercase())
-            .filter(|s| !s.is_empty() && s.len() > 1)
-            .collect()
+    /// 每个词的起止偏移。词按顺序排列且互不重叠，换算成码点时只需一个游标向前数
+    pub fn offsets(&self, text: &str, unit: OffsetUnit) -> (Vec<u32>, Vec<u32>) {
+        let mut starts = Vec::with_capacity(self.tokens.len());
+        let mut ends = Vec::with_capacity(self.tokens.len());
+        let mut cursor = CharCursor::new(text);
+        let mut convert = |target: usize| match unit {
+            OffsetUnit::Byte => target as u32,
+            OffsetUnit::Char => cursor.advance_to(target) as u32,
+        };
+        for token in &self.tokens {
+            starts.push(convert(token.start));
+            ends.push(convert(token.end));
+        }
+        (starts, ends)
     }
-    
-    fn tokenize_english(&self, text: &str) -> Vec<String> {
-        text.unicode_words()
-            .map(|word| word.to_lowercase())
-            .filter(|word| word.len() > 1)
-            .collect()
+}
+
+pub struct MultiLanguageTokenizer;
+
+impl MultiLanguageTokenizer {
+    pub fn new() -> Self {
+        Self
     }
     
-    fn tokenize_mixed(&self, text: &str) -> Vec<String> {
-        let mut words = Vec::new();
-        
-        // 分别处理中英文片段
-        let parts: Vec<&str> = text.split_whitespace().collect();
-        for part in parts {
-            if self.chinese_regex.is_match(part) {
-                words.extend(self.tokenize_chinese(part));
+    pub fn tokenize(&self, text: &str) -> TokenizedText {
+        // 检测语言的同一遍扫描里按文字切分片段：汉字段整段交给 jieba，
+        // 其余片段按 Unicode 单词切分
+        let detection = language::scan(text, true);
+        let mut tokens = Vec::new();
+        for run in &detection.runs {
+            let segment = &text[run.range.clone()];
+            if run.han {
+                self.tokenize_chinese(run.range.start, segment, &mut tokens);
             } else {
-                words.extend(self.tokenize_english(part));
+                self.tokenize_other(run.range.start, segment, &mut tokens);
             }
         }
         
-        words
+        TokenizedText { tokens, language: detection.language }
+    }
+    
+    fn tokenize_chinese(&self, offset: usize, segment: &str, tokens: &mut Vec<Token>) {
+        // jieba 返回的是 segment 的子切片，由指针差得到偏移
+        let base = segment.as_ptr() as usize;
+        tokens.extend(
+            jieba()
+                .cut(segment, false)
+                .into_iter()
+                .map(str::trim)
+                .filter(|word| keep_token(word))
+                .map(|word| Token::new(offset + (word.as_ptr() as usize - base), word)),
+        );
     }
-}
\ No newline at end of file
+    
+    fn tokenize_other(&self, offset: usize, segment: &str, tokens: &mut Vec<Token>) {
+        tokens.extend(
+            segment
+                .unicode_word_indices()
+                .filter(|(_, word)| keep_token(word))
+                .map(|(start, word)| Token::new(offset + start, word)),
+        );
+    }
+}
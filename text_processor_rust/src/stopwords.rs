@@ -0,0 +1,72 @@
+use once_cell::sync::Lazy;
+use std::collections::HashSet;
+
+// 英文停用词
+static EN_STOPWORDS: Lazy<HashSet<&'static str>> = Lazy::new(|| {
+    [
+        "a", "about", "above", "after", "again", "against", "all", "am", "an", "and",
+        "any", "are", "as", "at", "be", "because", "been", "before", "being", "below",
+        "between", "both", "but", "by", "can", "could", "did", "do", "does", "doing",
+        "down", "during", "each", "few", "for", "from", "further", "had", "has", "have",
+        "having", "he", "her", "here", "hers", "herself", "him", "himself", "his", "how",
+        "i", "if", "in", "into", "is", "it", "it's", "its", "itself", "just", "me",
+        "more", "most", "my", "myself", "no", "nor", "not", "now", "of", "off", "on",
+        "once", "only", "or", "other", "our", "ours", "ourselves", "out", "over", "own",
+        "same", "she", "should", "so", "some", "such", "than", "that", "the", "their",
+        "theirs", "them", "themselves", "then", "there", "these", "they", "this", "those",
+        "through", "to", "too", "under", "until", "up", "very", "was", "we", "were",
+        "what", "when", "where", "which", "while", "who", "whom", "why", "will", "with",
+        "would", "you", "your", "yours", "yourself", "yourselves",
+    ]
+    .into_iter()
+    .collect()
+});
+
+// 中文停用词
+static ZH_STOPWORDS: Lazy<HashSet<&'static str>> = Lazy::new(|| {
+    [
+        "的", "了", "是", "在", "我", "有", "和", "就", "不", "人", "都", "一", "一个",
+        "上", "也", "很", "到", "说", "要", "去", "你", "会", "着", "没有", "看", "自己",
+        "这", "那", "他", "她", "它", "我们", "你们", "他们", "她们", "它们", "这个",
+        "那个", "之", "与", "及", "或", "而", "但", "但是", "因为", "所以", "如果", "虽然",
+        "被", "把", "给", "从", "对", "为", "以", "于", "吗", "呢", "吧", "啊", "呀",
+        "哦", "嗯", "么", "什么", "怎么", "哪", "哪里", "这里", "那里", "还", "又", "再",
+    ]
+    .into_iter()
+    .collect()
+});
+
+/// Words excluded from word counts: any of the built-in lists plus custom words
+#[derive(Debug, Default)]
+pub struct StopwordFilter {
+    english: bool,
+    chinese: bool,
+    custom: HashSet<String>,
+}
+
+impl StopwordFilter {
+    /// Build a filter from built-in list names ("en", "zh") and custom words
+    pub fn new<S: AsRef<str>>(lists: &[S], custom: &[S]) -> Result<Self, String> {
+        let mut filter = StopwordFilter::default();
+        for name in lists {
+            match name.as_ref() {
+                "en" => filter.english = true,
+                "zh" => filter.chinese = true,
+                other => return Err(format!("unknown stopword list: {}", other)),
+            }
+        }
+        // Counted words are lowercased, so custom words are too
+        filter.custom = custom.iter().map(|word| word.as_ref().to_lowercase()).collect();
+        Ok(filter)
+    }
+
+    pub fn is_empty(&self) -> bool {
+        !self.english && !self.chinese && self.custom.is_empty()
+    }
+
+    pub fn contains(&self, word: &str) -> bool {
+        (self.english && EN_STOPWORDS.contains(word))
+            || (self.chinese && ZH_STOPWORDS.contains(word))
+            || self.custom.contains(word)
+    }
+}
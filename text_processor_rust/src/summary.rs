@@ -0,0 +1,93 @@
+use std::cmp::Reverse;
+use std::collections::BinaryHeap;
+
+use serde::ser::{Serialize, SerializeMap, SerializeStruct, Serializer};
+
+use crate::interner::WordCounts;
+use crate::stopwords::StopwordFilter;
+
+/// How a full vocabulary count is reduced before it is returned
+#[derive(Debug, Default)]
+pub struct CountOptions {
+    pub top_k: Option<usize>,
+    pub min_count: usize,
+    pub stopwords: StopwordFilter,
+}
+
+/// Word counts after filtering, with totals over every non-stopword
+#[derive(Debug)]
+pub struct WordCountSummary {
+    /// Selected words; ordered by descending count (then word) when `top_k` is set
+    pub words: Vec<(String, usize)>,
+    pub total_words: usize,
+    pub unique_words: usize,
+}
+
+/// Serialises as the `/count-words` response body:
+/// `{"word_count": {...}, "total_words": N, "unique_words": M}`, with words in
+/// the same order as the dict returned to Python
+impl Serialize for WordCountSummary {
+    fn serialize<S: Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        let mut body = serializer.serialize_struct("WordCountSummary", 3)?;
+        body.serialize_field("word_count", &WordMap(&self.words))?;
+        body.serialize_field("total_words", &self.total_words)?;
+        body.serialize_field("unique_words", &self.unique_words)?;
+        body.end()
+    }
+}
+
+struct WordMap<'a>(&'a [(String, usize)]);
+
+impl Serialize for WordMap<'_> {
+    fn serialize<S: Serializer>(&self, serializer: S) -> Result<S::Ok, S::Error> {
+        let mut map = serializer.serialize_map(Some(self.0.len()))?;
+        for (word, count) in self.0 {
+            map.serialize_entry(word, count)?;
+        }
+        map.end()
+    }
+}
+
+/// Drop stopwords, apply `min_count`, and keep the `top_k` most frequent words.
+///
+/// Top-K selection keeps a min-heap of at most K entries that borrow from the
+/// count map, so its cost is O(V log K) and only the K selected words are
+/// copied out.
+pub fn summarize(counts: &WordCounts, options: &CountOptions) -> WordCountSummary {
+    let mut total_words = 0;
+    let mut unique_words = 0;
+    let candidates = counts.iter().filter(|&(word, count)| {
+        if !options.stopwords.is_empty() && options.stopwords.contains(word) {
+            return false;
+        }
+        total_words += count;
+        unique_words += 1;
+        count >= options.min_count
+    });
+
+    let words = match options.top_k {
+        Some(k) => {
+            // Larger key ranks higher: higher count first, then alphabetical
+            let mut heap: BinaryHeap<Reverse<(usize, Reverse<&str>)>> = BinaryHeap::with_capacity(k + 1);
+            for (word, count) in candidates {
+                let key = (count, Reverse(word));
+                if heap.len() < k {
+                    heap.push(Reverse(key));
+                } else if let Some(Reverse(lowest)) = heap.peek() {
+                    if key > *lowest {
+                        heap.pop();
+                        heap.push(Reverse(key));
+                    }
+                }
+            }
+            // Ascending order of Reverse(key) is descending rank
+            heap.into_sorted_vec()
+                .into_iter()
+                .map(|Reverse((count, Reverse(word)))| (word.to_string(), count))
+                .collect()
+        }
+        None => candidates.map(|(word, count)| (word.to_string(), count)).collect(),
+    };
+
+    WordCountSummary { words, total_words, unique_words }
+}
@@ -0,0 +1,95 @@
+use once_cell::sync::Lazy;
+use rayon::prelude::*;
+use regex::Regex;
+
+use crate::chunking::{next_word_break, split_chunks};
+use crate::interner::WordCounts;
+use crate::runtime::{self, Tokens};
+
+// Compiled once per process instead of on every call
+pub(crate) static WORD_REGEX: Lazy<Regex> = Lazy::new(|| Regex::new(r"[\w']+").unwrap());
+pub(crate) static EMAIL_REGEX: Lazy<Regex> = Lazy::new(|| {
+    Regex::new(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b").unwrap()
+});
+
+/// Inputs at least this large are counted in parallel
+pub const PARALLEL_THRESHOLD: usize = 1024 * 1024;
+/// Smallest piece of input handed to one worker when counting in parallel
+const MIN_PARALLEL_CHUNK: usize = 256 * 1024;
+
+/// Count lowercased word frequencies
+pub fn count_words(text: &str) -> WordCounts {
+    if text.len() >= PARALLEL_THRESHOLD {
+        return count_words_parallel(text);
+    }
+    let mut word_count = WordCounts::new();
+    count_words_into(&mut word_count, text);
+    word_count
+}
+
+/// Map-reduce word count: split on whitespace, count each piece into a
+/// per-worker map and merge the maps. Gives the same result as the
+/// sequential path because no word spans a whitespace byte.
+pub fn count_words_parallel(text: &str) -> WordCounts {
+    split_chunks(text.as_bytes(), parallel_chunk_size(text.len()), next_word_break)
+        .par_iter()
+        .fold(WordCounts::new, |mut counts, chunk| {
+            // Chunk boundaries are ASCII bytes, so these are valid char boundaries
+            count_words_into(&mut counts, &text[chunk.offset..chunk.offset + chunk.bytes.len()]);
+            counts
+        })
+        .reduce(WordCounts::new, WordCounts::merge)
+}
+
+/// Target size of the pieces a `len`-byte input is split into for parallel work
+pub fn parallel_chunk_size(len: usize) -> usize {
+    // A few chunks per thread keeps the work balanced without tiny tasks
+    (len / (rayon::current_num_threads() * 4)).max(MIN_PARALLEL_CHUNK)
+}
+
+/// Add the lowercased word frequencies of `text` to `word_count`
+pub fn count_words_into(word_count: &mut WordCounts, text: &str) {
+    let mut words = 0;
+    for mat in WORD_REGEX.find_iter(text) {
+        word_count.add(mat.as_str());
+        words += 1;
+    }
+    runtime::add_tokens(Tokens::Words, words);
+}
+
+/// Extract email addresses in order of appearance
+pub fn extract_emails(text: &str) -> Vec<String> {
+    let mut emails = Vec::new();
+    extract_emails_into(&mut emails, text);
+    emails
+}
+
+/// Append the email addresses found in `text` to `emails`
+pub fn extract_emails_into(emails: &mut Vec<String>, text: &str) {
+    emails.extend(EMAIL_REGEX.find_iter(text).map(|mat| mat.as_str().to_string()));
+}
+
+/// Trim every line and drop characters other than alphanumerics, whitespace and `.,!?`
+pub fn clean_text(text: &str) -> String {
+    let lines: Vec<&str> = text.lines().collect();
+    let cleaned_lines: Vec<String> = lines
+        .par_iter()
+        .map(|line| clean_line(line))
+        .collect();
+    cleaned_lines.join("\n")
+}
+
+pub fn clean_line(line: &str) -> String {
+    let mut cleaned = String::with_capacity(line.len());
+    push_clean_line(&mut cleaned, line);
+    cleaned
+}
+
+/// Append the cleaned form of a single line to `out`
+pub fn push_clean_line(out: &mut String, line: &str) {
+    out.extend(line.trim().chars().filter(|c| is_kept_char(*c)));
+}
+
+fn is_kept_char(c: char) -> bool {
+    c.is_alphanumeric() || c.is_whitespace() || ".,!?".contains(c)
+}